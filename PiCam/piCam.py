@@ -14,37 +14,68 @@
             - [X] Detect button press, and trigger Image Capture
             - [X] Capture Image and save it to a file
             - [X] Only capture image once -- implement 
-	* [01 Apr 2024] 
-			- [X] Automagically create Stills directory if it doesn't exist
-   			- [X] Fixed repeated captures on button hold
-	  		- [X] Added missing-camera detection
+        * [01 Apr 2024]
+            - [X] Automagically create Stills directory if it doesn't exist
+            - [X] Fixed repeated captures on button hold
+            - [X] Added missing-camera detection
+        * [18 Oct 2026]
+            - [X] Capture both cameras at the same time, with a sidecar record of sensor timestamps and skew
+            - [X] Zero-shutter-lag mode: save the frame closest to the press from a ring of recent frames
+            - [X] Encode and write stills on background threads, atomically, with millisecond file names
+            - [X] Burst mode: BURST_COUNT frames per press at BURST_FPS
+            - [X] Time-lapse of both cameras into a single indexed container file (PiCommon/timelapse.py)
+            - [X] Button edges and time-lapse frames handled as events on an asyncio loop (PiCommon/runtime.py)
+            - [X] Every still and time-lapse added to the SQLite capture catalog (PiCommon/catalog.py)
+            - [X] Stills queued on disk for upload to UPLOAD_URL by async workers (PiCommon/offload.py)
+            - [X] Opens the cameras and button in serve() instead of at import; devices come from PiCommon/devices.py (PI_DEVICES=sim for simulated ones)
+            - [X] Both cameras and the button start at the same time, with a start-up timing report
+            - [X] Cameras served by a running frame bus are read through it instead of opened again (PiCommon/framebus.py)
 
     ! TODO !
             - [-] Automagically create Stills directory if it doesn't exist
-            - [-] Send Image to an API for processing
+            - [X] Send Image to an API for processing
 """
 
 ## Import Modules
-from picamera2 import Picamera2, Preview
-from time import sleep, strftime
-from gpiozero import Button
+from time import monotonic, monotonic_ns
 import os
+import sys
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PiCommon import devices, profiles
+from PiCommon.stills import StillWriter, capture_stills, capture_bursts, unique_stamp, write_record
+from PiCommon.zsl import ZslBuffer, capture_zsl
+from PiCommon.timelapse import TimelapseWriter
+from PiCommon import runtime
+from PiCommon.catalog import Catalog
+from PiCommon.offload import JobQueue, Uploader
+from PiCommon.lazy import lazy
+
+framebus = lazy("PiCommon.framebus")
 
 ## Constants
 PATH = "/home/ayush-pi/Documents/PyCode/PiCam/Stills/"  # Directory Path
 BUTTON_PIN = 2                                          # Button Pin
 PREV_WIDTH = 820                                        # Preview Width
 PREV_HEIGHT = 616                                       # Preview Height
-
-# Create Directory if it doesn't exist
-if not os.path.exists(PATH):
-    os.makedirs(PATH)
+CAPTURE_MODE = "switch"                                 # "switch": still mode per press | "zsl": frame closest to the press
+ZSL_DEPTH = 6                                           # Frames kept per camera in "zsl" mode
+ZSL_MAX_MB = 256                                        # Memory cap per camera in "zsl" mode
+BURST_COUNT = 1                                         # Frames per press (1 = single still)
+BURST_FPS = 5                                           # Frame rate of a burst
+SHOW_CONFIG = False                                     # Print each camera's full configuration when it starts
+STREAM_PROFILE = None                                   # Stream buffers (PiCommon/profiles.py); None picks one for the mode
+TIMELAPSE_INTERVAL = 0                                  # Seconds between time-lapse frames (0 = off)
+TIMELAPSE_STREAM = "main"                               # Stream the time-lapse frames are taken from
+HOLD_TIME = 0.5                                         # Seconds the button is held before a "switch" capture
+CATALOG = "/home/ayush-pi/Documents/PyCode/catalog.db"  # Capture catalog shared by the scripts
+UPLOAD_URL = None                                       # API the stills are sent to (None = no uploads)
+UPLOAD_QUEUE = "/home/ayush-pi/Documents/PyCode/uploads.db"  # Upload jobs, kept across restarts
+FRAME_BUS = True                                        # Read the cameras a running frame bus serves through it
 
 ## Configuration
-main_config={'size': (3280, 2464), 'format': 'XBGR8888'}
-lores = {'size': (1640, 1232), 'format': 'XBGR8888'}
-preview_config = None
-capture_config = None
+capture_configs = {}
 
 ## Controls
 control0 = {'AwbEnable': False, 'ColourGains': (0.9, 0.8), 'AeEnable': True, 'NoiseReductionMode': 2}
@@ -53,41 +84,62 @@ control1 = {'AwbEnable': True, 'AeEnable': True, 'NoiseReductionMode': 2}
 ## Cameras
 cam0 = None
 cam1 = None
+zsl = {}
+writer = None
+catalog = None
+uploads = None
 
 ## Buttons
-button = Button(BUTTON_PIN)
+button = None
 
 def print_info(data):
-    print("    {")
-    for key in data:
-        print(f"\t{key}: {data[key]}")
-    print("    }")
+    print(format_info(data))
+
+
+# Info as one block of text (printed in one go, so concurrent start-ups don't interleave)
+def format_info(data):
+    return "    {\n" + "".join(f"\t{key}: {data[key]}\n" for key in data) + "    }"
+
+
+# Stream profile for the mode: only the streams and buffer sizes it reads
+def stream_profile(preview):
+    if STREAM_PROFILE:
+        return STREAM_PROFILE
+    if CAPTURE_MODE == "zsl":
+        return "zsl"
+    if TIMELAPSE_INTERVAL > 0:
+        return "timelapse"
+    return "preview" if preview else "headless"
 
 
 # Start Camera function
 def start_camera(camnum, controls, preview=True):
-    global preview_config, capture_config
-
+    # The frame bus already owns this camera: stills and frames come through it, with its mode and controls
+    if FRAME_BUS and camnum in framebus.cameras():
+        cam = framebus.BusCamera(camnum, f"piCam cam{camnum}")
+        capture_configs[camnum] = cam.create_still_configuration()
+        print(f"[INFO] Camera {camnum} on the Frame Bus")
+        return cam
     print(f"[INFO] Starting Camera {camnum}")
     # Initialize Camera
-    cam = Picamera2(camera_num=camnum)
+    cam = devices.Picamera2(camera_num=camnum)
     # Create Config
-    preview_config = cam.create_preview_configuration(main=main_config, lores=lores, display="lores")
+    profile = stream_profile(preview)
+    preview_config = profiles.preview_config(cam, profile)
     cam.configure(preview_config)
-    capture_config = cam.create_still_configuration()
+    capture_configs[camnum] = cam.create_still_configuration()
     # Set Controls
     cam.set_controls(controls)
     # Start Preview
     if preview: # If Preview is True, show the preview, else start preview with NULL
-        cam.start_preview(Preview.QTGL, x=10, width=PREV_WIDTH, height=PREV_HEIGHT)
+        cam.start_preview(devices.Preview.QTGL, x=10, width=PREV_WIDTH, height=PREV_HEIGHT)
     else:
-        cam.start_preview(Preview.NULL)
+        cam.start_preview(devices.Preview.NULL)
     cam.start()
-    print(f"\n[CAM {camnum}]")
-    print("    Config: ")
-    print_info(preview_config)
-    print("    Controls: ")
-    print_info(controls)
+    if SHOW_CONFIG:
+        print(f"\n[CAM {camnum}]\n    Config: \n{format_info(preview_config)}\n    Controls: \n{format_info(controls)}")
+    else:
+        print(f"[INFO] Camera {camnum} Started: {profiles.describe(profile)}")
     return cam
 
 
@@ -97,49 +149,154 @@ def stop_camera(cam):
     print("[INFO] Camera Stopped")
 
 
-# Take Picture function
+# Cameras that are available, as {camnum: cam}
+def available_cameras():
+    cams = {}
+    for camnum, cam in ((0, cam0), (1, cam1)):
+        if cam is not None:
+            cams[camnum] = cam
+        else:
+            print(f"[ERROR] Camera {camnum} not found")
+    return cams
+
+
+# Take Picture function (both cameras capture at the same time, files are written in the background)
 def take_picture():
-	print("[INFO] Taking Picture...")
-	sleep(0.2)
-	fname = f"image_{strftime('%Y-%m-%d_%H-%M-%S')}.jpg"
-	print("[INFO] Switching to Capture Mode: ")
-	if cam0 is not None:
-		cam0.switch_mode_and_capture_file(capture_config, PATH+"cam0_"+fname)
-		print(f"[FILE] Image saved to {PATH}cam0_{fname}")
-	else:
-		print("[ERROR] Camera 0 not found")
+    if BURST_COUNT > 1:
+        take_burst(capture_configs)
+        return
+    print("[INFO] Taking Picture...")
+    fname = f"image_{unique_stamp()}"
+    print("[INFO] Switching to Capture Mode: ")
+    cams = available_cameras()
+    records = capture_stills(cams, capture_configs, {n: f"{PATH}cam{n}_{fname}.jpg" for n in cams}, writer)
+    report_picture(fname, records)
+    for n in cams:
+        if capture_configs[n] is not None:
+            print_info(capture_configs[n])
 
-	if cam1 is not None:
-		cam1.switch_mode_and_capture_file(capture_config, PATH+"cam1_"+fname)
-		print(f"[FILE] Image saved to {PATH}cam1_{fname}")
-	else:
-		print("[ERROR] Camera 1 not found")
-	print_cam_info(capture_config)
 
+# Take Picture function, zero shutter lag: saves the frames closest to the press from the ZSL buffers
+def take_picture_zsl(pressed=None):
+    pressed = pressed or monotonic_ns()
+    if BURST_COUNT > 1:
+        # The stream is already full resolution, the burst is taken from it without switching mode
+        take_burst(None)
+        return
+    print("[INFO] Taking Picture...")
+    fname = f"image_{unique_stamp()}"
+    records = capture_zsl(zsl, pressed, {n: f"{PATH}cam{n}_{fname}.jpg" for n in zsl}, writer)
+    # Cameras on the frame bus have no ZSL buffer; the bus takes their stills
+    others = {n: cam for n, cam in available_cameras().items() if n not in zsl}
+    records += capture_stills(others, capture_configs, {n: f"{PATH}cam{n}_{fname}.jpg" for n in others}, writer)
+    report_picture(fname, records)
 
-def do_nothing():
-    sleep(3)
 
+# Take a burst of BURST_COUNT frames from each camera (configs None: from the running streams)
+def take_burst(configs):
+    print(f"[INFO] Taking Burst: {BURST_COUNT} frames at {BURST_FPS} fps")
+    fname = f"burst_{unique_stamp()}"
+    cams = available_cameras()
+    records = capture_bursts(cams, configs, BURST_COUNT, BURST_FPS, {n: f"{PATH}cam{n}_{fname}" for n in cams}, writer)
+    report_picture(fname, records)
 
-def main():
-    global cam0, cam1
 
-    button.when_held = take_picture
-	button.hold_time = 0.5
-	button.hold_repeat = False
-    button.when_released = do_nothing
+# Print the saved files and write the sidecar record
+def report_picture(fname, records):
+    for r in records:
+        if "error" in r:
+            print(f"[ERROR] Camera {r['cam']}: {r['error']}")
+        elif "latency_ms" in r:
+            print(f"[INFO] Camera {r['cam']} Captured ({r['latency_ms']:.0f} ms)")
+            if "offset_ms" in r:
+                print(f"\t[INFO] Frame Offset from Press: {r['offset_ms']:+.1f} ms")
+    record = write_record(f"{PATH}{fname}.json", records)
+    catalog.add_stills(records, {0: control0, 1: control1}, source="piCam")
+    if uploads is not None:
+        for r in records:
+            if "file" in r:
+                uploads.put("still", r["file"], {"cam": r["cam"], "source": "piCam"})
+    if record["skew_ms"] is not None:
+        print(f"[INFO] Camera Skew: {record['skew_ms']:.2f} ms")
+
+
+# Time-lapse: a frame from each camera every TIMELAPSE_INTERVAL seconds, appended to one container file
+async def run_timelapse(rt):
+    path = f"{PATH}timelapse_{unique_stamp()}.ptl"
+    timelapse = TimelapseWriter(path)
+    print(f"[INFO] Time-lapse: every {TIMELAPSE_INTERVAL} s to {path}")
+    cams = {n: cam for n, cam in ((0, cam0), (1, cam1)) if cam is not None}
+    try:
+        async for camnum, image, stamp in rt.frames(cams, TIMELAPSE_STREAM, TIMELAPSE_INTERVAL):
+            await rt.blocking(timelapse.append_image, camnum, image, stamp)
+    finally:
+        await rt.drain()
+        timelapse.close()
+        catalog.add_capture("timelapse", path, source="piCam", meta={"frames": len(timelapse.entries)})
+        print(f"[FILE] Time-lapse saved to {path} ({len(timelapse.entries)} frames)")
+
 
+# Button presses, one at a time: "zsl" captures on the press itself (frames are already buffered),
+# "switch" only once the button has been held for HOLD_TIME
+async def handle_presses(rt, edges):
+    async for edge in edges:
+        if edge.kind != runtime.PRESSED:
+            continue
+        if CAPTURE_MODE == "zsl":
+            await rt.blocking(take_picture_zsl, edge.t_ns)
+        elif await edges.held(HOLD_TIME):
+            await rt.blocking(take_picture)
 
-    cam0 = start_camera(0, control0, preview=False)
-    cam1 = start_camera(1, control1, preview=False)
+
+async def serve(rt):
+    global cam0, cam1, zsl, writer, catalog, uploads, button
+
+    # Create Directory if it doesn't exist
+    os.makedirs(PATH, exist_ok=True)
+    writer = StillWriter()
+    catalog = Catalog(CATALOG)
+    if UPLOAD_URL:
+        uploads = JobQueue(UPLOAD_QUEUE)
+    # Start both cameras and the button at the same time (each loads its library on first use)
+    startup = rt.startup
+    cam0, cam1, button = await asyncio.gather(
+        startup.phase("cam0", rt.blocking(start_camera, 0, control0, False)),
+        startup.phase("cam1", rt.blocking(start_camera, 1, control1, False)),
+        startup.phase("button", rt.blocking(devices.Button, BUTTON_PIN)))
+    if CAPTURE_MODE == "zsl":
+        zsl = {n: ZslBuffer(cam, depth=ZSL_DEPTH, max_mb=ZSL_MAX_MB) for n, cam in ((0, cam0), (1, cam1))
+               if cam is not None and not isinstance(cam, framebus.BusCamera)}
+    edges = rt.button(button)
+    tasks = [asyncio.create_task(handle_presses(rt, edges))]
+    if TIMELAPSE_INTERVAL > 0:
+        tasks.append(asyncio.create_task(run_timelapse(rt)))
+    if uploads is not None:
+        tasks.append(asyncio.create_task(Uploader(uploads, UPLOAD_URL).run()))
+    startup.report()
 
     try:
-        while True:
-            sleep(1)
-    except KeyboardInterrupt:
+        await asyncio.gather(*tasks)
+    finally:
+        # On Ctrl+C gather() has already cancelled them; a second cancel would cut their cleanup short
+        for task in tasks:
+            if not task.cancelling():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        edges.close()
+        await rt.drain()
+        for buf in zsl.values():
+            buf.stop()
+        writer.stop()
+        catalog.close()
+        if uploads is not None:
+            uploads.close()
         stop_camera(cam0)
         stop_camera(cam1)
 
 
+def main():
+    runtime.run(serve)
+
+
 if __name__ == '__main__':
     main()
@@ -16,6 +16,18 @@
         * [30 Mar 2024]
             - [X] Trigger Image Capture upon smile detection
             - [X] Capture Image and save it to a file
+        * [18 Oct 2026]
+            - [X] Search for smiles only inside the lower half of each detected face
+            - [X] Detect faces on a downscaled frame (DETECT_SCALE)
+            - [X] Pipelined grabber / detector pool / renderer with latest-frame-wins queues
+            - [X] Motion-gated face detection on keyframes, faces tracked in between
+            - [X] Save smile captures on a background worker instead of blocking the loop
+            - [X] Replay a video file or image directory in place of the camera
+            - [X] Headless mode reporting FPS, latency percentiles and smiles detected
+            - [X] Detect on several cameras at once, one process per camera, frames shared through shared memory
+            - [X] Cascades read the Y plane of a YUV420 stream in place (no colour conversion, no copy)
+            - [X] Camera streams sized by a profile (PiCommon/profiles.py), footprint printed at start
+            - [X] Read frames from the frame bus (PiCommon/framebus.py) alongside other subscribers
             
     ! TODO !
             - [-] ...
@@ -23,10 +35,20 @@
 
 
 ## ==========[ IMPORTS ]========== ##
+import argparse
 import cv2
+import glob
 import numpy as np
-from picamera2 import Picamera2
-from time import strftime, sleep, time
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from time import strftime, time, perf_counter, sleep
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PiCommon.shmring import ShmRing
+from PiCommon import framebus, profiles
 
 ## ==========[ CONSTANTS ]========== ##
 # Directory Path
@@ -38,21 +60,69 @@ WIDTH = 640
 HEIGHT = 480
 SMILE_DURATION = 3
 
+# Frame Source / Display
+SOURCE = "camera"       # "camera", "bus" (the frame bus), a video file, an image directory or a glob such as "Stills/*.jpg"
+HEADLESS = False        # No preview window; run as fast as the source allows and print a summary
+CASCADES = "/usr/share/opencv4/haarcascades/"
+
+# Detection
+DETECT_MODE = "roi"     # "roi": smiles searched in the lower half of each face | "full": whole frame
+DETECT_SCALE = 0.5      # Faces are detected on a frame scaled by this factor (1.0 = full size)
+
+# Pipeline
+PIPELINE = True         # Run capture, detection and display as separate stages
+DETECT_WORKERS = 3      # Detector threads (OpenCV releases the GIL inside detectMultiScale)
+QUEUE_SIZE = 2          # Max frames waiting between two stages (oldest is dropped when full)
+STATS_INTERVAL = 5      # Seconds between pipeline stats reports
+
+# Camera streams
+STREAM_PROFILE = None   # PiCommon/profiles.py name; None: "detect" (or "detect_headless"), sized WIDTH x HEIGHT
+BUS_POLICY = "latest"   # Frame bus drop policy: "latest", "queue" or "block"
+BUS_TIMEOUT = 5         # Seconds without a frame from the bus before giving up
+
+# Motion gating / Tracking
+TRACK_FACES = True      # Full face detection only on keyframes, faces tracked in between
+KEYFRAME_INTERVAL = 15  # Force a keyframe every N frames
+MOTION_THRESHOLD = 6.0  # Mean pixel difference (0-255) from the last keyframe that forces a new keyframe
+TRACK_MIN_SCORE = 0.6   # Template match score below which a tracked face is considered lost
+TRACK_SIZE = 32         # Faces are tracked on templates scaled down to this many pixels
+SEARCH_MARGIN = 0.25    # Search window around the last box, as a fraction of the box size
+
+# Capture
+CAPTURE_QUEUE = 2       # Max smile captures waiting to be saved (further triggers are skipped)
+
+# Multi-camera
+RING_SLOTS = 3          # Frames per camera in the shared-memory ring read by the display process
+
 # Colors
 chex = ["f44a4a", "fb8f23", "fee440", "7aff60", "00f5d4", "00bbf9", "9b5de5", "f15bb5"]
 
 ## ==========[ GLOBALS ]========== ##
 colors = None
 smile_start_time = None
-picam2 = None
-capture_config = None
+prefix = "smile_"
+source = None
+running = None
+metrics = None
+tracker = None
+capture_worker = None
 
-# Cascade Classifiers
-face_detector = cv2.CascadeClassifier("/usr/share/opencv4/haarcascades/haarcascade_frontalface_default.xml")
-smile_detector = cv2.CascadeClassifier("/usr/share/opencv4/haarcascades/haarcascade_smile.xml")
+# Cascade Classifiers (fall back to the copies bundled with opencv-python off the Pi)
+if not os.path.isdir(CASCADES) and hasattr(cv2, "data"):
+    CASCADES = cv2.data.haarcascades
+# One pair per thread: detectMultiScale on a classifier shared between threads gives unreliable results
+cascades = threading.local()
 
 
 ## ==========[ HELPERS ]========== ##
+# This thread's face and smile classifiers
+def detectors():
+    if not hasattr(cascades, "face"):
+        cascades.face = cv2.CascadeClassifier(CASCADES + "haarcascade_frontalface_default.xml")
+        cascades.smile = cv2.CascadeClassifier(CASCADES + "haarcascade_smile.xml")
+    return cascades
+
+
 # Convert Hex to BGR
 def hex2bgr(str):
     if str[0] == '#':
@@ -70,64 +140,768 @@ def is_inside(rect1, rect2):
     return False
 
 
-# Capture Image
+# Detect faces, on a downscaled copy of the frame if DETECT_SCALE < 1
+def detect_faces(grey, scale=DETECT_SCALE):
+    if scale == 1.0:
+        return detectors().face.detectMultiScale(grey, 1.1, 3)
+
+    small = cv2.resize(grey, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    faces = detectors().face.detectMultiScale(small, 1.1, 3)
+    if len(faces) == 0:
+        return faces
+    # Scale the boxes back up to frame coordinates
+    return np.round(np.asarray(faces) / scale).astype(np.int32)
+
+
+# Locate faces: tracked between keyframes if TRACK_FACES, else detected on every frame
+def locate_faces(grey):
+    if tracker is not None:
+        return tracker.update(grey)
+    return detect_faces(grey)
+
+
+# Detect smiles in the lower half of each face (boxes returned in frame coordinates)
+def detect_smiles_roi(grey, faces):
+    smiles = []
+    for (xf, yf, wf, hf) in faces:
+        x0, y0 = max(xf, 0), max(yf + hf // 2, 0)
+        roi = grey[y0:yf + hf, x0:xf + wf]
+        if roi.size == 0:
+            continue
+        for (x, y, w, h) in detectors().smile.detectMultiScale(roi, 1.6, 12):
+            smiles.append((x0 + x, y0 + y, w, h))
+    return smiles
+
+
+# Detect smiles over the whole frame, keeping only those inside a face
+def detect_smiles_full(grey, faces):
+    smiles = detectors().smile.detectMultiScale(grey, 1.6, 12)
+    return [tuple(s) for s in smiles if any(is_inside(s, f) for f in faces)]
+
+
+# Detect smiles using the configured DETECT_MODE
+def detect_smiles(grey, faces):
+    if len(faces) == 0:
+        return []
+    if DETECT_MODE == "full":
+        return detect_smiles_full(grey, faces)
+    return detect_smiles_roi(grey, faces)
+
+
+# Draw face and smile boxes onto the frame
+def draw_detections(im, faces, smiles):
+    for (xf, yf, wf, hf) in faces:
+        cv2.rectangle(im, (xf, yf), (xf + wf, yf + hf), colors[0])
+    for (x, y, w, h) in smiles:
+        cv2.rectangle(im, (x, y), (x + w, y + h), colors[1])
+
+
+# Show the frame in the preview window (nothing to do when headless)
+def show(im):
+    if not HEADLESS:
+        cv2.imshow("Camera", im)
+        cv2.waitKey(1)
+
+
+# Capture Image (saved by the capture worker, detection keeps running)
 def capture_image():
-    global picam2, capture_config
-    fname = f"{PATH}smile_{strftime('%Y-%m-%d_%H-%M-%S')}.png"
-    print(f"[INFO] Capturing Image: {fname}")
-    picam2.switch_mode_and_capture_file(capture_config, fname)
-    sleep(1)
+    fname = f"{PATH}{prefix}{strftime('%Y-%m-%d_%H-%M-%S')}.png"
+    if capture_worker.submit(fname):
+        print(f"[INFO] Capturing Image: {fname}")
+    else:
+        print(f"[WARN] Capture queue full, skipped: {fname}")
 
 
-## ==========[ MAIN ]========== ##
-def main():
-    global colors, smile_start_time, picam2, capture_config
-    colors = [hex2bgr(i) for i in chex]
+# Capture an image once a smile has been held for SMILE_DURATION seconds
+def update_smile(smiling):
+    global smile_start_time
+    if smiling:
+        if smile_start_time is None:
+            smile_start_time = time()
+        else:
+            if time() - smile_start_time > SMILE_DURATION:
+                print("[INFO] Smile Detected!")
+                metrics.smiles += 1
+                capture_image()
+                smile_start_time = None
+    else:
+        smile_start_time = None
 
-    # Start Camera
-    cv2.startWindowThread()
 
-    picam2 = Picamera2(camera_num=CAM)
-    picam2.configure(picam2.create_preview_configuration(main={"format": 'XRGB8888', "size": (WIDTH, HEIGHT)}, display="main"))
-    picam2.set_controls({"AwbEnable": True, "AeEnable": True, "NoiseReductionMode": 2})
-    capture_config = picam2.create_still_configuration()
-    picam2.start()
+## ==========[ FRAME SOURCES ]========== ##
+# A frame from a source: `grey` for the cascades, `image` (BGR / BGRX) to draw on and show, or None
+# when the profile has no display stream. Camera frames are views into the camera's buffers: they
+# are only valid until release(), which hands the buffer back to the camera.
+class Frame:
+    def __init__(self, grey, image, request=None, maps=()):
+        self.grey = grey
+        self.image = image
+        self.request = request
+        self.maps = maps
+
+    # The image, safe to keep (and draw on) after release()
+    def take_image(self):
+        if self.image is None or self.request is None:
+            return self.image
+        return self.image.copy()
+
+    def release(self):
+        if self.request is not None:
+            for m in self.maps:
+                m.__exit__(None, None, None)
+            self.request.release()
+            self.request = None
+
+
+# Live Raspberry Pi camera
+class CameraSource:
+    live = True
+
+    def __init__(self, camnum):
+        from PiCommon import devices
+        self.name = f"cam{camnum}"
+        self.MappedArray = devices.MappedArray
+        # Every frame a stage may hold (queued, being detected, being grabbed) keeps a buffer
+        held = QUEUE_SIZE + DETECT_WORKERS + 1
+        self.profile = profiles.get(STREAM_PROFILE) if STREAM_PROFILE else profiles.detect_profile((WIDTH, HEIGHT), not HEADLESS, held)
+        self.detect = self.profile.get("detect", "main")
+        self.display = "main" if self.profile["main"]["format"] != "YUV420" else None
+        self.cam = devices.Picamera2(camera_num=camnum)
+        self.cam.configure(profiles.preview_config(self.cam, self.profile))
+        self.cam.set_controls({"AwbEnable": True, "AeEnable": True, "NoiseReductionMode": 2})
+        # RGB888 is laid out B, G, R in memory, which is what cv2.imwrite expects
+        self.capture_config = self.cam.create_still_configuration(main={"format": "RGB888"})
+        self.cam.start()
+        print(f"[INFO] {self.name} streams: {profiles.describe(self.profile, STREAM_PROFILE or ('detect' if self.display else 'detect_headless'))}")
+
+    # Next frame, mapped in place: the Y plane (the first `height` rows of the YUV420 buffer) and the display image
+    def read(self):
+        request = self.cam.capture_request()
+        maps = []
+        def view(stream):
+            m = self.MappedArray(request, stream)
+            maps.append(m)
+            return m.__enter__().array
+        w, h = self.profile[self.detect]["size"]
+        grey = view(self.detect)[:h, :w]
+        image = view(self.display) if self.display else None
+        return Frame(grey, image, request, maps)
+
+    def capture_still(self):
+        request = self.cam.switch_mode_and_capture_request(self.capture_config)
+        try:
+            return request.make_array("main")
+        finally:
+            request.release()
+
+    def stop(self):
+        self.cam.close()
+
+
+# Frames from the frame bus (python -m PiCommon.framebus serve), read in place; the bus owns the
+# camera, so other scripts can subscribe to it at the same time
+class BusSource:
+    live = True
+
+    def __init__(self, camnum):
+        self.name = f"bus cam{camnum}"
+        self.camnum = camnum
+        self.sub = framebus.Subscriber(camnum, f"piCamCV cam{camnum}", BUS_POLICY)
+        streams = self.sub.streams
+        self.detect = "lores" if "lores" in streams else "main"
+        self.planar = streams[self.detect]["format"] in profiles.PLANAR
+        self.display = "main" if streams["main"]["format"] not in profiles.PLANAR else None
+        described = " + ".join(f"{k} {s['size'][0]}x{s['size'][1]} {s['format']}" for k, s in streams.items())
+        print(f"[INFO] {self.name} streams: {described} | policy {BUS_POLICY}")
+
+    # Next frame, held in its bus slot: the Y plane (or a grey conversion for RGB-only profiles) and the display image
+    def read(self):
+        frame = self.sub.get(timeout=BUS_TIMEOUT)
+        if frame is None:
+            print(f"[WARN] No frame from the bus in {BUS_TIMEOUT} s")
+            return None
+        grey = frame.grey(self.detect) if self.planar else cv2.cvtColor(frame[self.detect], cv2.COLOR_BGRA2GRAY)
+        image = frame[self.display] if self.display else None
+        return Frame(grey, image, frame)
+
+    # Full-resolution still taken by the bus
+    def capture_still(self):
+        image, _ = framebus.capture_still(self.camnum)
+        return image
+
+    def stop(self):
+        self.sub.close()
+
+
+# Replays frames from a video file, an image directory or a glob pattern; read() returns None at the end
+class ReplaySource:
+    live = False
+
+    def __init__(self, path, loops=1):
+        self.name = path
+        self.frames = self.load(path)
+        if not self.frames:
+            raise FileNotFoundError(f"No frames found in {path}")
+        # Decoded files are 3-channel BGR; their grey versions are made up front too, like a camera's Y plane
+        self.greys = [cv2.cvtColor(im, cv2.COLOR_BGR2GRAY) for im in self.frames]
+        self.loops = loops
+        self.index = 0
+        self.last = None
+
+    def load(self, path):
+        # Frames are decoded and resized up front, so replay speed only depends on detection
+        if os.path.isdir(path):
+            files = sorted(f for ext in ("jpg", "jpeg", "png") for f in glob.glob(os.path.join(path, f"*.{ext}")))
+            images = [cv2.imread(f) for f in files]
+        elif any(c in path for c in "*?["):
+            images = [cv2.imread(f) for f in sorted(glob.glob(path))]
+        else:
+            images = []
+            video = cv2.VideoCapture(path)
+            ok, im = video.read()
+            while ok:
+                images.append(im)
+                ok, im = video.read()
+            video.release()
+        return [cv2.resize(im, (WIDTH, HEIGHT), interpolation=cv2.INTER_AREA) for im in images if im is not None]
+
+    def read(self):
+        if self.index >= len(self.frames) * self.loops:
+            return None
+        i = self.index % len(self.frames)
+        self.last = self.frames[i]
+        self.index += 1
+        # Hand out a copy, the frame gets drawn on
+        return Frame(self.greys[i], self.last.copy())
+
+    def capture_still(self):
+        return self.last.copy()
+
+    def stop(self):
+        pass
+
+
+# Open the camera, or a replay source for anything else
+def open_source(spec, camnum=CAM, loops=1):
+    if spec == "camera":
+        return CameraSource(camnum)
+    if spec == "bus":
+        return BusSource(camnum)
+    return ReplaySource(spec, loops)
+
+
+# Frame count, per-frame latency (capture to detections drawn) and smiles detected over the run
+class RunMetrics:
+    def __init__(self):
+        self.start = perf_counter()
+        self.latencies = []
+        self.smile_frames = 0
+        self.smiles = 0
+
+    def frame(self, t_capture, smiling):
+        self.latencies.append(perf_counter() - t_capture)
+        self.smile_frames += smiling
+
+    def summary(self, name=""):
+        elapsed = perf_counter() - self.start
+        frames = len(self.latencies)
+        print(f"\n[RESULT] {name}")
+        print(f"\tFrames: {frames} in {elapsed:.2f} s | FPS: {frames / elapsed if elapsed else 0:.1f}")
+        if frames:
+            p50, p90, p99 = np.percentile(np.array(self.latencies) * 1000, [50, 90, 99])
+            print(f"\tLatency: p50 {p50:.1f} ms | p90 {p90:.1f} ms | p99 {p99:.1f} ms")
+        print(f"\tFrames with a smile: {self.smile_frames} | Smiles detected: {self.smiles}")
+
+
+## ==========[ CAPTURE ]========== ##
+# Takes the full-resolution still, then encodes and writes it, on a background thread
+class CaptureWorker(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.queue = queue.Queue(CAPTURE_QUEUE)
+        self.skipped = 0
+        self.saved = 0
+        self.total_latency = 0.0
+
+    def submit(self, fname):
+        try:
+            self.queue.put_nowait((time(), fname))
+            return True
+        except queue.Full:
+            self.skipped += 1
+            return False
+
+    def backlog(self):
+        return self.queue.qsize()
+
+    def stop(self):
+        self.queue.put((time(), None))
+        self.join(timeout=5)
+
+    def run(self):
+        while True:
+            requested, fname = self.queue.get()
+            if fname is None:
+                break
+            start = time()
+            image = source.capture_still()
+            captured = time()
+            cv2.imwrite(fname, image)
+            done = time()
+
+            self.saved += 1
+            self.total_latency += done - requested
+            print(f"[FILE] Image saved to {fname}")
+            print(f"\t[INFO] Latency: {(done - requested) * 1000:.0f} ms (queued {(start - requested) * 1000:.0f} ms | "
+                  f"sensor {(captured - start) * 1000:.0f} ms | encode {(done - captured) * 1000:.0f} ms) | Backlog: {self.backlog()}")
+
+    def summary(self):
+        avg = self.total_latency / self.saved * 1000 if self.saved else 0
+        return f"captures: saved {self.saved} skipped {self.skipped} backlog {self.backlog()} avg latency {avg:.0f} ms"
 
+
+## ==========[ TRACKING ]========== ##
+# Cheap motion score: mean absolute difference between two thumbnails
+def motion_score(thumb, ref):
+    return float(cv2.absdiff(thumb, ref).mean())
+
+
+# Face boxes (clamped to the frame) with the scaled-down templates the tracker follows them by
+def face_templates(grey, boxes):
+    height, width = grey.shape[:2]
+    faces = []
+    for (x, y, w, h) in boxes:
+        x, y = max(int(x), 0), max(int(y), 0)
+        w, h = min(int(w), width - x), min(int(h), height - y)
+        scale = min(1.0, TRACK_SIZE / max(w, h))
+        template = cv2.resize(grey[y:y + h, x:x + w], None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        faces.append([(x, y, w, h), template, scale])
+    return faces
+
+
+# Runs the face cascade on keyframes only, and follows the faces with template matching in between.
+# A keyframe is forced every KEYFRAME_INTERVAL frames, on motion, or when a face is lost.
+# plan() and follow() must each see the frames in order; keyframes from plan() can be detected anywhere.
+class FaceTracker:
+    def __init__(self):
+        self.ref = None         # Thumbnail of the last keyframe
+        self.faces = []         # [box, template, template scale] per face
+        self.since_key = 0
+        self.lost = False
+        self.frames = 0
+        self.keyframes = 0
+
+    # Detect and track on this thread
+    def update(self, grey):
+        if self.plan(grey):
+            return self.adopt(face_templates(grey, detect_faces(grey)))
+        return self.follow(grey)
+
+    # Cheap check: does this frame need full face detection?
+    def plan(self, grey):
+        self.frames += 1
+        thumb = cv2.resize(grey, (80, 60), interpolation=cv2.INTER_AREA)
+        if (self.ref is None or self.since_key >= KEYFRAME_INTERVAL
+                or motion_score(thumb, self.ref) > MOTION_THRESHOLD):
+            self.ref = thumb
+            self.since_key = 0
+            self.keyframes += 1
+            return True
+        self.since_key += 1
+        return False
+
+    # Follow the faces found on a keyframe from now on
+    def adopt(self, faces):
+        self.lost = False
+        self.faces = faces
+        return [face[0] for face in faces]
+
+    # Track the faces into a frame that is not a keyframe, detecting them again if one was lost
+    def follow(self, grey):
+        if self.lost:
+            self.keyframes += 1
+            return self.adopt(face_templates(grey, detect_faces(grey)))
+        return self.track(grey)
+
+    def track(self, grey):
+        height, width = grey.shape[:2]
+        boxes = []
+        for face in self.faces:
+            (x, y, w, h), template, scale = face
+            mx, my = int(w * SEARCH_MARGIN), int(h * SEARCH_MARGIN)
+            x0, y0 = max(x - mx, 0), max(y - my, 0)
+            x1, y1 = min(x + w + mx, width), min(y + h + my, height)
+            window = cv2.resize(grey[y0:y1, x0:x1], None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+                self.lost = True
+                continue
+            _, score, _, (bx, by) = cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED))
+            if score < TRACK_MIN_SCORE:
+                self.lost = True
+                continue
+            face[0] = (x0 + int(bx / scale), y0 + int(by / scale), w, h)
+            boxes.append(face[0])
+        return boxes
+
+
+## ==========[ PIPELINE ]========== ##
+# Bounded queue between two stages; when full, the oldest frame is dropped (latest frame wins)
+# and handed to on_drop (camera frames give their buffer back)
+class StageQueue:
+    def __init__(self, name, maxsize=QUEUE_SIZE, on_drop=None):
+        self.name = name
+        self.queue = queue.Queue(maxsize)
+        self.drops = 0
+        self.lock = threading.Lock()
+        self.on_drop = on_drop
+        self.take_lock = threading.Lock()
+        self.taken = 0
+
+    def put(self, item, block=False):
+        if block:
+            self.queue.put(item)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    dropped = self.queue.get_nowait()
+                    with self.lock:
+                        self.drops += 1
+                    if self.on_drop is not None and dropped is not None:
+                        self.on_drop(dropped)
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=0.5):
+        return self.queue.get(timeout=timeout)
+
+    # Get the next item numbered in the order items leave the queue; prepare(item) runs under the
+    # same lock, so it also sees the items in that order
+    def take(self, prepare=None, timeout=0.5):
+        with self.take_lock:
+            item = self.queue.get(timeout=timeout)
+            n = self.taken
+            self.taken += 1
+            return n, item, prepare(item) if prepare is not None else None
+
+    def depth(self):
+        return self.queue.qsize()
+
+
+# Per-stage frame counters, reported every STATS_INTERVAL seconds
+class PipelineStats:
+    def __init__(self, queues):
+        self.queues = queues
+        self.counts = {"grab": 0, "detect": 0, "render": 0}
+        self.lock = threading.Lock()
+        self.last_report = time()
+        self.last_counts = dict(self.counts)
+
+    def count(self, stage):
+        with self.lock:
+            self.counts[stage] += 1
+
+    def report(self):
+        now = time()
+        if now - self.last_report < STATS_INTERVAL:
+            return
+        with self.lock:
+            counts = dict(self.counts)
+        elapsed = now - self.last_report
+        fps = " | ".join(f"{k}: {(counts[k] - self.last_counts[k]) / elapsed:.1f} fps" for k in ("grab", "detect", "render"))
+        depth = " | ".join(f"{q.name}: depth {q.depth()} drops {q.drops}" for q in self.queues)
+        if tracker is not None and tracker.frames:
+            fps += f" | keyframes: {100 * tracker.keyframes / tracker.frames:.0f}%"
+        print(f"[STATS] {fps}")
+        print(f"[STATS] {depth}")
+        print(f"[STATS] {capture_worker.summary()}")
+        self.last_report = now
+        self.last_counts = counts
+
+
+# Grabber stage: pull frames from the source as fast as it delivers them.
+# Replayed frames are never dropped and are rendered in order, so every run over the same files gives the same results.
+def grab_frames(frame_q, stats, workers):
+    seq = 0
+    while running.is_set():
+        frame = source.read()
+        if frame is None:
+            break
+        frame_q.put((seq, perf_counter(), frame), block=not source.live)
+        stats.count("grab")
+        seq += 1
+    # One end-of-stream marker per detector
+    for _ in range(workers):
+        frame_q.put(None, block=True)
+
+
+# Detector stage: run the cascades on the newest frame available.
+# With the tracker, only keyframes are detected here; the renderer tracks the faces in between.
+def detect_frames(frame_q, result_q, stats):
+    plan = (lambda item: item is not None and tracker.plan(item[2].grey)) if tracker is not None else None
+    while running.is_set():
+        try:
+            n, item, key = frame_q.take(plan)
+        except queue.Empty:
+            continue
+        if item is None:
+            result_q.put((n, None), block=True)
+            break
+        seq, t, frame = item
+        faces = smiles = grey = templates = None
+        if tracker is None or key:
+            faces = detect_faces(frame.grey)
+            smiles = detect_smiles(frame.grey, faces)
+            if key:
+                templates = face_templates(frame.grey, faces)
+        else:
+            grey = frame.grey.copy()
+        # The renderer gets its own image; the camera buffer goes back right away
+        im = frame.take_image()
+        frame.release()
+        # Never dropped: the renderer puts the results back in order, and a gap would stall it
+        result_q.put((n, (t, im, faces, smiles, grey, templates)), block=True)
+        stats.count("detect")
+
+
+# Renderer stage: put the results back in frame order, track faces between keyframes, draw, track
+# the smile and show the frame (runs on the main thread for HighGUI)
+def render_frames(result_q, stats, workers):
+    pending = {}
+    next_n = 0
+    finished = 0
+    while running.is_set() and finished < workers:
+        stats.report()
+        try:
+            n, result = result_q.get()
+        except queue.Empty:
+            continue
+        pending[n] = result
+        # Detectors can finish out of order
+        while next_n in pending and running.is_set():
+            result = pending.pop(next_n)
+            next_n += 1
+            if result is None:
+                finished += 1
+                continue
+            t, im, faces, smiles, grey, templates = result
+            if templates is not None:
+                tracker.adopt(templates)
+            elif grey is not None:
+                faces = tracker.follow(grey)
+                smiles = detect_smiles(grey, faces)
+
+            if im is not None:
+                draw_detections(im, faces, smiles)
+            update_smile(len(smiles) > 0)
+            metrics.frame(t, len(smiles) > 0)
+            stats.count("render")
+
+            show(im)
+
+
+# Start the grabber and detector threads, then render on this thread until interrupted
+def run_pipeline():
+    global running
+    running = threading.Event()
+    running.set()
+
+    frame_q = StageQueue("frames", on_drop=lambda item: item[2].release())
+    result_q = StageQueue("results")
+    stats = PipelineStats([frame_q, result_q])
+    workers = DETECT_WORKERS
+
+    threads = [threading.Thread(target=grab_frames, args=(frame_q, stats, workers), daemon=True)]
+    for _ in range(workers):
+        threads.append(threading.Thread(target=detect_frames, args=(frame_q, result_q, stats), daemon=True))
+    for t in threads:
+        t.start()
+
+    print(f"[RUNNING] Looking for Smiles... ({workers} detector threads{', faces tracked between keyframes' if tracker is not None else ''})")
+    try:
+        render_frames(result_q, stats, workers)
+    finally:
+        running.clear()
+        for t in threads:
+            t.join(timeout=1)
+
+
+# Capture, detect and display one frame at a time
+def run_serial():
     while True:
-        im = picam2.capture_array()
+        t = perf_counter()
+        frame = source.read()
+        if frame is None:
+            break
 
-        grey = cv2.cvtColor(im, cv2.COLOR_BGR2GRAY)
-        faces = face_detector.detectMultiScale(grey, 1.1, 3)
-        smiles = smile_detector.detectMultiScale(grey, 1.6, 12)
+        faces = locate_faces(frame.grey)
+        smiles = detect_smiles(frame.grey, faces)
+        im = frame.take_image()
+        frame.release()
         
-        print(f"[RUNNING] Looking for Smiles...")
-
-        for (xf, yf, wf, hf) in faces:
-            cv2.rectangle(im, (xf, yf), (xf + wf, yf + hf), colors[0])
+        if not HEADLESS:
+            print(f"[RUNNING] Looking for Smiles...")
 
-            for (x, y, w, h) in smiles:
-                if is_inside((x, y, w, h), (xf, yf, wf, hf)):
-                    cv2.rectangle(im, (x, y), (x + w, y + h), colors[1])
-                else:
-                    smiles = np.delete(smiles, 0, 0)
-                    continue
-            
-            if len(smiles) > 0:
-                if smile_start_time is None:
-                    smile_start_time = time()
-                else:
-                    if time() - smile_start_time > SMILE_DURATION:
-                        print("[INFO] Smile Detected!")
-                        capture_image()
-                        smile_start_time = None
-            else:
-                smile_start_time = None
+        if im is not None:
+            draw_detections(im, faces, smiles)
+        update_smile(len(smiles) > 0)
+        metrics.frame(t, len(smiles) > 0)
         
         # print(f"Faces: {len(faces)} | Smiles: {len(smiles)}")
 
-        cv2.imshow("Camera", im)
-        cv2.waitKey(1)
+        show(im)
+
+
+## ==========[ MULTI-CAMERA ]========== ##
+# Detection loop for one camera, in its own process; annotated frames are published to the display process
+def camera_process(camnum, spec, args, stop):
+    global prefix
+    ring = ShmRing.attach(spec)
+    setup(args, camnum)
+    prefix = f"smile_cam{camnum}_"
+    try:
+        while not stop.is_set():
+            t = perf_counter()
+            frame = source.read()
+            if frame is None:
+                break
+
+            faces = locate_faces(frame.grey)
+            smiles = detect_smiles(frame.grey, faces)
+            update_smile(len(smiles) > 0)
+            metrics.frame(t, len(smiles) > 0)
+
+            # The only copy of the frame: camera buffer -> shared slot, drawn on in place
+            # (the Y plane in every channel when there is no display stream)
+            slot = ring.reserve()
+            slot[...] = frame.image[..., :3] if frame.image is not None else frame.grey[..., None]
+            frame.release()
+            draw_detections(slot, faces, smiles)
+            ring.commit(len(faces), len(smiles), metrics.smiles)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        teardown()
+        ring.close()
+        if HEADLESS:
+            metrics.summary(f"cam{camnum}")
+
+
+# Start one detection process per camera and show their newest frames side by side
+def run_multi(args):
+    ctx = multiprocessing.get_context("spawn")
+    stop = ctx.Event()
+    cams = args.cams
+    rings = [ShmRing((HEIGHT, WIDTH, 3), slots=RING_SLOTS) for _ in cams]
+    procs = [ctx.Process(target=camera_process, args=(cam, ring.spec, args, stop), name=f"cam{cam}")
+             for cam, ring in zip(cams, rings)]
+    for p in procs:
+        p.start()
+    print(f"[RUNNING] Looking for Smiles on cameras {', '.join(map(str, cams))}...")
+
+    mosaic = np.zeros((HEIGHT, WIDTH * len(cams), 3), dtype=np.uint8)
+    last = [-1] * len(cams)
+    shown = [0] * len(cams)
+    meta = [None] * len(cams)
+    report_seq, report_shown, report_time = list(last), list(shown), time()
+    try:
+        while any(p.is_alive() for p in procs):
+            new = False
+            for i, ring in enumerate(rings):
+                # Read straight into this camera's part of the mosaic
+                result = ring.read_latest(mosaic[:, i * WIDTH:(i + 1) * WIDTH], last[i])
+                if result is not None:
+                    last[i], meta[i] = result
+                    shown[i] += 1
+                    new = True
+            if new:
+                show(mosaic)
+            else:
+                sleep(0.002)
+
+            now = time()
+            if now - report_time >= STATS_INTERVAL:
+                elapsed = now - report_time
+                for i, cam in enumerate(cams):
+                    faces, smiles, captures = meta[i][2:5] if meta[i] is not None else (0, 0, 0)
+                    print(f"[STATS] cam{cam}: detect {(last[i] - report_seq[i]) / elapsed:.1f} fps | "
+                          f"display {(shown[i] - report_shown[i]) / elapsed:.1f} fps | "
+                          f"faces {faces} | smiles {smiles} | captures {captures}")
+                report_seq, report_shown, report_time = list(last), list(shown), now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for p in procs:
+            p.join(timeout=5)
+        for ring in rings:
+            ring.close()
+
+
+## ==========[ MAIN ]========== ##
+def parse_args():
+    parser = argparse.ArgumentParser(description="Capture an image when a smile is held for SMILE_DURATION seconds")
+    parser.add_argument("--source", default=SOURCE, help="'camera', 'bus', a video file, an image directory or a glob pattern")
+    parser.add_argument("--cams", type=int, nargs="+", default=[CAM], help="Camera number(s); more than one runs a process per camera")
+    parser.add_argument("--loops", type=int, default=1, help="Times to replay a file source")
+    parser.add_argument("--headless", action="store_true", default=HEADLESS, help="No preview window, print a summary at the end")
+    parser.add_argument("--serial", action="store_true", default=not PIPELINE, help="Run capture, detection and display in one loop")
+    parser.add_argument("--out", default=PATH, help="Directory for smile captures")
+    return parser.parse_args()
+
+
+# Open the frame source and start the helpers for this process
+def setup(args, camnum):
+    global colors, source, tracker, capture_worker, metrics, HEADLESS, PATH
+    HEADLESS = args.headless
+    PATH = os.path.join(args.out, "")
+    os.makedirs(PATH, exist_ok=True)
+
+    colors = [hex2bgr(i) for i in chex]
+    if TRACK_FACES:
+        tracker = FaceTracker()
+
+    source = open_source(args.source, camnum, args.loops)
+    capture_worker = CaptureWorker()
+    capture_worker.start()
+    metrics = RunMetrics()
+
+
+def teardown():
+    capture_worker.stop()
+    source.stop()
+
+
+def main():
+    global HEADLESS
+    args = parse_args()
+    HEADLESS = args.headless
+    if len(args.cams) > 1:
+        if not args.headless:
+            cv2.startWindowThread()
+        run_multi(args)
+        return
+
+    # Start Camera
+    if not args.headless:
+        cv2.startWindowThread()
+    setup(args, args.cams[0])
+
+    try:
+        if args.serial:
+            run_serial()
+        else:
+            run_pipeline()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        teardown()
+        if HEADLESS:
+            metrics.summary()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
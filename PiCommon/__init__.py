@@ -0,0 +1,6 @@
+"""
+    DESCRIPTION :   Helpers shared by the PiCam, PiMic and PiSearch scripts
+
+    The scripts are run directly (python piCamCV.py), so each one puts the repository
+    root on sys.path before importing from here.
+"""
@@ -0,0 +1,176 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Regenerate waveforms and features for a whole Recordings directory
+
+    Every WAV is processed on a process pool (peaks file, waveform plot, features file and
+    optionally the spectrogram plot). A manifest in the directory remembers the size, mtime and
+    content hash of each WAV when its outputs were made, plus VERSION:
+        - same size and mtime (and outputs present) : skipped without reading the file
+        - otherwise the worker hashes it first and only redoes the work if the hash changed
+    Bump VERSION (or pass --force) after changing the plotting / feature code.
+
+    Usage:  python -m PiCommon.batch PiMic/Recordings [--waveforms DIR] [--spectrogram] [--jobs N]
+"""
+
+## ==========[ MODULES ]========== ##
+import argparse
+import hashlib
+import json
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PiCommon.wavstream import HEADER_SIZE, read_samples
+
+
+## ==========[ CONSTANTS ]========== ##
+VERSION = 1                 # Bump when the outputs change, to redo every file
+MANIFEST = ".manifest.json"
+HASH_BLOCK = 1 << 20
+FEATURE_CHUNK = 4096        # Samples fed to the feature analyzer at a time, as while recording
+
+
+## ==========[ HELPERS ]========== ##
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# (channels, rate) from the header of a 16-bit PCM WAV as written by WavWriter
+def wav_format(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:4] != b"RIFF" or header[36:40] != b"data":
+        raise ValueError("not a 16-bit PCM WAV with a 44-byte header")
+    channels, rate = struct.unpack_from("<HI", header, 22)
+    return channels, rate
+
+
+# Files made for a WAV (no plots for an empty one, e.g. a trimmed take without speech)
+def outputs(wav_path, waveforms, spectrogram):
+    name = os.path.splitext(os.path.basename(wav_path))[0]
+    base = os.path.splitext(wav_path)[0]
+    paths = [base + ".peaks.npz", base + ".features.npz"]
+    if os.path.getsize(wav_path) > HEADER_SIZE:
+        paths.append(os.path.join(waveforms, f"{name}.png"))
+        if spectrogram:
+            paths.append(os.path.join(waveforms, f"{name}_spectrogram.png"))
+    return paths
+
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest["files"] if manifest.get("version") == VERSION else {}
+
+
+def save_manifest(directory, files):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".part", "w") as f:
+        json.dump({"version": VERSION, "files": files}, f, indent=1)
+    os.replace(path + ".part", path)
+
+
+## ==========[ WORKER ]========== ##
+# Make the outputs of one WAV (in a pool process); returns its manifest entry and whether it was redone
+def process(wav_path, waveforms, spectrogram, known_hash=None):
+    from PiCommon.waveform import compute_peaks, save_peaks, peaks_path, render
+    from PiCommon.features import FeatureAnalyzer
+
+    st = os.stat(wav_path)
+    entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": file_hash(wav_path)}
+    present = all(os.path.exists(p) for p in outputs(wav_path, waveforms, spectrogram))
+    if entry["hash"] == known_hash and present:
+        return entry, False
+
+    name = os.path.splitext(os.path.basename(wav_path))[0]
+    channels, rate = wav_format(wav_path)
+    samples = read_samples(wav_path)
+
+    peaks = compute_peaks(samples, rate)
+    save_peaks(peaks_path(wav_path), peaks)
+    if peaks["count"]:
+        render(peaks, f"Waveform: {name}.wav", f"SAMPLE_RATE = {rate} Hz", os.path.join(waveforms, f"{name}.png"))
+
+    features = FeatureAnalyzer(rate, channels)
+    step = FEATURE_CHUNK * channels
+    for i in range(0, len(samples), step):
+        features.write(samples[i:i + step])
+    png = os.path.join(waveforms, f"{name}_spectrogram.png") if spectrogram else None
+    features.close(os.path.splitext(wav_path)[0] + ".features.npz", png, f"Spectrogram: {name}.wav")
+    return entry, True
+
+
+## ==========[ BATCH ]========== ##
+def run(directory, waveforms, spectrogram=False, jobs=None, force=False):
+    os.makedirs(waveforms, exist_ok=True)
+    manifest = {} if force else load_manifest(directory)
+    wavs = sorted(f for f in os.listdir(directory) if f.endswith(".wav"))
+
+    # Cheap check first: unchanged size and mtime with the outputs present needs no work at all
+    todo, files = [], {}
+    for f in wavs:
+        path = os.path.join(directory, f)
+        st = os.stat(path)
+        entry = manifest.get(f)
+        if (entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+                and all(os.path.exists(p) for p in outputs(path, waveforms, spectrogram))):
+            files[f] = entry
+        else:
+            todo.append(f)
+    print(f"[INFO] {len(wavs)} recordings | {len(wavs) - len(todo)} up to date | {len(todo)} to check")
+
+    started = time.perf_counter()
+    done = redone = failed = 0
+    size = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(process, os.path.join(directory, f), waveforms, spectrogram,
+                                   manifest.get(f, {}).get("hash")): f for f in todo}
+            for future in as_completed(futures):
+                f = futures[future]
+                done += 1
+                try:
+                    entry, changed = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"\t[ERROR] {f}: {e}")
+                    continue
+                files[f] = entry
+                redone += changed
+                size += entry["size"]
+                elapsed = time.perf_counter() - started
+                print(f"\t[{done}/{len(todo)}] {'done' if changed else 'unchanged'} {f} | "
+                      f"{done / elapsed:.1f} files/s | {size / 2**20 / elapsed:.1f} MB/s", flush=True)
+    save_manifest(directory, files)
+
+    elapsed = time.perf_counter() - started
+    print(f"[INFO] Processed {redone} | unchanged {len(wavs) - redone - failed} | failed {failed} | {elapsed:.2f} s")
+    return redone, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate waveforms and features for a Recordings directory")
+    parser.add_argument("directory", help="Directory of WAV recordings")
+    parser.add_argument("--waveforms", default=None, help="Plot directory (default: Waveforms next to the recordings)")
+    parser.add_argument("--spectrogram", action="store_true", help="Also plot spectrograms")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and redo everything")
+    args = parser.parse_args()
+
+    directory = os.path.abspath(args.directory)
+    waveforms = args.waveforms or os.path.join(os.path.dirname(directory), "Waveforms")
+    run(directory, waveforms, args.spectrogram, args.jobs, args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   End-to-end benchmark of piCam, piMic and piVision on the simulated devices
+
+    Each script runs in its own process with PI_DEVICES=sim and its output directories moved to a
+    temporary directory. Once its button is armed, a driver thread plays a press / hold / release
+    sequence on it, waits for the files to stop changing and sends Ctrl+C, like a user would.
+
+    Reported per script, as JSON:
+        - press_to_file_ms  : press to the first file of that press being complete (last write)
+        - release_to_done_ms: release to the last file of that press being complete
+        - throughput        : files and MB written per second, from the first press to the last file
+        - peak_rss_mb       : peak resident memory of the process
+    Files are matched to the press they complete after (and before the next press).
+
+        python -m PiCommon.bench [--scripts piCam piMic piVision] [--presses 5] [--hold 1.0] [--gap 1.5]
+                                 [--set CAPTURE_MODE='"zsl"'] [--out bench.json]
+"""
+
+## ==========[ MODULES ]========== ##
+import argparse
+import ast
+import contextlib
+import importlib.util
+import json
+import os
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+## ==========[ CONSTANTS ]========== ##
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = {
+    "piCam": os.path.join(ROOT, "PiCam", "piCam.py"),
+    "piMic": os.path.join(ROOT, "PiMic", "piMic.py"),
+    "piVision": os.path.join(ROOT, "PiSearch", "piVision.py"),
+}
+# Module paths each script writes to, moved under the temporary directory
+OUTPUTS = {
+    "piCam": {"PATH": "Stills/"},
+    "piMic": {"PATH": ""},
+    "piVision": {"STILLS": "Stills/", "RECORDINGS": "Recordings/", "SESSIONS": "Sessions/"},
+}
+READY_TIMEOUT = 60          # Seconds for a script to arm its button
+WARMUP = 1.0                # Seconds after the button is armed before the first press (pre-roll, ZSL rings)
+SETTLE = 2.0                # Seconds without new writes before the run is over
+SETTLE_TIMEOUT = 60
+SKIP = (".db", ".db-wal", ".db-shm", ".tmp")
+
+
+## ==========[ HELPERS ]========== ##
+# Output files under `root` as {path: (mtime_ns, size)}
+def snapshot(root):
+    files = {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            if not name.endswith(SKIP):
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files[path] = (st.st_mtime_ns, st.st_size)
+    return files
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+    return {"p50": round(pick(0.5), 1), "p95": round(pick(0.95), 1), "max": round(values[-1], 1)}
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+## ==========[ CHILD ]========== ##
+# Press / hold / release the script's button, then stop the script once its files have settled
+def drive(simdevices, pin, root, presses, hold, gap, events):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while (button := simdevices.buttons.get(pin)) is None or button.when_pressed is None:
+        if time.monotonic() > deadline:
+            events["error"] = "button never armed"
+            os.kill(os.getpid(), signal.SIGINT)
+            return
+        time.sleep(0.05)
+    events["ready_rss_mb"] = peak_rss_mb()
+    time.sleep(WARMUP)
+    for _ in range(presses):
+        pressed = time.time_ns()
+        button.press()
+        time.sleep(hold)
+        released = time.time_ns()
+        button.release()
+        events["presses"].append((pressed, released))
+        time.sleep(gap)
+    # Wait for the last writes
+    last, changed = snapshot(root), time.monotonic()
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    while time.monotonic() - changed < SETTLE and time.monotonic() < deadline:
+        time.sleep(0.2)
+        now = snapshot(root)
+        if now != last:
+            last, changed = now, time.monotonic()
+    os.kill(os.getpid(), signal.SIGINT)
+
+
+# Run one script in this process and return its results
+def run_script(name, presses, hold, gap, overrides):
+    root = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    spec = importlib.util.spec_from_file_location(name, SCRIPTS[name])
+    script = importlib.util.module_from_spec(spec)
+    started = time.monotonic()
+    spec.loader.exec_module(script)
+    import_ms = (time.monotonic() - started) * 1000
+    for attr, sub in OUTPUTS[name].items():
+        setattr(script, attr, os.path.join(root, sub))
+    script.CATALOG = os.path.join(root, "catalog.db")
+    script.UPLOAD_QUEUE = os.path.join(root, "uploads.db")
+    for attr, value in overrides.items():
+        setattr(script, attr, value)
+
+    from PiCommon import simdevices
+    events = {"presses": []}
+    driver = threading.Thread(target=drive, args=(simdevices, script.BUTTON_PIN, root, presses, hold, gap, events), daemon=True)
+    driver.start()
+    with open(os.path.join(root, "output.log"), "w") as log, contextlib.redirect_stdout(log):
+        script.main()
+    driver.join()
+
+    # Match files to presses: a file belongs to the last press before it was completed
+    files = sorted(snapshot(root).items(), key=lambda f: f[1][0])
+    files = [(path, mtime, size) for path, (mtime, size) in files if not path.endswith("output.log")]
+    per_press = []
+    for i, (pressed, released) in enumerate(events["presses"]):
+        until = events["presses"][i + 1][0] if i + 1 < len(events["presses"]) else float("inf")
+        own = [(mtime, size) for _, mtime, size in files if pressed <= mtime < until]
+        per_press.append({
+            "files": len(own),
+            "bytes": sum(size for _, size in own),
+            "press_to_file_ms": (own[0][0] - pressed) / 1e6 if own else None,
+            "release_to_done_ms": (own[-1][0] - released) / 1e6 if own else None,
+        })
+    written = [(mtime, size) for _, mtime, size in files if events["presses"] and mtime >= events["presses"][0][0]]
+    span = (written[-1][0] - events["presses"][0][0]) / 1e9 if written else 0
+    return {
+        "script": name,
+        "presses": len(events["presses"]),
+        "hold_s": hold,
+        "import_ms": round(import_ms, 1),
+        "press_to_file_ms": percentiles([p["press_to_file_ms"] for p in per_press if p["press_to_file_ms"] is not None]),
+        "release_to_done_ms": percentiles([p["release_to_done_ms"] for p in per_press if p["release_to_done_ms"] is not None]),
+        "missed_presses": sum(1 for p in per_press if not p["files"]),
+        "throughput": {
+            "files": len(written),
+            "mb": round(sum(size for _, size in written) / 2**20, 2),
+            "files_per_s": round(len(written) / span, 2) if span else None,
+            "mb_per_s": round(sum(size for _, size in written) / 2**20 / span, 2) if span else None,
+        },
+        "ready_rss_mb": round(events.get("ready_rss_mb", 0), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "per_press": per_press,
+        "output": root,
+        **({"error": events["error"]} if "error" in events else {}),
+    }
+
+
+## ==========[ PARENT ]========== ##
+def main():
+    parser = argparse.ArgumentParser(description="Press-to-file latency, throughput and memory of the capture scripts (simulated devices)")
+    parser.add_argument("--scripts", nargs="+", choices=list(SCRIPTS), default=list(SCRIPTS))
+    parser.add_argument("--presses", type=int, default=5)
+    parser.add_argument("--hold", type=float, default=1.0, help="Seconds the button is held down")
+    parser.add_argument("--gap", type=float, default=1.5, help="Seconds between a release and the next press")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override a script constant (Python literal), e.g. CAPTURE_MODE='\"zsl\"'")
+    parser.add_argument("--out", help="Also write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    overrides = {k: ast.literal_eval(v) for k, v in (s.split("=", 1) for s in args.set)}
+
+    if args.child:
+        result = run_script(args.child, args.presses, args.hold, args.gap, overrides)
+        print(json.dumps(result))
+        return
+
+    # One process per script, so the peak RSS is the script's own
+    env = dict(os.environ, PI_DEVICES="sim", PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    results = []
+    for name in args.scripts:
+        print(f"[INFO] Benchmarking {name}: {args.presses} presses, {args.hold} s hold", file=sys.stderr)
+        cmd = [sys.executable, "-m", "PiCommon.bench", "--child", name, "--presses", str(args.presses),
+               "--hold", str(args.hold), "--gap", str(args.gap)] + [f"--set={s}" for s in args.set]
+        proc = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+        try:
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        except (IndexError, ValueError):
+            results.append({"script": name, "error": f"exit {proc.returncode}", "stderr": proc.stderr[-2000:]})
+    report = json.dumps({"devices": "sim", "results": results}, indent=4)
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   SQLite catalog of every still, recording and PiSearch session
+
+    The scripts call Catalog.add_*() from the capture path; that only puts a row on a queue.
+    A writer thread inserts the queued rows in batches (one transaction per FLUSH_INTERVAL or
+    BATCH_SIZE rows) into a WAL-mode database, so readers (the CLI, another script) never wait
+    on it. A still that is still being encoded is held back until its file appears (the writers
+    rename into place atomically) so its size can be recorded.
+
+    Usage:  python -m PiCommon.catalog [--db PATH] list [--kind still] [--cam 0] [--since 2026-10-13] [--until ...]
+            python -m PiCommon.catalog [--db PATH] sessions [--since ...] [--until ...] [--both-cams] [--audio]
+            python -m PiCommon.catalog [--db PATH] scan DIR [--source piCam]
+            python -m PiCommon.catalog [--db PATH] stats
+"""
+
+## ==========[ MODULES ]========== ##
+import argparse
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+## ==========[ CONSTANTS ]========== ##
+DEFAULT_DB = "/home/ayush-pi/Documents/PyCode/catalog.db"
+BATCH_SIZE = 64             # Rows per transaction at most
+FLUSH_INTERVAL = 1.0        # Seconds queued rows may wait before they are written
+PENDING_TIMEOUT = 30.0      # Seconds to wait for a file that is still being written
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS captures (
+    id          INTEGER PRIMARY KEY,
+    kind        TEXT NOT NULL,          -- still | recording | timelapse
+    source      TEXT,                   -- script that made it
+    session     TEXT,
+    cam         INTEGER,
+    path        TEXT NOT NULL UNIQUE,
+    captured_at REAL NOT NULL,          -- Unix time
+    sensor_ns   INTEGER,
+    duration    REAL,
+    size        INTEGER,
+    controls    TEXT,                   -- JSON
+    meta        TEXT                    -- JSON
+);
+CREATE INDEX IF NOT EXISTS captures_time ON captures (captured_at);
+CREATE INDEX IF NOT EXISTS captures_kind_time ON captures (kind, captured_at);
+CREATE INDEX IF NOT EXISTS captures_session ON captures (session);
+CREATE TABLE IF NOT EXISTS sessions (
+    id          TEXT PRIMARY KEY,
+    source      TEXT,
+    started_at  REAL NOT NULL,
+    ended_at    REAL,
+    cams        TEXT,                   -- e.g. "0,1"
+    cam_count   INTEGER NOT NULL DEFAULT 0,
+    has_audio   INTEGER NOT NULL DEFAULT 0,
+    audio_latency_ms REAL,
+    path        TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_time ON sessions (started_at);
+"""
+
+CAPTURE_COLUMNS = ("kind", "source", "session", "cam", "path", "captured_at", "sensor_ns", "duration", "size", "controls", "meta")
+SESSION_COLUMNS = ("id", "source", "started_at", "ended_at", "cams", "cam_count", "has_audio", "audio_latency_ms", "path")
+
+
+## ==========[ HELPERS ]========== ##
+def connect(path):
+    db = sqlite3.connect(path, timeout=10)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.row_factory = sqlite3.Row
+    return db
+
+
+# Unix time of a monotonic_ns timestamp (taken in this boot)
+def wall_time(t_ns):
+    if t_ns is None:
+        return time.time()
+    return time.time() - (time.monotonic_ns() - t_ns) / 1e9
+
+
+# Unix time from "2026-10-13", "2026-10-13 14:00", "today", "yesterday" or "-3d" / "-12h"
+def parse_time(text):
+    if text is None:
+        return None
+    now = datetime.now()
+    if text in ("today", "yesterday"):
+        day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return (day - timedelta(days=text == "yesterday")).timestamp()
+    m = re.fullmatch(r"-(\d+)([dhm])", text)
+    if m:
+        unit = {"d": "days", "h": "hours", "m": "minutes"}[m.group(2)]
+        return (now - timedelta(**{unit: int(m.group(1))})).timestamp()
+    return datetime.fromisoformat(text).timestamp()
+
+
+def as_json(value):
+    return None if value is None else json.dumps(value, default=str)
+
+
+## ==========[ CATALOG ]========== ##
+class Catalog:
+    def __init__(self, path=DEFAULT_DB, batch=BATCH_SIZE, interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch = batch
+        self.interval = interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with connect(path) as db:
+            db.executescript(SCHEMA)
+        db.close()
+        self.queue = queue.Queue()      # Unbounded: add_*() never blocks
+        self.pending = []               # Rows waiting for their file to appear
+        self.written = 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    ## Adding (called from the capture path, only queues) ##
+    def add_capture(self, kind, path, captured_at=None, cam=None, session=None, source=None,
+                    sensor_ns=None, duration=None, size=None, controls=None, meta=None):
+        row = {"kind": kind, "source": source, "session": session, "cam": cam, "path": os.path.abspath(path),
+               "captured_at": captured_at or time.time(), "sensor_ns": sensor_ns, "duration": duration,
+               "size": size, "controls": as_json(controls), "meta": as_json(meta)}
+        self.queue.put(("captures", row, time.monotonic()))
+
+    # Still records as returned by PiCommon.stills / zsl; controls is {camnum: controls}
+    def add_stills(self, records, controls=None, session=None, source=None):
+        for r in records:
+            if "error" in r:
+                continue
+            meta = {k: r[k] for k in ("index", "offset_ms", "latency_ms") if k in r}
+            self.add_capture("still", r["file"], wall_time(r.get("done_ns")), r["cam"], session, source,
+                             r.get("sensor_timestamp_ns"), controls=(controls or {}).get(r["cam"]), meta=meta or None)
+
+    def add_recording(self, path, duration, captured_at=None, session=None, source=None, meta=None):
+        self.add_capture("recording", path, captured_at, session=session, source=source, duration=duration, meta=meta)
+
+    def add_session(self, session_id, started_at, ended_at=None, cams=(), has_audio=False,
+                    audio_latency_ms=None, source=None, path=None):
+        row = {"id": session_id, "source": source, "started_at": started_at, "ended_at": ended_at,
+               "cams": ",".join(str(c) for c in sorted(set(cams))), "cam_count": len(set(cams)),
+               "has_audio": int(bool(has_audio)), "audio_latency_ms": audio_latency_ms, "path": path}
+        self.queue.put(("sessions", row, time.monotonic()))
+
+    ## Writer thread ##
+    def run(self):
+        db = connect(self.path)
+        rows, stop = [], False
+        flushed = []
+        deadline = time.monotonic() + self.interval
+        while not stop:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    flushed.append(item)
+                else:
+                    rows.append(item)
+            except queue.Empty:
+                pass
+            if stop or flushed or len(rows) >= self.batch or time.monotonic() >= deadline:
+                self.write(db, rows, final=stop or bool(flushed))
+                rows = []
+                for event in flushed:
+                    event.set()
+                flushed = []
+                deadline = time.monotonic() + self.interval
+        db.close()
+
+    # Insert what is ready; rows still waiting for their file stay pending (until `final`)
+    def write(self, db, rows, final=False):
+        ready, waiting = {"captures": [], "sessions": []}, []
+        for item in self.pending + rows:
+            table, row, queued = item
+            if table == "captures" and row["size"] is None:
+                if os.path.exists(row["path"]):
+                    row["size"] = os.path.getsize(row["path"])
+                elif not final and time.monotonic() - queued < PENDING_TIMEOUT:
+                    waiting.append(item)
+                    continue
+            ready[table].append(row)
+        self.pending = waiting
+        if ready["captures"] or ready["sessions"]:
+            try:
+                with db:
+                    for table, columns in (("captures", CAPTURE_COLUMNS), ("sessions", SESSION_COLUMNS)):
+                        if ready[table]:
+                            db.executemany(f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                                           f"VALUES ({', '.join(':' + c for c in columns)})", ready[table])
+                self.written += len(ready["captures"]) + len(ready["sessions"])
+            except sqlite3.Error as e:
+                print(f"[ERROR] Catalog: {e}")
+
+    # Wait until everything queued so far is in the database
+    def flush(self, timeout=None):
+        event = threading.Event()
+        self.queue.put(event)
+        return event.wait(timeout)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join(timeout=10)
+
+    ## Queries (own connection, WAL lets them run next to the writer) ##
+    def query(self, sql, params=()):
+        db = connect(self.path)
+        try:
+            return [dict(r) for r in db.execute(sql, params)]
+        finally:
+            db.close()
+
+    def captures(self, kind=None, cam=None, since=None, until=None, session=None, source=None, limit=None):
+        where, params = [], []
+        for column, value in (("kind", kind), ("cam", cam), ("session", session), ("source", source)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("captured_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("captured_at < ?")
+            params.append(until)
+        sql = "SELECT * FROM captures" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY captured_at"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.query(sql, params)
+
+    def sessions(self, since=None, until=None, both_cams=False, audio=False):
+        where, params = [], []
+        if since is not None:
+            where.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("started_at < ?")
+            params.append(until)
+        if both_cams:
+            where.append("cam_count >= 2")
+        if audio:
+            where.append("has_audio = 1")
+        sql = "SELECT * FROM sessions" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY started_at"
+        return self.query(sql, params)
+
+    def stats(self):
+        return self.query("SELECT kind, COUNT(*) AS count, SUM(size) AS size, SUM(duration) AS duration, "
+                          "MIN(captured_at) AS first, MAX(captured_at) AS last FROM captures GROUP BY kind")
+
+    # Add files already on disk that the catalog doesn't know (stills / recordings by extension)
+    def scan(self, directory, source=None):
+        known = {r["path"] for r in self.query("SELECT path FROM captures")}
+        count = 0
+        for name in sorted(os.listdir(directory)):
+            path = os.path.abspath(os.path.join(directory, name))
+            if path in known or not name.endswith((".jpg", ".png", ".wav")):
+                continue
+            st = os.stat(path)
+            if name.endswith(".wav"):
+                # 16-bit PCM with a 44-byte header; the rate is in the header
+                with open(path, "rb") as f:
+                    header = f.read(44)
+                channels = int.from_bytes(header[22:24], "little") or 1
+                rate = int.from_bytes(header[24:28], "little") or 1
+                self.add_capture("recording", path, st.st_mtime, source=source, size=st.st_size,
+                                 duration=max(0, st.st_size - 44) / (2 * channels * rate))
+            else:
+                m = re.match(r"cam(\d)_", name)
+                self.add_capture("still", path, st.st_mtime, int(m.group(1)) if m else None, source=source, size=st.st_size)
+            count += 1
+        self.flush()
+        return count
+
+
+## ==========[ CLI ]========== ##
+def show_time(t):
+    return "-" if t is None else datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the capture catalog")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("list", help="Stills and recordings")
+    p.add_argument("--kind", choices=["still", "recording", "timelapse"])
+    p.add_argument("--cam", type=int)
+    p.add_argument("--session")
+    p.add_argument("--source")
+    p.add_argument("--limit", type=int)
+    p = sub.add_parser("sessions", help="PiSearch sessions")
+    p.add_argument("--both-cams", action="store_true", help="Only sessions with stills from both cameras")
+    p.add_argument("--audio", action="store_true", help="Only sessions with audio")
+    for p in sub.choices.values():
+        p.add_argument("--since", help='e.g. 2026-10-13, "2026-10-13 14:00", today, yesterday, -7d')
+        p.add_argument("--until")
+    p = sub.add_parser("scan", help="Add existing files from a directory")
+    p.add_argument("directory")
+    p.add_argument("--source")
+    sub.add_parser("stats", help="Totals per kind")
+    args = parser.parse_args()
+
+    catalog = Catalog(args.db)
+    if args.command == "list":
+        rows = catalog.captures(args.kind, args.cam, parse_time(args.since), parse_time(args.until),
+                                args.session, args.source, args.limit)
+        for r in rows:
+            extra = f"{r['duration']:.2f} s" if r["duration"] is not None else f"cam {r['cam']}"
+            size = f"{r['size'] / 1024:.0f} KB" if r["size"] is not None else "-"
+            print(f"{show_time(r['captured_at'])} | {r['kind']:<9} | {extra:<9} | {size:>8} | {r['path']}")
+        print(f"[INFO] {len(rows)} captures")
+    elif args.command == "sessions":
+        rows = catalog.sessions(parse_time(args.since), parse_time(args.until), args.both_cams, args.audio)
+        for r in rows:
+            length = f"{r['ended_at'] - r['started_at']:.1f} s" if r["ended_at"] else "-"
+            print(f"{show_time(r['started_at'])} | {r['id']} | cams {r['cams'] or '-'} | "
+                  f"audio {'yes' if r['has_audio'] else 'no'} | {length} | latency {r['audio_latency_ms']} ms")
+        print(f"[INFO] {len(rows)} sessions")
+    elif args.command == "scan":
+        print(f"[INFO] Added {catalog.scan(args.directory, args.source)} files from {args.directory}")
+    else:
+        for r in catalog.stats():
+            print(f"{r['kind']:<9} | {r['count']} | {(r['size'] or 0) / 2**20:.1f} MB | "
+                  f"{show_time(r['first'])} -> {show_time(r['last'])}")
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Device classes for the capture scripts: the real ones, or simulated ones off the Pi
+
+    The scripts and PiCommon modules import Picamera2, PyAudio, Button, ... from here instead of
+    from picamera2 / pyaudio / gpiozero. Each name is imported on first use only, so a script
+    that doesn't use the cameras never loads picamera2.
+
+    With PI_DEVICES=sim in the environment the names come from PiCommon/simdevices.py instead:
+    synthetic frames and audio at realistic rates, and buttons that can be pressed from code.
+        PI_DEVICES=sim python PiMic/piMic.py
+"""
+
+## ==========[ MODULES ]========== ##
+import importlib
+import os
+
+
+## ==========[ CONSTANTS ]========== ##
+SIMULATED = os.environ.get("PI_DEVICES", "hw").lower() == "sim"
+
+# Name -> module it comes from on the Pi
+SOURCES = {
+    "Picamera2": "picamera2",
+    "Preview": "picamera2",
+    "MappedArray": "picamera2",
+    "PyAudio": "pyaudio",
+    "paInt16": "pyaudio",
+    "paContinue": "pyaudio",
+    "paInputOverflow": "pyaudio",
+    "Button": "gpiozero",
+}
+
+__all__ = list(SOURCES)
+
+
+# Resolve a device name on first use (PEP 562)
+def __getattr__(name):
+    if name not in SOURCES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module("PiCommon.simdevices" if SIMULATED else SOURCES[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
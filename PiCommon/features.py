@@ -0,0 +1,115 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Audio features computed chunk by chunk while recording
+
+    FeatureAnalyzer has the same write() interface as WavWriter, so an AudioTask (PiCommon/runtime.py)
+    can feed it straight from the capture ring. For every chunk it keeps the RMS / peak level and
+    the number of clipped samples, and it extends a log-magnitude STFT spectrogram with the
+    windows that chunk completes (samples that don't fill a window yet are carried over).
+    On close the features go to a compact .features.npz, plus a spectrogram PNG if asked for.
+"""
+
+## ==========[ MODULES ]========== ##
+from PiCommon.lazy import lazy
+
+np = lazy("numpy")
+
+
+## ==========[ CONSTANTS ]========== ##
+N_FFT = 1024            # STFT window length (samples)
+HOP = 512               # STFT hop (samples)
+CLIP_LEVEL = 32767      # |sample| at or above this counts as clipped
+FULL_SCALE = 32768.0
+
+
+## ==========[ HELPERS ]========== ##
+def dbfs(value):
+    return 20 * np.log10(np.maximum(value, 1e-9) / FULL_SCALE)
+
+
+## ==========[ ANALYZER ]========== ##
+class FeatureAnalyzer:
+    def __init__(self, rate, channels=1, n_fft=N_FFT, hop=HOP):
+        self.rate = rate
+        self.channels = channels
+        self.n_fft = n_fft
+        self.hop = hop
+        self.window = np.hanning(n_fft).astype(np.float32)
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.samples = 0
+        self.levels = []        # Per chunk: (start time, RMS dBFS, peak dBFS)
+        self.clipped = 0
+        self.energy = 0.0       # Running sum of squares, for the overall RMS
+        self.columns = []       # Spectrogram columns in dB, float16
+
+    # Analyze one chunk of int16 samples
+    def write(self, chunk):
+        data = np.frombuffer(chunk, dtype=np.int16) if not isinstance(chunk, np.ndarray) else chunk
+        if self.channels > 1:
+            data = data.reshape(-1, self.channels)
+            self.clipped += int(np.count_nonzero(np.abs(data.astype(np.int32)) >= CLIP_LEVEL))
+            mono = data.mean(axis=1, dtype=np.float32)
+        else:
+            self.clipped += int(np.count_nonzero(np.abs(data.astype(np.int32)) >= CLIP_LEVEL))
+            mono = data.astype(np.float32)
+        if len(mono) == 0:
+            return
+
+        energy = float(np.dot(mono, mono))
+        self.energy += energy
+        rms = np.sqrt(energy / len(mono))
+        peak = np.max(np.abs(mono))
+        self.levels.append((self.samples / self.rate, dbfs(rms), dbfs(peak)))
+        self.samples += len(mono)
+
+        # STFT over the windows this chunk completes
+        buf = np.concatenate((self.pending, mono))
+        count = (len(buf) - self.n_fft) // self.hop + 1 if len(buf) >= self.n_fft else 0
+        if count > 0:
+            frames = np.lib.stride_tricks.sliding_window_view(buf, self.n_fft)[::self.hop][:count]
+            spectrum = np.abs(np.fft.rfft(frames * self.window, axis=1)) / (self.n_fft / 2)
+            self.columns.append(dbfs(spectrum * FULL_SCALE).astype(np.float16))
+        self.pending = buf[count * self.hop:]
+
+    # Overall levels; NaN for an empty recording, so the .npz stays plain numbers
+    def summary(self):
+        levels = np.array(self.levels) if self.levels else np.zeros((0, 3))
+        return {
+            "duration": self.samples / self.rate,
+            "rms_dbfs": float(dbfs(np.sqrt(self.energy / self.samples))) if self.samples else float("nan"),
+            "peak_dbfs": float(levels[:, 2].max()) if len(levels) else float("nan"),
+            "clipped": self.clipped,
+        }
+
+    def spectrogram(self):
+        if not self.columns:
+            return np.zeros((0, self.n_fft // 2 + 1), dtype=np.float16)
+        return np.concatenate(self.columns)
+
+    # Save the features; also a spectrogram PNG if png_path is given. Returns the summary
+    def close(self, path, png_path=None, title=""):
+        summary = self.summary()
+        spec = self.spectrogram()
+        np.savez_compressed(path, levels=np.array(self.levels, dtype=np.float32).reshape(-1, 3), spectrogram=spec,
+                            rate=self.rate, n_fft=self.n_fft, hop=self.hop, **summary)
+        if png_path is not None and len(spec):
+            self.render(spec, png_path, title)
+        return summary
+
+    def render(self, spec, png_path, title):
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=(12, 4), dpi=150)
+        ax = fig.add_subplot(111)
+        extent = [0, len(spec) * self.hop / self.rate, 0, self.rate / 2000]
+        ax.imshow(spec.T.astype(np.float32), origin="lower", aspect="auto", extent=extent, cmap="magma", vmin=-100, vmax=0)
+        ax.set_title(title)
+        ax.set_xlabel("Time (s)")
+        ax.set_ylabel("Frequency (kHz)")
+        plt.tight_layout()
+        plt.savefig(png_path)
+        plt.close(fig)
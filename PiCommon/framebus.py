@@ -0,0 +1,714 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Frame bus: one service owns the cameras, any number of processes read their frames
+
+    The bus opens each camera once (with a PiCommon/profiles.py profile) and copies every frame
+    into a free slot of that camera's shared-memory ring, the only copy made. Subscribers map the
+    ring and get each frame as NumPy views over its slot, so a detector, a still saver, a preview
+    and a recorder can all read the same capture without copying it or re-opening the camera.
+
+    A subscriber holds a slot from get() until release(). Each slot keeps a reference count in
+    shared memory (one per hold), and the bus only reuses slots nobody references; when they all
+    are, the camera frame is dropped instead (a bus drop).
+
+    Claiming, taking, releasing and publishing a slot happen under the ring's lock. It is an flock
+    on a file next to the ring, plus a thread lock because flock doesn't exclude threads that
+    share the file. The lock orders the shared-memory accesses between processes, and the kernel
+    releases it when a holder dies.
+
+    Each subscriber has its own policy:
+        - latest : always the newest frame, anything published in between is dropped
+        - queue  : every frame in order while it is still in the ring (lapped frames are dropped)
+        - block  : every frame in order; the bus keeps the frames not read yet, so a slow
+                   subscriber makes the bus drop camera frames instead (recorders)
+
+    Subscribers register over a Unix socket (PI_FRAMEBUS, default $XDG_RUNTIME_DIR/pi-framebus.sock),
+    which also wakes them up when a frame is published. When a subscriber exits or crashes its
+    connection closes and the bus frees its row and slots. Each subscriber counts its own stats in
+    its row of the ring (frames delivered and dropped, lag behind the newest frame, publish-to-read
+    latency); the bus prints them every STATS_INTERVAL seconds and answers `stats` with them.
+
+    Full-resolution stills are taken by the bus (switch mode); the streams pause meanwhile.
+    BusCamera stands in for a Picamera2 in the still / time-lapse code, so piCam and piVision
+    read the cameras the bus serves through it instead of opening them a second time.
+        python -m PiCommon.framebus serve [--cams 0 1] [--profile detect] [--slots 10]
+        python -m PiCommon.framebus stats
+        python -m PiCommon.framebus sub [--cam 0] [--policy queue] [--work 50] [--seconds 10]
+"""
+
+## ==========[ MODULES ]========== ##
+import argparse
+import asyncio
+import fcntl
+import json
+import os
+import select
+import socket
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+from PiCommon import devices, profiles, runtime
+from PiCommon.shmring import attach_shm
+
+
+## ==========[ CONSTANTS ]========== ##
+SOCKET = os.environ.get("PI_FRAMEBUS") or os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "pi-framebus.sock")
+PROFILE = "detect"          # Stream profile the bus opens the cameras with
+SLOTS = 10                  # Frames per camera in shared memory
+MAX_SUBSCRIBERS = 8         # Per camera
+MAX_HELD = 8                # Frames one subscriber may hold at once
+STATS_INTERVAL = 10.0
+TICK_BACKLOG = 64           # Wake-up bytes left unsent before a subscriber stops getting more
+POLICIES = ("latest", "queue", "block")
+LATEST, QUEUE, BLOCK = range(3)
+FREE = -1                   # Empty hold / slot being written (or never written)
+
+# Shared header (int64): counters, then a row per slot, then a row per subscriber
+HEAD, CAPTURED, BUS_DROPS = range(3)
+COUNTERS = 3
+SEQ, SENSOR_TS, PUBLISHED, REFS = range(4)                                  # Slot row
+ACTIVE, PID, POLICY, CURSOR, DELIVERED, DROPPED, LAG_SUM, LAG_MAX, HELD = range(9)    # Subscriber row, held slots from HELD
+SLOT_FIELDS = 4
+SUB_FIELDS = HELD + MAX_HELD
+
+
+## ==========[ RING ]========== ##
+# Lock shared by every process attached to a ring
+class RingLock:
+    def __init__(self, path, create=False):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | (os.O_CREAT if create else 0), 0o600)
+        self.thread_lock = threading.Lock()
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self.thread_lock.release()
+
+    def close(self, unlink=False):
+        os.close(self.fd)
+        if unlink:
+            os.unlink(self.path)
+
+
+class BusRing:
+    # streams: {stream: {"size", "format", "shape", "dtype"}}; `shape` is the mapped buffer (rows may be padded)
+    def __init__(self, streams, slots=SLOTS, name=None):
+        self.streams = streams
+        self.slots = slots
+        self.owner = name is None
+
+        header_len = COUNTERS + slots * SLOT_FIELDS + MAX_SUBSCRIBERS * SUB_FIELDS
+        frame_sizes = {k: int(np.prod(s["shape"])) * np.dtype(s["dtype"]).itemsize for k, s in streams.items()}
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=8 * header_len + slots * sum(frame_sizes.values()))
+        else:
+            self.shm = attach_shm(name)
+            # Subscribers aren't children of the bus: keep their resource tracker from unlinking the segment at exit
+            if sys.version_info < (3, 13):
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.name = self.shm.name
+        self.lock = RingLock(os.path.join(tempfile.gettempdir(), f"{self.name.lstrip('/')}.lock"), create=self.owner)
+
+        self.header = np.ndarray((header_len,), dtype=np.int64, buffer=self.shm.buf)
+        self.slot_meta = self.header[COUNTERS:COUNTERS + slots * SLOT_FIELDS].reshape(slots, SLOT_FIELDS)
+        self.subs = self.header[COUNTERS + slots * SLOT_FIELDS:].reshape(MAX_SUBSCRIBERS, SUB_FIELDS)
+        self.frames = {}
+        offset = 8 * header_len
+        for k, s in streams.items():
+            self.frames[k] = np.ndarray((slots,) + tuple(s["shape"]), dtype=s["dtype"], buffer=self.shm.buf, offset=offset)
+            offset += slots * frame_sizes[k]
+        if self.owner:
+            self.header[:] = 0
+            self.header[HEAD] = -1
+            self.slot_meta[:, SEQ] = FREE
+            self.subs[:, HELD:] = FREE
+
+    # Everything another process needs to attach to this ring
+    @property
+    def spec(self):
+        return {"streams": self.streams, "slots": self.slots, "name": self.name}
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(spec["streams"], spec["slots"], spec["name"])
+
+    # Newest published sequence number (-1 before the first frame)
+    @property
+    def head(self):
+        return int(self.header[HEAD])
+
+    def active_rows(self):
+        return [int(row) for row in np.flatnonzero(self.subs[:, ACTIVE] == 1)]
+
+    # Reference count of each slot: the subscribers holding its frame
+    def refcounts(self):
+        return self.slot_meta[:, REFS].tolist()
+
+    # ---------- Bus ----------
+    # Oldest slot no subscriber references (held, or not read yet by a "block" subscriber), marked as
+    # being written; None when every slot is referenced
+    def acquire(self):
+        with self.lock:
+            head = self.head
+            unread = set()
+            for row in self.active_rows():
+                if self.subs[row, POLICY] == BLOCK:
+                    unread.update(range(int(self.subs[row, CURSOR]) + 1, head + 1))
+            meta = self.slot_meta
+            free = [slot for slot in range(self.slots) if meta[slot, REFS] == 0 and int(meta[slot, SEQ]) not in unread]
+            if not free:
+                return None
+            slot = min(free, key=lambda s: meta[s, SEQ])
+            meta[slot, SEQ] = FREE
+            return slot
+
+    # Publish the frame copied into `slot` (under the lock, so the copy is visible before the sequence number)
+    def commit(self, slot, sensor_ts):
+        with self.lock:
+            seq = self.head + 1
+            meta = self.slot_meta[slot]
+            meta[SENSOR_TS] = sensor_ts
+            meta[PUBLISHED] = time.monotonic_ns()
+            meta[SEQ] = seq
+            self.header[HEAD] = seq
+            return seq
+
+    # Row for a new subscriber, starting after the newest frame; None when all rows are taken
+    def add_subscriber(self, policy, pid):
+        with self.lock:
+            free = np.flatnonzero(self.subs[:, ACTIVE] == 0)
+            if not len(free):
+                return None
+            row = int(free[0])
+            self.subs[row] = 0
+            self.subs[row, HELD:] = FREE
+            self.subs[row, PID] = pid
+            self.subs[row, POLICY] = POLICIES.index(policy)
+            self.subs[row, CURSOR] = self.head
+            self.subs[row, ACTIVE] = 1
+            return row
+
+    # Free a subscriber's row, dropping the references it still held
+    def remove_subscriber(self, row):
+        with self.lock:
+            for hold in range(HELD, SUB_FIELDS):
+                self.release_hold(row, hold)
+            self.subs[row, ACTIVE] = 0
+
+    # ---------- Subscriber ----------
+    # Hold the next frame for subscriber `row` by its policy: (hold, slot, seq), or None when there is nothing new
+    def take(self, row):
+        with self.lock:
+            r = self.subs[row]
+            free = np.flatnonzero(r[HELD:] == FREE)
+            if not len(free):
+                raise RuntimeError(f"A subscriber may hold {MAX_HELD} frames at once, release() some first")
+            hold = HELD + int(free[0])
+            cursor = int(r[CURSOR])
+            head = self.head
+            if head <= cursor:
+                return None
+            target = head if r[POLICY] == LATEST else cursor + 1
+            seqs = self.slot_meta[:, SEQ]
+            found = np.flatnonzero(seqs == target)
+            if not len(found):
+                # Lapped: carry on from the oldest frame still in the ring
+                newer = seqs[seqs > cursor]
+                if not len(newer):
+                    return None
+                target = int(newer.min())
+                found = np.flatnonzero(seqs == target)
+            slot = int(found[0])
+            self.slot_meta[slot, REFS] += 1
+            r[hold] = slot
+
+            lag = time.monotonic_ns() - int(self.slot_meta[slot, PUBLISHED])
+            r[DROPPED] += target - cursor - 1
+            r[DELIVERED] += 1
+            r[CURSOR] = target
+            r[LAG_SUM] += lag
+            r[LAG_MAX] = max(int(r[LAG_MAX]), lag)
+            return hold, slot, target
+
+    def release(self, row, hold):
+        with self.lock:
+            self.release_hold(row, hold)
+
+    # (lock held) Drop one hold and its slot's reference
+    def release_hold(self, row, hold):
+        slot = int(self.subs[row, hold])
+        if slot != FREE:
+            self.slot_meta[slot, REFS] -= 1
+            self.subs[row, hold] = FREE
+
+    def close(self):
+        # Drop the views before closing, the buffer can't be released while they exist
+        self.header = self.slot_meta = self.subs = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass    # A subscriber's frames are still referenced; the mapping goes with the process
+        self.lock.close(unlink=self.owner)
+        if self.owner:
+            self.shm.unlink()
+
+
+## ==========[ SUBSCRIBER ]========== ##
+# One frame held from the bus: views over its slot, valid until release()
+class BusFrame:
+    def __init__(self, ring, row, hold, slot, seq):
+        self.ring = ring
+        self.row = row
+        self.hold = hold
+        self.seq = seq
+        self.timestamp = int(ring.slot_meta[slot, SENSOR_TS])
+        self.arrays = {k: frames[slot] for k, frames in ring.frames.items()}
+
+    def __getitem__(self, stream):
+        return self.arrays[stream]
+
+    # Y plane of a YUV420 stream: its first `height` rows
+    def grey(self, stream):
+        w, h = self.ring.streams[stream]["size"]
+        return self.arrays[stream][:h, :w]
+
+    def release(self):
+        if self.ring is not None:
+            self.arrays = None
+            self.ring.release(self.row, self.hold)
+            self.ring = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def send(sock, msg):
+    sock.sendall(json.dumps(msg).encode() + b"\n")
+
+
+# One reply line, read a byte at a time so nothing after it is consumed
+def recv_line(sock):
+    line = bytearray()
+    while not line.endswith(b"\n"):
+        byte = sock.recv(1)
+        if not byte:
+            raise ConnectionError("Frame bus closed the connection")
+        line += byte
+    reply = json.loads(line)
+    if "error" in reply:
+        raise RuntimeError(f"Frame bus: {reply['error']}")
+    return reply
+
+
+class Subscriber:
+    def __init__(self, cam=0, name=None, policy="latest", path=SOCKET):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        self.cam = cam
+        self.policy = policy
+        self.name = name or f"{os.path.basename(sys.argv[0])}[{os.getpid()}]"
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        send(self.sock, {"op": "subscribe", "cam": cam, "name": self.name, "policy": policy, "pid": os.getpid()})
+        reply = recv_line(self.sock)
+        self.ring = BusRing.attach(reply["spec"])
+        self.row = reply["row"]
+        self.streams = self.ring.streams
+        self.sock.setblocking(False)
+
+    # Next frame by the subscriber's policy; None if none came within `timeout` seconds
+    def get(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            taken = self.ring.take(self.row)
+            if taken is not None:
+                return BusFrame(self.ring, self.row, *taken)
+            wait = None if deadline is None else deadline - time.monotonic()
+            if wait is not None and wait <= 0:
+                return None
+            # The bus sends a byte per frame published
+            if select.select([self.sock], [], [], wait)[0] and not self.sock.recv(4096):
+                raise ConnectionError("Frame bus closed the connection")
+
+    # This subscriber's counters, as the bus sees them
+    def stats(self):
+        r = self.ring.subs[self.row]
+        delivered = int(r[DELIVERED])
+        return {"name": self.name, "policy": self.policy, "delivered": delivered, "dropped": int(r[DROPPED]),
+                "lag_frames": max(0, self.ring.head - int(r[CURSOR])),
+                "latency_ms": {"mean": round(int(r[LAG_SUM]) / max(delivered, 1) / 1e6, 2), "max": round(int(r[LAG_MAX]) / 1e6, 2)}}
+
+    def close(self):
+        self.sock.close()
+        self.ring.close()
+
+
+# One request on its own connection: (reply, file to read any payload from)
+def call(msg, path=SOCKET):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    send(sock, msg)
+    stream = sock.makefile("rb")
+    sock.close()
+    reply = json.loads(stream.readline() or b'{"error": "no reply"}')
+    if "error" in reply:
+        stream.close()
+        raise RuntimeError(f"Frame bus: {reply['error']}")
+    return reply, stream
+
+
+def stats(path=SOCKET):
+    reply, stream = call({"op": "stats"}, path)
+    stream.close()
+    return reply
+
+
+# Full-resolution still from camera `cam` (RGB888: B, G, R in memory) and its metadata
+def capture_still(cam=0, path=SOCKET):
+    reply, stream = call({"op": "still", "cam": cam}, path)
+    with stream:
+        dtype = np.dtype(reply["dtype"])
+        data = stream.read(int(np.prod(reply["shape"])) * dtype.itemsize)
+    return np.frombuffer(data, dtype=dtype).reshape(reply["shape"]), reply["metadata"]
+
+
+# Camera numbers a running bus serves; empty when there is none
+def cameras(path=SOCKET):
+    try:
+        return {int(n) for n in stats(path)}
+    except OSError:
+        return set()
+
+
+## ==========[ BUS CAMERA ]========== ##
+# Bytes in memory -> RGB channel order, per stream format
+RGB_ORDER = {"RGB888": [2, 1, 0], "BGR888": [0, 1, 2], "XRGB8888": [2, 1, 0], "XBGR8888": [0, 1, 2]}
+
+
+# A frame or still from the bus with the Picamera2 request methods the capture code uses
+class BusRequest:
+    def __init__(self, arrays, streams, metadata, frame=None):
+        self.arrays = arrays
+        self.streams = streams
+        self.metadata = metadata
+        self.frame = frame
+
+    def make_array(self, stream):
+        return self.arrays[stream].copy()
+
+    def make_image(self, stream):
+        from PIL import Image
+        fmt = self.streams[stream]["format"]
+        if fmt not in RGB_ORDER:
+            raise RuntimeError(f"Format for stream {stream} not supported by make_image")
+        w, h = self.streams[stream]["size"]
+        return Image.fromarray(np.ascontiguousarray(self.arrays[stream][:h, :w, RGB_ORDER[fmt]]))
+
+    def get_metadata(self):
+        return dict(self.metadata)
+
+    def release(self):
+        if self.frame is not None:
+            self.frame.release()
+            self.frame = None
+
+
+# Camera `camnum` of a running bus, standing in for a Picamera2 in the capture code: capture_request()
+# reads the bus's stream (latest policy), stills are taken by the bus in its own still configuration,
+# and the camera's mode and controls stay the bus's
+class BusCamera:
+    def __init__(self, camnum, name=None, path=SOCKET):
+        self.camnum = camnum
+        self.name = name or f"{os.path.basename(sys.argv[0])} cam{camnum}"
+        self.path = path
+        self.sub = None
+        self.lock = threading.Lock()
+
+    # No config to switch to: the bus's still configuration is used
+    def create_still_configuration(self, *args, **kwargs):
+        return None
+
+    def capture_request(self, timeout=5.0):
+        with self.lock:
+            if self.sub is None:
+                self.sub = Subscriber(self.camnum, self.name, "latest", self.path)
+        frame = self.sub.get(timeout)
+        if frame is None:
+            raise TimeoutError(f"No frame from the bus for camera {self.camnum} in {timeout} s")
+        return BusRequest(frame.arrays, self.sub.streams, {"SensorTimestamp": frame.timestamp}, frame)
+
+    def switch_mode_and_capture_request(self, config=None):
+        array, metadata = capture_still(self.camnum, self.path)
+        h, w = array.shape[:2]
+        return BusRequest({"main": array}, {"main": {"size": [w, h], "format": "RGB888"}}, metadata)
+
+    def close(self):
+        with self.lock:
+            if self.sub is not None:
+                self.sub.close()
+                self.sub = None
+
+
+## ==========[ BUS ]========== ##
+class FrameBus:
+    def __init__(self, cams, profile=PROFILE, slots=SLOTS, path=SOCKET):
+        self.camnums = list(cams)
+        self.profile = profiles.get(profile)
+        self.profile_name = profile if isinstance(profile, str) else None
+        self.slots = slots
+        self.path = path
+        self.cams = {}
+        self.rings = {}
+        self.still_configs = {}
+        self.names = {}         # (cam, row) -> subscriber name
+        self.waiters = {}       # cam -> {row: writer}
+        self.last = {}          # (cam, row or None) -> (count, time) at the last report
+
+    # Open and start camera `camnum`, and size its ring from a first frame (rows may be padded to the stride)
+    def open(self, camnum):
+        cam = devices.Picamera2(camera_num=camnum)
+        cam.configure(profiles.preview_config(cam, self.profile))
+        cam.start()
+        request = cam.capture_request()
+        try:
+            streams = {}
+            for name in ("main", "lores"):
+                s = self.profile[name]
+                if s:
+                    with devices.MappedArray(request, name) as m:
+                        streams[name] = {"size": list(s["size"]), "format": s["format"],
+                                         "shape": list(m.array.shape), "dtype": m.array.dtype.str}
+        finally:
+            request.release()
+        ring = BusRing(streams, self.slots)
+        self.still_configs[camnum] = cam.create_still_configuration(main={"format": "RGB888"})
+        self.cams[camnum] = cam
+        self.rings[camnum] = ring
+        self.waiters[camnum] = {}
+        print(f"[INFO] Camera {camnum} on the bus: {profiles.describe(self.profile, self.profile_name)} | "
+              f"{self.slots} slots, {ring.shm.size / 2**20:.1f} MB shared")
+
+    # Next frame of camera `camnum` into a free slot: its sequence number, or None when every slot was referenced
+    def publish(self, camnum):
+        ring = self.rings[camnum]
+        request = self.cams[camnum].capture_request()
+        try:
+            ring.header[CAPTURED] += 1
+            slot = ring.acquire()
+            if slot is None:
+                ring.header[BUS_DROPS] += 1
+                return None
+            for name, frames in ring.frames.items():
+                with devices.MappedArray(request, name) as m:
+                    frames[slot] = m.array
+            return ring.commit(slot, request.get_metadata().get("SensorTimestamp", 0))
+        finally:
+            request.release()
+
+    def still(self, camnum):
+        request = self.cams[camnum].switch_mode_and_capture_request(self.still_configs[camnum])
+        try:
+            return request.make_array("main"), request.get_metadata()
+        finally:
+            request.release()
+
+    def stats(self):
+        cams = {}
+        for camnum in self.camnums:
+            ring = self.rings[camnum]
+            head = ring.head
+            subs = []
+            for row in ring.active_rows():
+                r = ring.subs[row]
+                delivered = int(r[DELIVERED])
+                subs.append({"row": row, "name": self.names.get((camnum, row)), "pid": int(r[PID]), "policy": POLICIES[int(r[POLICY])],
+                             "delivered": delivered, "dropped": int(r[DROPPED]), "lag_frames": max(0, head - int(r[CURSOR])),
+                             "held": int((r[HELD:] != FREE).sum()),
+                             "latency_ms": {"mean": round(int(r[LAG_SUM]) / max(delivered, 1) / 1e6, 2), "max": round(int(r[LAG_MAX]) / 1e6, 2)}})
+            cams[str(camnum)] = {"captured": int(ring.header[CAPTURED]), "published": head + 1, "bus_drops": int(ring.header[BUS_DROPS]),
+                                 "slots_held": sum(1 for n in ring.refcounts() if n), "slots": ring.slots, "subscribers": subs}
+        return cams
+
+    # Frames per second of `count` since the last report under `key` (or since it started)
+    def rate(self, key, count, now):
+        last_count, last_time = self.last.get(key, (0, now))
+        self.last[key] = (count, now)
+        return (count - last_count) / (now - last_time) if now > last_time else 0.0
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            now = time.monotonic()
+            for camnum, cam in self.stats().items():
+                print(f"[INFO] Bus cam{camnum}: {cam['captured']} captured | {cam['published']} published "
+                      f"({self.rate((int(camnum), None), cam['published'], now):.1f} fps) | {cam['bus_drops']} bus drops | "
+                      f"{cam['slots_held']}/{cam['slots']} slots held")
+                for s in cam["subscribers"]:
+                    seen = s["delivered"] + s["dropped"]
+                    print(f"\t[INFO] {s['name']} ({s['policy']}): {s['delivered']} delivered "
+                          f"({self.rate((int(camnum), s['row']), s['delivered'], now):.1f} fps) | {s['dropped']} dropped "
+                          f"({s['dropped'] / max(seen, 1) * 100:.1f}%) | lag {s['lag_frames']} frames | "
+                          f"latency {s['latency_ms']['mean']:.1f} / {s['latency_ms']['max']:.1f} ms | holding {s['held']}")
+
+    async def capture(self, rt, camnum):
+        while True:
+            if await rt.blocking(self.publish, camnum) is not None:
+                for writer in self.waiters[camnum].values():
+                    if writer.transport.get_write_buffer_size() < TICK_BACKLOG:
+                        writer.write(b"\x01")
+
+    async def subscribe(self, msg, reader, writer):
+        camnum = msg.get("cam", 0)
+        policy = msg.get("policy", "latest")
+        ring = self.rings.get(camnum)
+        if ring is None:
+            raise LookupError(f"Camera {camnum} is not on the bus")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}")
+        row = ring.add_subscriber(policy, msg.get("pid", 0))
+        if row is None:
+            raise LookupError(f"Camera {camnum} already has {MAX_SUBSCRIBERS} subscribers")
+        name = self.names[camnum, row] = msg.get("name") or f"sub{row}"
+        self.last[camnum, row] = (0, time.monotonic())
+        writer.write(json.dumps({"spec": ring.spec, "row": row}).encode() + b"\n")
+        self.waiters[camnum][row] = writer
+        print(f"[INFO] {name} subscribed to camera {camnum} ({policy})")
+        try:
+            # Nothing more is sent; the connection closing means the subscriber is gone
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            r = ring.subs[row]
+            print(f"[INFO] {name} left camera {camnum}: {int(r[DELIVERED])} delivered, {int(r[DROPPED])} dropped")
+            del self.waiters[camnum][row]
+            self.names.pop((camnum, row), None)
+            ring.remove_subscriber(row)
+
+    async def handle(self, rt, reader, writer):
+        try:
+            msg = json.loads(await reader.readline() or b"{}")
+            op = msg.get("op")
+            if op == "subscribe":
+                await self.subscribe(msg, reader, writer)
+            elif op == "stats":
+                writer.write(json.dumps(self.stats()).encode() + b"\n")
+            elif op == "still":
+                camnum = msg.get("cam", 0)
+                if camnum not in self.cams:
+                    raise LookupError(f"Camera {camnum} is not on the bus")
+                array, metadata = await rt.blocking(self.still, camnum)
+                array = np.ascontiguousarray(array)
+                writer.write(json.dumps({"shape": array.shape, "dtype": array.dtype.str, "metadata": metadata}, default=str).encode() + b"\n")
+                writer.write(array.data.cast("B"))
+            else:
+                raise ValueError(f"Unknown op {op!r}")
+            await writer.drain()
+        except (LookupError, ValueError, RuntimeError) as e:
+            writer.write(json.dumps({"error": str(e)}).encode() + b"\n")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, rt):
+        # Refuse to take over the socket of a bus that is still running
+        if os.path.exists(self.path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.path)
+                raise RuntimeError(f"A frame bus is already running on {self.path}")
+            except ConnectionRefusedError:
+                os.unlink(self.path)
+
+        server = None
+        tasks = []
+        try:
+            await asyncio.gather(*(rt.startup.phase(f"cam{n}", rt.blocking(self.open, n)) for n in self.camnums))
+            server = await asyncio.start_unix_server(lambda r, w: self.handle(rt, r, w), path=self.path)
+            rt.startup.report()
+            print(f"[READY] Frame bus on {self.path}")
+            for camnum in self.camnums:
+                self.last[camnum, None] = (self.rings[camnum].head + 1, time.monotonic())
+            tasks = [asyncio.create_task(self.capture(rt, n)) for n in self.camnums] + [asyncio.create_task(self.report())]
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if server is not None:
+                server.close()
+                if os.path.exists(self.path):
+                    os.unlink(self.path)
+            await rt.drain()
+            for cam in self.cams.values():
+                cam.close()
+            for ring in self.rings.values():
+                ring.close()
+
+
+## ==========[ TEST SUBSCRIBER ]========== ##
+# Read frames for `seconds`, spending `work` seconds on each, and print this subscriber's stats
+def run_subscriber(cam, name, policy, work, seconds, path=SOCKET):
+    sub = Subscriber(cam, name, policy, path)
+    end = time.monotonic() + seconds
+    try:
+        while time.monotonic() < end:
+            frame = sub.get(timeout=1.0)
+            if frame is None:
+                continue
+            with frame:
+                for array in frame.arrays.values():
+                    array[::16, ::16].mean()
+                time.sleep(work)
+        print(json.dumps(sub.stats(), indent=2))
+    finally:
+        sub.close()
+
+
+## ==========[ MAIN ]========== ##
+def main():
+    parser = argparse.ArgumentParser(description="Camera frame bus: frames shared with any number of processes")
+    parser.add_argument("--socket", default=SOCKET, help="Unix socket of the bus")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("serve", help="Own the cameras and publish their frames")
+    p.add_argument("--cams", type=int, nargs="+", default=[0])
+    p.add_argument("--profile", default=PROFILE, choices=sorted(profiles.PROFILES))
+    p.add_argument("--slots", type=int, default=SLOTS)
+    sub.add_parser("stats", help="Print the bus's per-subscriber stats as JSON")
+    p = sub.add_parser("sub", help="Test subscriber")
+    p.add_argument("--cam", type=int, default=0)
+    p.add_argument("--name", default=None)
+    p.add_argument("--policy", default="latest", choices=POLICIES)
+    p.add_argument("--work", type=float, default=0, help="Milliseconds of work per frame")
+    p.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        bus = FrameBus(args.cams, args.profile, args.slots, args.socket)
+        runtime.run(bus.serve, workers=len(args.cams) + 2)
+    elif args.cmd == "stats":
+        print(json.dumps(stats(args.socket), indent=2))
+    else:
+        try:
+            run_subscriber(args.cam, args.name, args.policy, args.work / 1000, args.seconds, args.socket)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
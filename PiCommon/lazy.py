@@ -0,0 +1,44 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Modules imported on first use, so a script starts without paying for them
+
+        np = lazy("numpy")      # numpy is imported the first time np.<anything> is looked up
+
+    The first lookup may come from any thread (the device start-up threads); importlib's module
+    locks make that safe, and the import then overlaps with whatever the other threads are doing.
+"""
+
+## ==========[ MODULES ]========== ##
+import importlib
+import sys
+
+
+## ==========[ LAZY MODULE ]========== ##
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+# The module itself if it's already imported, else a stand-in that imports it on first use
+def lazy(name):
+    return sys.modules.get(name) or LazyModule(name)
@@ -0,0 +1,174 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Callback-driven microphone capture into a preallocated ring buffer
+
+    PortAudio calls MicCapture.callback() from its own thread with every chunk; the callback
+    only copies the chunk into a NumPy ring and advances a sample counter, so it never waits
+    on a lock or on a consumer. Consumers (file writers, analyzers) each own a RingReader and
+    pull from the ring; AudioTask (PiCommon/runtime.py) does it for the scripts' writers.
+
+    The counter only grows and is published after the copy, which makes a single writer and
+    any number of readers safe without locks. A reader that falls more than the ring's length
+    behind has lost audio (an overrun); a read that times out with nothing new is an underrun.
+
+    The stream can be left running for the life of the program: the ring then always holds the
+    last few seconds, and a reader can start in the past (pre-roll) to catch what was said just
+    before the button went down.
+"""
+
+## ==========[ MODULES ]========== ##
+import time
+from PiCommon import devices
+from PiCommon.lazy import lazy
+
+np = lazy("numpy")
+
+
+## ==========[ CONSTANTS ]========== ##
+RING_SECONDS = 10       # Audio held in the ring
+READ_TIMEOUT = 0.5      # Seconds a reader waits for new audio before counting an underrun
+
+
+## ==========[ CAPTURE ]========== ##
+class MicCapture:
+    def __init__(self, pa, device, rate, channels=1, chunk=4096, seconds=RING_SECONDS):
+        self.rate = rate
+        self.channels = channels
+        self.chunk = chunk
+        # Whole chunks, so a chunk wraps around the ring at most once
+        chunks = max(2, int(np.ceil(seconds * rate / chunk)))
+        self.ring = np.zeros(chunks * chunk * channels, dtype=np.int16)
+        self.written = 0            # Samples written since the start, published after each copy
+        self.started_ns = None      # monotonic_ns of the first sample
+        self.clock = (0, None)      # (written, monotonic_ns) when the latest chunk arrived
+        self.on_chunk = None        # Called after each chunk (must not block), e.g. to wake an event loop
+
+        # Metrics
+        self.callbacks = 0
+        self.overflows = 0          # Chunks PortAudio flagged as overflowed (input lost before the callback)
+        self.callback_time = 0.0
+        self.callback_max = 0.0
+        self.input_latency = 0.0    # ADC time to callback, last chunk
+        self.readers = []
+        self.overruns = 0           # Of readers that have been released
+        self.underruns = 0
+
+        self.stream = pa.open(format=devices.paInt16, channels=channels, rate=rate, input=True, input_device_index=device,
+                              frames_per_buffer=chunk, stream_callback=self.callback, start=False)
+
+    # Runs on the PortAudio thread: copy into the ring and return, nothing else
+    def callback(self, in_data, frame_count, time_info, status):
+        start = time.perf_counter()
+        data = np.frombuffer(in_data, dtype=np.int16)
+        size = len(self.ring)
+        pos = self.written % size
+        first = min(len(data), size - pos)
+        self.ring[pos:pos + first] = data[:first]
+        self.ring[:len(data) - first] = data[first:]
+        if self.started_ns is None:
+            self.started_ns = time.monotonic_ns()
+        self.written += len(data)
+        self.clock = (self.written, time.monotonic_ns())
+        if self.on_chunk is not None:
+            self.on_chunk()
+
+        if status & devices.paInputOverflow:
+            self.overflows += 1
+        if time_info and time_info.get("input_buffer_adc_time"):
+            self.input_latency = time_info["current_time"] - time_info["input_buffer_adc_time"]
+        elapsed = time.perf_counter() - start
+        self.callbacks += 1
+        self.callback_time += elapsed
+        self.callback_max = max(self.callback_max, elapsed)
+        return (None, devices.paContinue)
+
+    # New reader; by default it starts at the next sample to arrive
+    def reader(self, start=None):
+        reader = RingReader(self, self.written if start is None else start)
+        self.readers.append(reader)
+        return reader
+
+    # Stop tracking a reader, keeping its counts in the totals
+    def release(self, reader):
+        if reader in self.readers:
+            self.readers.remove(reader)
+            self.overruns += reader.overruns
+            self.underruns += reader.underruns
+
+    # Sample position `seconds` before now, limited to what the ring still holds
+    def preroll_start(self, seconds):
+        written = self.written
+        oldest = max(0, written - len(self.ring) + self.chunk * self.channels)
+        return max(oldest, written - int(seconds * self.rate) * self.channels)
+
+    # Estimated monotonic_ns of a sample position, counted back from when the latest chunk arrived
+    def sample_ns(self, pos):
+        written, ns = self.clock
+        if ns is None:
+            return None
+        return ns - int((written - pos) / self.channels / self.rate * 1e9)
+
+    def start(self):
+        self.stream.start_stream()
+
+    def stop(self):
+        self.stream.stop_stream()
+
+    def close(self):
+        self.stream.close()
+
+    def stats(self):
+        avg = self.callback_time / self.callbacks * 1000 if self.callbacks else 0
+        overruns = self.overruns + sum(r.overruns for r in self.readers)
+        underruns = self.underruns + sum(r.underruns for r in self.readers)
+        return (f"callbacks {self.callbacks} | overflows {self.overflows} | overruns {overruns} | underruns {underruns} | "
+                f"callback avg {avg:.3f} ms max {self.callback_max * 1000:.3f} ms | input latency {self.input_latency * 1000:.1f} ms")
+
+
+## ==========[ READER ]========== ##
+class RingReader:
+    def __init__(self, capture, start):
+        self.capture = capture
+        self.pos = start
+        self.overruns = 0
+        self.underruns = 0
+
+    # Samples available to read
+    def available(self):
+        return self.capture.written - self.pos
+
+    # Everything available up to `end` (a sample count), waiting up to timeout for something new.
+    # Returns a copy, or None if nothing arrived in time.
+    def read(self, timeout=READ_TIMEOUT, end=None):
+        capture = self.capture
+        deadline = time.monotonic() + timeout
+        poll = capture.chunk / capture.rate / 4
+        while capture.written <= self.pos:
+            if time.monotonic() >= deadline:
+                self.underruns += 1
+                return None
+            time.sleep(poll)
+
+        written = capture.written if end is None else min(end, capture.written)
+        size = len(capture.ring)
+        if written - self.pos > size:
+            # The writer lapped this reader, the oldest audio is gone
+            self.overruns += 1
+            self.pos = written - size + capture.chunk * capture.channels
+        start, count = self.pos % size, written - self.pos
+        if start + count <= size:
+            data = capture.ring[start:start + count].copy()
+        else:
+            data = np.concatenate((capture.ring[start:], capture.ring[:count - (size - start)]))
+        # Re-check: if the writer lapped us during the copy the start of the data is newer audio
+        # (a callback in progress may be writing over the next chunk too), drop it
+        lost = capture.written + capture.chunk * capture.channels - size - self.pos
+        self.pos = written
+        if lost > 0:
+            self.overruns += 1
+            data = data[lost:]
+            if len(data) == 0:
+                return self.read(max(0.0, deadline - time.monotonic()), end)
+        return data
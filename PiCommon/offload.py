@@ -0,0 +1,475 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Crash-safe upload queue for sending captures to an API, off the capture path
+
+    JobQueue is a SQLite (WAL) table of files to send. The capture code only calls put(), one
+    small transaction; nothing waits on the network. A job goes queued -> inflight -> done, and
+    back to queued with a backoff delay when a send fails (failed after MAX_ATTEMPTS). Jobs left
+    inflight by a crash are queued again when the queue is reopened. A job whose file isn't on
+    disk yet (a still that is still being encoded) is retried a moment later, and failed once it
+    has been missing for NOT_READY_TIMEOUT (an encode that failed, a file that was deleted).
+
+    Uploader runs `workers` coroutines on the script's asyncio loop. Each keeps one keep-alive
+    HTTP/1.1 connection, claims up to BATCH_JOBS jobs (BATCH_BYTES at most) and POSTs them as one
+    request, so concurrency is bounded by the number of workers. Metrics: jobs/s, MB/s, retries,
+    reconnects, queue depth and age of the oldest queued job (backpressure).
+
+    Batch request body: one JSON line {"jobs": [{"id", "kind", "name", "size", "meta"}, ...]}
+    followed by the files' bytes back to back. The server answers {"accepted": [ids]}.
+
+    A stand-in server and a benchmark are included:
+        python -m PiCommon.offload serve [--port 8765] [--latency 20] [--fail-rate 0.05] [--chunked]
+        python -m PiCommon.offload bench [--url http://127.0.0.1:8765/upload] [--jobs 500] [--size 200000]
+"""
+
+## ==========[ MODULES ]========== ##
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import ssl
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+## ==========[ CONSTANTS ]========== ##
+WORKERS = 4                 # Concurrent requests
+BATCH_JOBS = 8              # Jobs per request at most
+BATCH_BYTES = 8 * 2**20     # Bytes per request at most (a single bigger file still goes alone)
+MAX_ATTEMPTS = 8            # Then the job is marked failed
+BACKOFF = 1.0               # Seconds before the first retry, doubled per attempt (with jitter)
+BACKOFF_MAX = 300.0
+NOT_READY_DELAY = 0.5       # Seconds before looking again for a file that isn't written yet
+NOT_READY_TIMEOUT = 300.0   # Seconds after put() a file may still be missing before its job fails
+REQUEST_TIMEOUT = 30.0
+IDLE_POLL = 1.0             # Seconds an idle worker waits before checking the queue again
+STATS_INTERVAL = 10.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    path        TEXT NOT NULL,
+    meta        TEXT,
+    state       TEXT NOT NULL DEFAULT 'queued',     -- queued | inflight | done | failed
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    next_at     REAL NOT NULL,
+    created_at  REAL NOT NULL,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, next_at);
+"""
+
+
+## ==========[ QUEUE ]========== ##
+class JobQueue:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.conns = []             # Every thread's connection, closed by close()
+        self.lock = threading.Lock()
+        self.wake = None            # Called after put() (set by the Uploader)
+        db = self.db()
+        db.executescript(SCHEMA)
+        # Jobs that were being sent when the process died go back to the queue
+        with db:
+            db.execute("UPDATE jobs SET state = 'queued' WHERE state = 'inflight'")
+
+    # One connection per thread
+    def db(self):
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.row_factory = sqlite3.Row
+            self.local.db = db
+            with self.lock:
+                self.conns.append(db)
+        return db
+
+    # Close every thread's connection (the queue reopens one if used again)
+    def close(self):
+        with self.lock:
+            for db in self.conns:
+                db.close()
+            self.conns = []
+            self.local = threading.local()
+
+    # Add a file to send; returns the job id
+    def put(self, kind, path, meta=None):
+        now = time.time()
+        cur = self.db().execute("INSERT INTO jobs (kind, path, meta, next_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                                (kind, os.path.abspath(path), json.dumps(meta) if meta else None, now, now))
+        if self.wake is not None:
+            self.wake()
+        return cur.lastrowid
+
+    # Take up to `limit` ready jobs (at most `max_bytes` of files) and mark them inflight
+    def claim(self, limit=BATCH_JOBS, max_bytes=BATCH_BYTES):
+        db = self.db()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = db.execute("SELECT * FROM jobs WHERE state = 'queued' AND next_at <= ? ORDER BY id LIMIT ?",
+                              (now, limit)).fetchall()
+            jobs, later, missing, total = [], [], [], 0
+            for row in rows:
+                job = dict(row)
+                try:
+                    job["size"] = os.path.getsize(job["path"])
+                except OSError as e:
+                    # Not written yet, or never will be
+                    error = f"File not found: {e.strerror}"
+                    if now - job["created_at"] > NOT_READY_TIMEOUT:
+                        missing.append((job["attempts"] + 1, error, job["id"]))
+                    else:
+                        later.append((now + NOT_READY_DELAY, error, job["id"]))
+                    continue
+                if jobs and total + job["size"] > max_bytes:
+                    break
+                total += job["size"]
+                jobs.append(job)
+            if later:
+                db.executemany("UPDATE jobs SET next_at = ?, error = ? WHERE id = ?", later)
+            if missing:
+                db.executemany("UPDATE jobs SET state = 'failed', attempts = ?, error = ? WHERE id = ?", missing)
+            if jobs:
+                db.executemany("UPDATE jobs SET state = 'inflight' WHERE id = ?", [(j["id"],) for j in jobs])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return jobs
+
+    def done(self, ids):
+        with self.db() as db:
+            db.executemany("UPDATE jobs SET state = 'done', error = NULL WHERE id = ?", [(i,) for i in ids])
+
+    # Back to the queue after a backoff delay, or failed after MAX_ATTEMPTS
+    def retry(self, jobs, error):
+        now = time.time()
+        updates = []
+        for job in jobs:
+            attempts = job["attempts"] + 1
+            delay = min(BACKOFF_MAX, BACKOFF * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            state = "failed" if attempts >= MAX_ATTEMPTS else "queued"
+            updates.append((state, attempts, now + delay, str(error), job["id"]))
+        with self.db() as db:
+            db.executemany("UPDATE jobs SET state = ?, attempts = ?, next_at = ?, error = ? WHERE id = ?", updates)
+
+    # Job counts per state, and the age of the oldest queued job in seconds
+    def depth(self):
+        db = self.db()
+        counts = dict(db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        oldest = db.execute("SELECT MIN(created_at) FROM jobs WHERE state IN ('queued', 'inflight')").fetchone()[0]
+        return counts, (time.time() - oldest) if oldest else 0.0
+
+    # Drop finished jobs older than `seconds`
+    def purge(self, seconds=86400):
+        with self.db() as db:
+            db.execute("DELETE FROM jobs WHERE state = 'done' AND created_at < ?", (time.time() - seconds,))
+
+
+## ==========[ HTTP ]========== ##
+# One keep-alive HTTP/1.1 connection; reconnects when the server has closed it
+class Connection:
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.path = parts.path or "/"
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.reader = self.writer = None
+        self.connects = 0
+
+    async def post(self, body, content_type, timeout=REQUEST_TIMEOUT):
+        for attempt in range(2):
+            fresh = self.writer is None
+            if fresh:
+                self.reader, self.writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=self.ssl), timeout)
+                self.connects += 1
+            try:
+                return await asyncio.wait_for(self.request(body, content_type), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                # A reused connection may have been closed by the server while idle: retry once on a new one
+                if fresh or attempt:
+                    raise
+            except BaseException:
+                self.close()
+                raise
+
+    async def request(self, body, content_type):
+        head = (f"POST {self.path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n")
+        self.writer.write(head.encode())
+        self.writer.write(body)
+        await self.writer.drain()
+        status = int((await self.reader.readuntil(b"\r\n")).split()[1])
+        headers = await read_headers(self.reader)
+        data = await read_body(self.reader, headers)
+        # Without a length or chunked framing the body ran to the end of the connection
+        if headers.get("connection", "").lower() == "close" or not framed(headers):
+            self.close()
+        return status, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def read_headers(reader):
+    headers = {}
+    while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    return headers
+
+
+def framed(headers):
+    return "content-length" in headers or "chunked" in headers.get("transfer-encoding", "").lower()
+
+
+# Body of a request or response: chunked, Content-Length, or (neither) everything up to EOF
+async def read_body(reader, headers):
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await read_headers(reader)      # Trailers, up to the blank line
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"]))
+    return await reader.read()
+
+
+# Request body for a batch of claimed jobs (reads the files)
+def batch_body(jobs):
+    header = {"jobs": [{"id": j["id"], "kind": j["kind"], "name": os.path.basename(j["path"]), "size": j["size"],
+                        "meta": json.loads(j["meta"]) if j["meta"] else None} for j in jobs]}
+    parts = [json.dumps(header).encode() + b"\n"]
+    for job in jobs:
+        with open(job["path"], "rb") as f:
+            parts.append(f.read())
+    return b"".join(parts)
+
+
+## ==========[ UPLOADER ]========== ##
+class Uploader:
+    def __init__(self, jobs, url, workers=WORKERS, batch=BATCH_JOBS, max_bytes=BATCH_BYTES, stats_interval=STATS_INTERVAL):
+        self.jobs = jobs
+        self.url = url
+        self.workers = workers
+        self.batch = batch
+        self.max_bytes = max_bytes
+        self.stats_interval = stats_interval
+        self.connections = []
+        self.loop = None
+        self.ready = None
+        # Metrics
+        self.sent = 0
+        self.bytes = 0
+        self.requests = 0
+        self.retries = 0
+        self.started = None
+
+    # Run the workers until cancelled
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.ready = asyncio.Event()
+        self.jobs.wake = lambda: self.loop.call_soon_threadsafe(self.ready.set)
+        self.started = time.monotonic()
+        tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        if self.stats_interval:
+            tasks.append(asyncio.create_task(self.report()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.jobs.wake = None
+            for conn in self.connections:
+                conn.close()
+
+    async def worker(self):
+        conn = Connection(self.url)
+        self.connections.append(conn)
+        while True:
+            jobs = await asyncio.to_thread(self.jobs.claim, self.batch, self.max_bytes)
+            if not jobs:
+                self.ready.clear()
+                try:
+                    await asyncio.wait_for(self.ready.wait(), IDLE_POLL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                body = await asyncio.to_thread(batch_body, jobs)
+                status, data = await conn.post(body, "application/x-pi-batch")
+                if status != 200:
+                    raise IOError(f"HTTP {status}")
+                accepted = set(json.loads(data).get("accepted", []))
+            except asyncio.CancelledError:
+                # Not sent: back to the queue without counting an attempt
+                await asyncio.to_thread(self.jobs.retry, [dict(j, attempts=j["attempts"] - 1) for j in jobs], "cancelled")
+                raise
+            except Exception as e:
+                self.retries += len(jobs)
+                await asyncio.to_thread(self.jobs.retry, jobs, e)
+                continue
+            ok = [j for j in jobs if j["id"] in accepted]
+            rejected = [j for j in jobs if j["id"] not in accepted]
+            await asyncio.to_thread(self.jobs.done, [j["id"] for j in ok])
+            if rejected:
+                self.retries += len(rejected)
+                await asyncio.to_thread(self.jobs.retry, rejected, "not accepted")
+            self.sent += len(ok)
+            self.bytes += sum(j["size"] for j in ok)
+            self.requests += 1
+
+    def stats(self):
+        elapsed = max(1e-9, time.monotonic() - self.started)
+        counts, oldest = self.jobs.depth()
+        return (f"sent {self.sent} | {self.sent / elapsed:.1f} jobs/s | {self.bytes / 2**20 / elapsed:.2f} MB/s | "
+                f"requests {self.requests} | retries {self.retries} | connections {sum(c.connects for c in self.connections)} | "
+                f"queued {counts.get('queued', 0)} | inflight {counts.get('inflight', 0)} | failed {counts.get('failed', 0)} | "
+                f"oldest {oldest:.1f} s")
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            print(f"[INFO] Upload: {await asyncio.to_thread(self.stats)}")
+
+
+## ==========[ STAND-IN SERVER ]========== ##
+# Accepts batches like the real API would, with optional latency and random failures
+class StandInServer:
+    def __init__(self, latency=0.0, fail_rate=0.0, chunked=False):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.chunked = chunked      # Reply with Transfer-Encoding: chunked, like many proxies do
+        self.jobs = 0
+        self.bytes = 0
+        self.requests = 0
+        self.connections = 0
+        self.started = time.monotonic()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                headers = await read_headers(reader)
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if random.random() < self.fail_rate:
+                    status, reply = 503, {"error": "unavailable"}
+                else:
+                    header = json.loads(body[:body.index(b"\n")])
+                    ids = [j["id"] for j in header["jobs"]]
+                    status, reply = 200, {"accepted": ids}
+                    self.jobs += len(ids)
+                    self.bytes += len(body)
+                self.requests += 1
+                data = json.dumps(reply).encode()
+                if self.chunked:
+                    half = len(data) // 2
+                    framing = "Transfer-Encoding: chunked"
+                    data = b"".join(b"%x\r\n%s\r\n" % (len(c), c) for c in (data[:half], data[half:])) + b"0\r\n\r\n"
+                else:
+                    framing = f"Content-Length: {len(data)}"
+                writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\nContent-Type: application/json\r\n"
+                             f"{framing}\r\nConnection: keep-alive\r\n\r\n".encode() + data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        return (f"received {self.jobs} jobs | {self.jobs / elapsed:.1f} jobs/s | {self.bytes / 2**20 / elapsed:.2f} MB/s | "
+                f"requests {self.requests} | connections {self.connections}")
+
+
+async def serve(port, latency, fail_rate, chunked=False, interval=STATS_INTERVAL):
+    server = StandInServer(latency, fail_rate, chunked)
+    async with await asyncio.start_server(server.handle, "127.0.0.1", port):
+        print(f"[INFO] Stand-in server on http://127.0.0.1:{port}/upload")
+        while True:
+            await asyncio.sleep(interval)
+            print(f"[INFO] Server: {server.stats()}")
+
+
+# Queue `count` files of `size` bytes and time how long the uploader takes to send them all
+async def bench(url, count, size, workers, batch, latency, fail_rate, chunked=False):
+    server = None
+    if url is None:
+        server = StandInServer(latency, fail_rate, chunked)
+        listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{listener.sockets[0].getsockname()[1]}/upload"
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = JobQueue(os.path.join(tmp, "jobs.db"))
+        payload = os.urandom(size)
+        for i in range(count):
+            path = os.path.join(tmp, f"file_{i:05d}.bin")
+            with open(path, "wb") as f:
+                f.write(payload)
+            jobs.put("bench", path)
+        uploader = Uploader(jobs, url, workers, batch, stats_interval=0)
+        task = asyncio.create_task(uploader.run())
+        while jobs.depth()[0].get("done", 0) + jobs.depth()[0].get("failed", 0) < count:
+            await asyncio.sleep(0.05)
+        print(f"[INFO] Bench: {count} jobs of {size / 1024:.0f} KB | workers {workers} | batch {batch}")
+        print(f"[INFO] Upload: {uploader.stats()}")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        jobs.close()
+    if server is not None:
+        print(f"[INFO] Server: {server.stats()}")
+        listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in upload server and uploader benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("serve", help="Run the stand-in server")
+    p.add_argument("--port", type=int, default=8765)
+    p = sub.add_parser("bench", help="Measure sustained jobs/s (against a built-in server unless --url is given)")
+    p.add_argument("--url")
+    p.add_argument("--jobs", type=int, default=500)
+    p.add_argument("--size", type=int, default=200_000, help="Bytes per job")
+    p.add_argument("--workers", type=int, default=WORKERS)
+    p.add_argument("--batch", type=int, default=BATCH_JOBS)
+    for p in sub.choices.values():
+        p.add_argument("--latency", type=float, default=0.0, help="Server latency per request (ms)")
+        p.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests the server fails")
+        p.add_argument("--chunked", action="store_true", help="Server replies with chunked bodies")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args.port, args.latency / 1000, args.fail_rate, args.chunked))
+        else:
+            asyncio.run(bench(args.url, args.jobs, args.size, args.workers, args.batch, args.latency / 1000, args.fail_rate, args.chunked))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Camera stream profiles: buffers sized to what each mode actually reads
+
+    Every buffer of every stream is allocated when a camera is configured, whether anything reads
+    it or not. A profile names the streams a mode needs, their size and format, and how many
+    buffers to keep in flight:
+        - headless  : "switch" stills without a preview; the stream only keeps AE / AWB settled
+                      between presses (the still itself comes from the still mode)
+        - preview   : on-screen preview window
+        - timelapse : "switch" stills plus time-lapse frames taken from the running stream
+        - zsl       : full-resolution frames copied into the ZSL ring
+        - detect    : smile detection with a display; the cascades read the Y plane of the
+                      YUV420 lores stream in place (no colour conversion, no copy)
+        - detect_headless : the same without a display, so only the Y plane is produced
+        - legacy    : the old fixed configuration (3280x2464 XBGR main + 1640x1232 XBGR lores)
+
+    Footprints count each buffer with its row stride; the still capture (one full-resolution
+    BGR888 buffer while switched) comes on top.
+        python -m PiCommon.profiles
+"""
+
+## ==========[ CONSTANTS ]========== ##
+SENSOR_SIZE = (3280, 2464)
+DETECT_SIZE = (640, 480)
+STRIDE_ALIGN = 64           # Bytes each row is padded to
+BYTES_PER_PIXEL = {"XBGR8888": 4, "XRGB8888": 4, "RGB888": 3, "BGR888": 3, "YUV420": 1, "YVU420": 1}
+PLANAR = ("YUV420", "YVU420")   # Y plane plus quarter-size U and V planes
+
+
+## ==========[ PROFILES ]========== ##
+def stream(size, fmt):
+    return {"size": tuple(size), "format": fmt}
+
+
+# Detection at `size`: Y plane of a YUV420 stream for the cascades, and an RGB main stream only when shown.
+# `held` is how many frames the pipeline may hold at once, so the camera still has a buffer to fill.
+def detect_profile(size=DETECT_SIZE, display=True, held=2):
+    if display:
+        return {"main": stream(size, "XRGB8888"), "lores": stream(size, "YUV420"), "detect": "lores", "buffer_count": held + 2}
+    return {"main": stream(size, "YUV420"), "lores": None, "detect": "main", "buffer_count": held + 2}
+
+
+PROFILES = {
+    "headless": {"main": stream((640, 480), "YUV420"), "lores": None, "buffer_count": 2},
+    "preview": {"main": stream((820, 616), "XBGR8888"), "lores": None, "buffer_count": 4},
+    "timelapse": {"main": stream((1640, 1232), "XBGR8888"), "lores": None, "buffer_count": 2},
+    "zsl": {"main": stream(SENSOR_SIZE, "XBGR8888"), "lores": None, "buffer_count": 3},
+    "detect": detect_profile(DETECT_SIZE, display=True),
+    "detect_headless": detect_profile(DETECT_SIZE, display=False),
+    "legacy": {"main": stream(SENSOR_SIZE, "XBGR8888"), "lores": stream((1640, 1232), "XBGR8888"), "buffer_count": 4},
+}
+STILL = stream(SENSOR_SIZE, "BGR888")
+
+
+## ==========[ CONFIGURATION ]========== ##
+def get(profile):
+    return PROFILES[profile] if isinstance(profile, str) else profile
+
+
+# Preview configuration for `cam` from a profile (name or dict)
+def preview_config(cam, profile):
+    p = get(profile)
+    return cam.create_preview_configuration(main=dict(p["main"]), lores=dict(p["lores"]) if p["lores"] else None,
+                                            display="lores" if p["lores"] else "main", buffer_count=p["buffer_count"])
+
+
+## ==========[ FOOTPRINT ]========== ##
+# Bytes of one buffer of a stream
+def frame_bytes(s):
+    w, h = s["size"]
+    stride = -(-w * BYTES_PER_PIXEL[s["format"]] // STRIDE_ALIGN) * STRIDE_ALIGN
+    return stride * h * 3 // 2 if s["format"] in PLANAR else stride * h
+
+
+# Bytes per camera for all of a profile's buffers
+def footprint(profile):
+    p = get(profile)
+    per_buffer = sum(frame_bytes(s) for s in (p["main"], p["lores"]) if s)
+    return per_buffer * p["buffer_count"]
+
+
+def describe(profile, name=None):
+    p = get(profile)
+    name = name or next((k for k, v in PROFILES.items() if v is p), "custom")
+    streams = " + ".join(f"{k} {s['size'][0]}x{s['size'][1]} {s['format']}" for k in ("main", "lores") if (s := p[k]))
+    return f"{name}: {streams} | {p['buffer_count']} buffers | {footprint(p) / 2**20:.1f} MB per camera"
+
+
+def report():
+    print(f"[INFO] Stream profiles (per camera; a still capture adds {frame_bytes(STILL) / 2**20:.1f} MB while it runs)")
+    for name, p in PROFILES.items():
+        print(f"\t{describe(p, name)}")
+
+
+if __name__ == "__main__":
+    report()
@@ -0,0 +1,237 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Shared asyncio runtime for the capture scripts
+
+    Everything a script reacts to arrives as an event on one asyncio loop, instead of main loops
+    that sleep-poll module globals changed from gpiozero threads:
+        - ButtonEvents  : press / release edges (timestamped on the gpiozero thread)
+        - ChunkEvents   : "new audio in the ring", from the PortAudio callback
+        - frames()      : camera frames every `interval` seconds
+    Handlers are coroutines run one after another on the loop, so they don't race each other.
+    Blocking device and file calls go to the runtime's thread pool through blocking().
+
+    run(main) starts the loop; Ctrl+C cancels main(), so its finally blocks close the devices
+    (after drain(), which waits for blocking calls that were still running).
+
+    runtime.startup times the start-up phases (they may run concurrently) from process start:
+        cam0, cam1, mic = await asyncio.gather(rt.startup.phase("cam0", rt.blocking(...)), ...)
+        rt.startup.report()
+"""
+
+## ==========[ MODULES ]========== ##
+import asyncio
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from time import CLOCK_BOOTTIME, clock_gettime, monotonic, monotonic_ns
+
+
+## ==========[ CONSTANTS ]========== ##
+WORKERS = 4             # Threads for blocking calls
+PRESSED = "pressed"
+RELEASED = "released"
+
+Edge = namedtuple("Edge", "kind t_ns")
+
+
+## ==========[ EVENTS ]========== ##
+# Button edges as an async stream
+class ButtonEvents:
+    def __init__(self, runtime, button):
+        self.button = button
+        self.queue = asyncio.Queue()
+        loop = runtime.loop
+        # Runs on the gpiozero thread: timestamp the edge and hand it to the loop
+        put = lambda kind: loop.call_soon_threadsafe(self.queue.put_nowait, Edge(kind, monotonic_ns()))
+        button.when_pressed = lambda: put(PRESSED)
+        button.when_released = lambda: put(RELEASED)
+
+    # Next edge, or None after `timeout` seconds
+    async def next(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def pressed(self):
+        while (edge := await self.next()).kind != PRESSED:
+            pass
+        return edge
+
+    async def released(self):
+        while (edge := await self.next()).kind != RELEASED:
+            pass
+        return edge
+
+    # True if the button is still down `seconds` after a press (a release in that time is consumed)
+    async def held(self, seconds):
+        edge = await self.next(seconds)
+        return edge is None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.next()
+
+    def close(self):
+        self.button.when_pressed = None
+        self.button.when_released = None
+
+
+# "New audio" notifications from a MicCapture; every waiter is woken by each chunk
+class ChunkEvents:
+    def __init__(self, runtime, capture):
+        self.event = asyncio.Event()
+        loop = runtime.loop
+        capture.on_chunk = lambda: loop.call_soon_threadsafe(self.notify)
+
+    def notify(self):
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+    async def wait(self):
+        await self.event.wait()
+
+
+## ==========[ CONSUMERS ]========== ##
+# Copies audio from a MicCapture ring into writers (WavWriter, VadWriter, FeatureAnalyzer) as chunks arrive
+class AudioTask:
+    def __init__(self, runtime, capture, writers, start=None, progress=True):
+        self.runtime = runtime
+        self.capture = capture
+        self.writers = writers
+        self.progress = progress
+        self.chunks = runtime.audio(capture)
+        self.reader = capture.reader(start)
+        self.end = None
+        self.task = runtime.loop.create_task(self.run())
+
+    async def run(self):
+        while self.end is None or self.reader.pos < self.end:
+            if self.reader.available() <= 0:
+                await self.chunks.wait()
+                continue
+            data = self.reader.read(end=self.end)
+            # Each writer gets the chunk on the pool; the next chunk waits for all of them
+            await asyncio.gather(*(self.runtime.blocking(w.write, data) for w in self.writers))
+            if self.progress:
+                print("*", end="", flush=True)
+
+    # Stop after writing everything captured so far
+    async def stop(self):
+        self.end = self.capture.written
+        self.chunks.notify()
+        try:
+            await self.task
+        finally:
+            self.capture.release(self.reader)
+
+
+## ==========[ STARTUP ]========== ##
+# Seconds since this process started (from /proc), so start-up times include the interpreter and imports
+def process_age():
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return max(0.0, clock_gettime(CLOCK_BOOTTIME) - ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+# Start-up phases as (name, start, end); concurrent phases overlap
+class Startup:
+    def __init__(self):
+        now = monotonic()
+        self.t0 = now - process_age()
+        self.phases = [("imports", self.t0, now)]   # Interpreter start-up and module imports
+
+    # Await `awaitable`, timing it as phase `name`
+    async def phase(self, name, awaitable):
+        start = monotonic()
+        try:
+            return await awaitable
+        finally:
+            self.phases.append((name, start, monotonic()))
+
+    def report(self):
+        ready = monotonic() - self.t0
+        busy = sum(end - start for _, start, end in self.phases)
+        print(f"[TIME] Ready {ready * 1000:.0f} ms after process start")
+        for name, start, end in sorted(self.phases, key=lambda p: p[1]):
+            print(f"\t[TIME] {name:<10} at {(start - self.t0) * 1000:6.0f} ms | took {(end - start) * 1000:6.0f} ms")
+        print(f"\t[TIME] Phases add up to {busy * 1000:.0f} ms (overlap saved {max(0.0, busy - ready) * 1000:.0f} ms)")
+
+
+## ==========[ RUNTIME ]========== ##
+class Runtime:
+    def __init__(self, workers=WORKERS):
+        self.startup = Startup()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blocking")
+        self.loop = None
+        self.chunk_events = {}
+        self.pending = set()
+
+    # Run fn(*args) on the thread pool; returns an awaitable.
+    # Shielded: cancelling the caller doesn't abandon the call, drain() still waits for it.
+    def blocking(self, fn, *args):
+        future = self.loop.run_in_executor(self.executor, fn, *args)
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        return asyncio.shield(future)
+
+    # Wait for every blocking call still running (before closing what they use)
+    async def drain(self):
+        if self.pending:
+            done, _ = await asyncio.wait(set(self.pending))
+            for future in done:
+                if not future.cancelled() and future.exception() is not None:
+                    print(f"[ERROR] {future.exception()}")
+
+    def button(self, button):
+        return ButtonEvents(self, button)
+
+    def audio(self, capture):
+        if capture not in self.chunk_events:
+            self.chunk_events[capture] = ChunkEvents(self, capture)
+        return self.chunk_events[capture]
+
+    # Start copying audio from `start` (a sample position) into the writers
+    def record(self, capture, writers, start=None, progress=True):
+        return AudioTask(self, capture, writers, start, progress)
+
+    # (camnum, image, sensor timestamp) from each camera every `interval` seconds
+    async def frames(self, cams, stream, interval):
+        due = monotonic()
+        while True:
+            for camnum, cam in cams.items():
+                image, stamp = await self.blocking(grab_image, cam, stream)
+                yield camnum, image, stamp
+            due += interval
+            await asyncio.sleep(max(0.0, due - monotonic()))
+
+    async def main(self, coro_fn):
+        self.loop = asyncio.get_running_loop()
+        await coro_fn(self)
+
+
+# One frame of a running camera as a PIL image, with its sensor timestamp
+def grab_image(cam, stream):
+    request = cam.capture_request()
+    try:
+        return request.make_image(stream), request.get_metadata().get("SensorTimestamp")
+    finally:
+        request.release()
+
+
+# Run main(runtime) on a new loop until it returns or Ctrl+C cancels it
+def run(main, workers=WORKERS):
+    runtime = Runtime(workers)
+    try:
+        asyncio.run(runtime.main(main))
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        runtime.executor.shutdown(wait=True)
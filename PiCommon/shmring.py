@@ -0,0 +1,116 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Fixed-size ring of frames in shared memory, written by one process and read by others
+
+    A frame is copied into its slot once by the writer; readers see the slots as NumPy views
+    over the shared buffer, so nothing is pickled or sent through a pipe.
+    Each slot carries its sequence number, which the reader checks before and after reading
+    (a seqlock) to detect a frame that was overwritten while it was being read.
+"""
+
+## ==========[ MODULES ]========== ##
+import sys
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+
+## ==========[ CONSTANTS ]========== ##
+META = 6            # Per slot: seq, timestamp (ns), 4 user values
+WRITING = -1        # Slot seq while the writer is filling it
+
+
+## ==========[ HELPERS ]========== ##
+# Attach to an existing segment; only the creator unlinks it.
+# Before 3.13 attaching always registers with the resource tracker, which is harmless for
+# multiprocessing children since they share the creator's tracker.
+def attach_shm(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+## ==========[ RING ]========== ##
+class ShmRing:
+    def __init__(self, shape, dtype=np.uint8, slots=3, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.owner = name is None
+
+        header_size = 8 * (1 + slots * META)
+        frame_size = int(np.prod(self.shape)) * self.dtype.itemsize
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_size + frame_size * slots)
+        else:
+            self.shm = attach_shm(name)
+        self.name = self.shm.name
+
+        # Header: [head seq | per slot (seq, timestamp, user values...)]
+        self.header = np.ndarray((1 + slots * META,), dtype=np.int64, buffer=self.shm.buf)
+        self.meta = self.header[1:].reshape(slots, META)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=header_size)
+        if self.owner:
+            self.header[:] = 0
+            self.header[0] = -1
+            self.meta[:, 0] = WRITING
+
+    # Everything another process needs to attach to this ring
+    @property
+    def spec(self):
+        return (self.shape, self.dtype.str, self.slots, self.name)
+
+    @classmethod
+    def attach(cls, spec):
+        shape, dtype, slots, name = spec
+        return cls(shape, dtype, slots, name)
+
+    # Newest committed sequence number (-1 before the first frame)
+    @property
+    def head(self):
+        return int(self.header[0])
+
+    # ---------- Writer ----------
+    # Slot view to fill with the next frame; publish it with commit()
+    def reserve(self):
+        seq = self.head + 1
+        slot = seq % self.slots
+        self.meta[slot, 0] = WRITING
+        return self.frames[slot]
+
+    def commit(self, *values):
+        seq = self.head + 1
+        slot = seq % self.slots
+        self.meta[slot, 1] = time.monotonic_ns()
+        self.meta[slot, 2:2 + len(values)] = values
+        self.meta[slot, 0] = seq
+        self.header[0] = seq
+
+    def write(self, frame, *values):
+        self.reserve()[...] = frame
+        self.commit(*values)
+
+    # ---------- Reader ----------
+    # Copy the newest frame newer than `since` into out; returns (seq, meta) or None.
+    # None is also returned when the writer lapped the reader during the copy.
+    def read_latest(self, out, since=-1):
+        seq = self.head
+        if seq <= since:
+            return None
+        slot = seq % self.slots
+        if self.meta[slot, 0] != seq:
+            return None
+        out[...] = self.frames[slot]
+        meta = self.meta[slot].copy()
+        if meta[0] != seq or self.meta[slot, 0] != seq:
+            return None
+        return seq, meta
+
+    def close(self):
+        # Drop the views before closing, the buffer can't be released while they exist
+        self.header = self.meta = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,387 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Simulated Picamera2, PyAudio and gpiozero Button, for running the scripts off the Pi
+
+    Only the parts of each API the scripts use are here, with the same names and call shapes.
+    Selected through PiCommon/devices.py (PI_DEVICES=sim).
+
+        - Picamera2 : frames at the sensor's rate (capture_request() waits for the next one),
+                      a moving test pattern in the configured size and format, mode switches
+                      that take as long as a real reconfigure (captures wait them out). Each
+                      stream has buffer_count buffers; a request holds one until it is released,
+                      and when all are held the camera waits (frames are lost) like libcamera
+                      would. PI_SIM_CAMERAS sets how many cameras exist.
+        - PyAudio   : input streams whose callback runs on its own thread every frames_per_buffer
+                      samples, with bursts of voiced "speech" over a low noise floor.
+        - Button    : press() / release() (or hold()) from code fire the callbacks like gpiozero's
+                      pin thread would; every button is listed in `buttons` by pin.
+"""
+
+## ==========[ MODULES ]========== ##
+import os
+import threading
+import time
+import numpy as np
+from PIL import Image
+
+
+## ==========[ CONSTANTS ]========== ##
+CAMERAS = int(os.environ.get("PI_SIM_CAMERAS", 2))
+SENSOR_SIZE = (3280, 2464)
+FULL_RES_FPS = 15           # Frame rate of full sensor modes
+FPS = 30                    # Frame rate of binned / smaller modes
+SWITCH_TIME = 0.15          # Seconds to stop, reconfigure and restart a camera
+START_TIME = 0.3            # Seconds to open a camera
+
+SAMPLE_RATE = 44100
+SPEECH_ON = 1.2             # Seconds of "speech", then...
+SPEECH_OFF = 0.8            # ...seconds of silence
+NOISE_LEVEL = 30            # Noise floor (int16 amplitude)
+SPEECH_LEVEL = 6000
+
+# PyAudio constants
+paInt16 = 8
+paContinue = 0
+paInputOverflow = 2
+
+buttons = {}                # pin -> Button
+
+
+## ==========[ CAMERA ]========== ##
+class Preview:
+    NULL = "null"
+    QTGL = "qtgl"
+    QT = "qt"
+    DRM = "drm"
+
+
+# A blank buffer of a stream's size and format
+def stream_buffer(size, fmt):
+    w, h = size
+    if fmt in ("YUV420", "YVU420"):
+        return np.full((h * 3 // 2, w), 128, dtype=np.uint8)
+    channels = 3 if fmt in ("RGB888", "BGR888") else 4
+    row = np.linspace(0, 255, w, dtype=np.uint8)
+    buf = np.empty((h, w, channels), dtype=np.uint8)
+    buf[:] = row[None, :, None]
+    return buf
+
+
+class Request:
+    def __init__(self, arrays, metadata, release=None):
+        self.arrays = arrays
+        self.metadata = metadata
+        self.on_release = release
+
+    def make_array(self, name):
+        return self.arrays[name].copy()
+
+    def make_image(self, name):
+        array = self.arrays[name]
+        if array.ndim == 2:
+            raise RuntimeError(f"Format for stream {name} not supported by make_image")
+        return Image.fromarray(np.ascontiguousarray(array[..., :3]))
+
+    def save(self, name, path):
+        self.make_image(name).save(path)
+
+    def get_metadata(self):
+        return dict(self.metadata)
+
+    def release(self):
+        self.arrays = None
+        if self.on_release is not None:
+            self.on_release()
+            self.on_release = None
+
+
+class MappedArray:
+    def __init__(self, request, stream):
+        self.array = request.arrays[stream]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class Picamera2:
+    def __init__(self, camera_num=0):
+        if camera_num >= CAMERAS:
+            raise IndexError(f"Camera {camera_num} not found ({CAMERAS} simulated)")
+        time.sleep(START_TIME)
+        self.camera_num = camera_num
+        self.camera_config = None
+        self.controls = {}
+        self.buffers = []           # Per buffer: {stream: array}
+        self.free = []
+        self.cond = threading.Condition()
+        self.started = False
+        self.switching = False      # Mid mode switch: captures wait for the new mode's first frame
+        self.frame = 0
+        self.t0 = None
+        self.period = 1 / FPS
+
+    def create_preview_configuration(self, main=None, lores=None, raw=None, display="main", controls=None, buffer_count=4, **kwargs):
+        return {"use_case": "preview", "main": dict({"size": (640, 480), "format": "XBGR8888"}, **(main or {})),
+                "lores": dict({"format": "YUV420"}, **lores) if lores else None, "display": display,
+                "controls": dict(controls or {}), "buffer_count": buffer_count}
+
+    def create_still_configuration(self, main=None, lores=None, raw=None, display=None, controls=None, buffer_count=1, **kwargs):
+        return {"use_case": "still", "main": dict({"size": SENSOR_SIZE, "format": "BGR888"}, **(main or {})),
+                "lores": dict({"format": "YUV420"}, **lores) if lores else None, "display": display,
+                "controls": dict(controls or {}), "buffer_count": buffer_count}
+
+    def create_video_configuration(self, main=None, lores=None, **kwargs):
+        config = self.create_preview_configuration(main=dict({"size": (1280, 720)}, **(main or {})), lores=lores, **kwargs)
+        config["use_case"] = "video"
+        return config
+
+    def configure(self, config):
+        self.camera_config = config
+        streams = {name: config[name] for name in ("main", "lores") if config.get(name)}
+        with self.cond:
+            self.buffers = [{name: stream_buffer(s["size"], s["format"]) for name, s in streams.items()}
+                            for _ in range(config.get("buffer_count", 4))]
+            self.free = list(range(len(self.buffers)))
+            self.bands = [{} for _ in self.buffers]     # Row of the band drawn in each buffer
+            self.blank = {name: array[0].copy() for name, array in self.buffers[0].items()}
+        full = max(s["size"][0] for s in (config["main"], config.get("lores") or config["main"])) >= SENSOR_SIZE[0]
+        self.period = 1 / (FULL_RES_FPS if full else FPS)
+        self.controls.update(config.get("controls", {}))
+
+    def set_controls(self, controls):
+        self.controls.update(controls)
+
+    def start_preview(self, preview=None, **kwargs):
+        pass
+
+    def stop_preview(self):
+        pass
+
+    def start(self, config=None, show_preview=False):
+        if config is not None:
+            self.configure(config)
+        if self.camera_config is None:
+            self.configure(self.create_preview_configuration())
+        self.t0 = time.monotonic()
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.stop()
+        self.buffers = []
+
+    def switch_mode(self, config):
+        with self.cond:
+            self.switching = True
+        self.stop()
+        time.sleep(SWITCH_TIME)
+        self.start(config)
+        with self.cond:
+            self.switching = False
+            self.cond.notify_all()
+
+    # The next frame off the sensor
+    def capture_request(self, flush=None, wait=None):
+        # Wait out a mode switch and for a free buffer (all held: no frame can be delivered), then for the next frame
+        with self.cond:
+            while self.switching or (self.started and not self.free):
+                self.cond.wait()
+            if not self.started:
+                raise RuntimeError("Camera must be started before capture")
+            index = self.free.pop(0)
+            buffers, bands, blank = self.buffers, self.bands[index], self.blank
+        now = time.monotonic()
+        due = self.t0 + (int((now - self.t0) / self.period) + 1) * self.period
+        time.sleep(due - now)
+        self.frame += 1
+        # Test pattern: a bright band moving down the frame
+        for name, array in buffers[index].items():
+            h = array.shape[0] * 2 // 3 if array.ndim == 2 else array.shape[0]
+            if name in bands:
+                array[bands[name]:bands[name] + 8] = blank[name]
+            bands[name] = self.frame * 8 % h
+            array[bands[name]:bands[name] + 8] = 255
+        metadata = {"SensorTimestamp": int(due * 1e9), "FrameDuration": int(self.period * 1e6),
+                    "ExposureTime": 10000, "AnalogueGain": 1.0}
+        return Request(dict(buffers[index]), metadata, lambda: self.release_buffer(buffers, index))
+
+    def release_buffer(self, buffers, index):
+        with self.cond:
+            if buffers is self.buffers:
+                self.free.append(index)
+                self.cond.notify()
+
+    def capture_array(self, name="main"):
+        request = self.capture_request()
+        try:
+            return request.make_array(name)
+        finally:
+            request.release()
+
+    def switch_mode_and_capture_request(self, config, wait=None):
+        previous = self.camera_config
+        self.switch_mode(config)
+        try:
+            return self.capture_request()
+        finally:
+            self.switch_mode(previous)
+
+    def switch_mode_and_capture_file(self, config, path, name="main"):
+        request = self.switch_mode_and_capture_request(config)
+        try:
+            request.save(name, path)
+        finally:
+            request.release()
+
+
+## ==========[ AUDIO ]========== ##
+class Stream:
+    def __init__(self, rate, channels, frames_per_buffer, stream_callback=None, start=True, **kwargs):
+        self.rate = rate
+        self.channels = channels
+        self.chunk = frames_per_buffer
+        self.callback = stream_callback
+        self.sample = 0
+        self.thread = None
+        self.active = False
+        self.rng = np.random.default_rng(0)
+        if start:
+            self.start_stream()
+
+    # Next `frames` samples: voiced bursts (150 Hz and harmonics, syllable-rate envelope) over noise
+    def synthesize(self, frames):
+        t = (self.sample + np.arange(frames)) / self.rate
+        cycle = SPEECH_ON + SPEECH_OFF
+        on = (t % cycle) < SPEECH_ON
+        envelope = on * np.abs(np.sin(np.pi * 4 * t))
+        voice = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in (1, 2, 3, 5))
+        audio = SPEECH_LEVEL * envelope * voice / 2 + self.rng.normal(0, NOISE_LEVEL, frames)
+        self.sample += frames
+        samples = np.clip(audio, -32768, 32767).astype(np.int16)
+        return np.repeat(samples, self.channels).tobytes()
+
+    def run(self):
+        period = self.chunk / self.rate
+        due = time.monotonic() + period
+        while self.active:
+            time.sleep(max(0.0, due - time.monotonic()))
+            data = self.synthesize(self.chunk)
+            now = time.monotonic()
+            time_info = {"input_buffer_adc_time": due - period, "current_time": now}
+            due += period
+            if self.callback(data, self.chunk, time_info, 0)[1] != paContinue:
+                self.active = False
+
+    # Blocking reads (no callback)
+    def read(self, num_frames, exception_on_overflow=True):
+        time.sleep(num_frames / self.rate)
+        return self.synthesize(num_frames)
+
+    def start_stream(self):
+        if self.active:
+            return
+        self.active = True
+        if self.callback is not None:
+            self.thread = threading.Thread(target=self.run, name="sim-audio", daemon=True)
+            self.thread.start()
+
+    def stop_stream(self):
+        self.active = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def is_active(self):
+        return self.active
+
+    def get_input_latency(self):
+        return self.chunk / self.rate
+
+    def close(self):
+        self.stop_stream()
+
+
+class PyAudio:
+    DEVICE = {"index": 0, "name": "Simulated Microphone", "maxInputChannels": 1, "maxOutputChannels": 0,
+              "defaultSampleRate": float(SAMPLE_RATE)}
+
+    def get_device_count(self):
+        return 1
+
+    def get_device_info_by_index(self, index):
+        if index != 0:
+            raise IOError("Invalid device index")
+        return dict(self.DEVICE)
+
+    def get_default_input_device_info(self):
+        return dict(self.DEVICE)
+
+    def get_sample_size(self, fmt):
+        return 2
+
+    def open(self, rate, channels, format=paInt16, input=False, output=False, input_device_index=None,
+             frames_per_buffer=1024, start=True, stream_callback=None, **kwargs):
+        return Stream(rate, channels, frames_per_buffer, stream_callback, start)
+
+    def terminate(self):
+        pass
+
+
+## ==========[ GPIO ]========== ##
+class Button:
+    def __init__(self, pin=None, pull_up=True, active_state=None, bounce_time=None, hold_time=1, hold_repeat=False, pin_factory=None):
+        if pin in buttons:
+            raise RuntimeError(f"pin {pin} is already in use")
+        self.pin = pin
+        self.hold_time = hold_time
+        self.hold_repeat = hold_repeat
+        self.is_pressed = False
+        self.when_pressed = None
+        self.when_released = None
+        self.when_held = None
+        self.timer = None
+        buttons[pin] = self
+
+    @property
+    def is_held(self):
+        return self.is_pressed and self.timer is not None and not self.timer.is_alive()
+
+    def press(self):
+        if self.is_pressed:
+            return
+        self.is_pressed = True
+        if self.when_held is not None:
+            self.timer = threading.Timer(self.hold_time, self.held)
+            self.timer.start()
+        if self.when_pressed is not None:
+            self.when_pressed()
+
+    def held(self):
+        if self.is_pressed and self.when_held is not None:
+            self.when_held()
+
+    def release(self):
+        if not self.is_pressed:
+            return
+        self.is_pressed = False
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.when_released is not None:
+            self.when_released()
+
+    # Press, keep it down for `seconds`, release (blocks the caller)
+    def hold(self, seconds):
+        self.press()
+        time.sleep(seconds)
+        self.release()
+
+    def close(self):
+        self.release()
+        buttons.pop(self.pin, None)
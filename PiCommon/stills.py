@@ -0,0 +1,219 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Capture stills from several cameras at the same time, and save them in the background
+
+    Each camera switches mode and captures on its own thread, so the exposures overlap and
+    the total time is that of the slowest camera instead of the sum of all of them.
+    The sensor timestamps of the frames are kept, and written to a small JSON record
+    next to the images together with the skew between them.
+
+    Encoding and writing is done by a StillWriter: a few worker threads behind a bounded
+    queue (a full queue makes the capture side wait), each file written under a temporary
+    name and renamed into place, so a half-written image is never left behind.
+"""
+
+## ==========[ MODULES ]========== ##
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from PiCommon.lazy import lazy
+
+Image = lazy("PIL.Image")
+
+
+## ==========[ CONSTANTS ]========== ##
+WRITER_THREADS = 2      # Encoder threads (PIL releases the GIL while encoding)
+WRITER_QUEUE = 8        # Images waiting to be encoded before capture has to wait
+JPEG_QUALITY = 90
+
+
+## ==========[ GLOBALS ]========== ##
+pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="still")
+last_stamp = None
+stamp_count = 0
+stamp_lock = threading.Lock()
+
+
+## ==========[ HELPERS ]========== ##
+# Timestamp for file names, with milliseconds, and a counter if it repeats (never collides within a process)
+def unique_stamp():
+    global last_stamp, stamp_count
+    now = time.time()
+    stamp = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime(now)) + f"-{int(now * 1000) % 1000:03d}"
+    with stamp_lock:
+        if stamp == last_stamp:
+            stamp_count += 1
+            return f"{stamp}-{stamp_count}"
+        last_stamp, stamp_count = stamp, 0
+    return stamp
+
+
+# Encode an image to a temporary file next to fname, then rename it into place
+def save_atomic(image, fname):
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(image)
+    ext = os.path.splitext(fname)[1].lower()
+    fmt = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG"}.get(ext, "JPEG")
+    options = {"quality": JPEG_QUALITY} if fmt == "JPEG" else {}
+    tmp = os.path.join(os.path.dirname(fname), f".{os.path.basename(fname)}.part")
+    with open(tmp, "wb") as f:
+        image.convert("RGB").save(f, fmt, **options)
+    os.replace(tmp, fname)
+    return os.path.getsize(fname)
+
+
+## ==========[ STILL WRITER ]========== ##
+class StillWriter:
+    def __init__(self, threads=WRITER_THREADS, queue_size=WRITER_QUEUE):
+        self.queue = queue.Queue(queue_size)
+        self.lock = threading.Lock()
+        self.written = 0
+        self.bytes = 0
+        self.threads = [threading.Thread(target=self.run, daemon=True) for _ in range(threads)]
+        for t in self.threads:
+            t.start()
+
+    # Queue an image (PIL image or RGB array) to be saved as fname; returns a Future of the file size
+    def submit(self, image, fname):
+        future = Future()
+        self.queue.put((image, fname, future, time.monotonic()))
+        return future
+
+    def backlog(self):
+        return self.queue.qsize()
+
+    def run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            image, fname, future, queued = job
+            try:
+                start = time.monotonic()
+                size = save_atomic(image, fname)
+                done = time.monotonic()
+                with self.lock:
+                    self.written += 1
+                    self.bytes += size
+                print(f"[FILE] Image saved to {fname} ({size / 1024:.0f} KB | queued {(start - queued) * 1000:.0f} ms | "
+                      f"encode {(done - start) * 1000:.0f} ms | backlog {self.backlog()})")
+                future.set_result(size)
+            except Exception as e:
+                print(f"[ERROR] Saving {fname}: {e}")
+                future.set_exception(e)
+
+    # Print frames/s and MB/s once every future in the list is done (without blocking the caller)
+    def report_when_done(self, futures, label, started):
+        def report():
+            wait(futures)
+            elapsed = time.monotonic() - started
+            sizes = [f.result() for f in futures if f.exception() is None]
+            print(f"[INFO] {label}: {len(sizes)} frames in {elapsed:.2f} s | {len(sizes) / elapsed:.1f} fps | "
+                  f"{sum(sizes) / 2**20 / elapsed:.1f} MB/s")
+        threading.Thread(target=report, daemon=True).start()
+
+    def stop(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for t in self.threads:
+            t.join(timeout=10)
+
+
+## ==========[ FUNCTIONS ]========== ##
+# Capture one still; saved through the writer if there is one, else right here. Returns its record
+def capture_still(camnum, cam, config, fname, writer=None):
+    record = {"cam": camnum, "file": fname, "requested_ns": time.monotonic_ns()}
+    try:
+        request = cam.switch_mode_and_capture_request(config)
+        try:
+            record["sensor_timestamp_ns"] = request.get_metadata().get("SensorTimestamp")
+            image = request.make_image("main")
+        finally:
+            request.release()
+        if writer is not None:
+            writer.submit(image, fname)
+        else:
+            save_atomic(image, fname)
+    except Exception as e:
+        record["error"] = str(e)
+    record["done_ns"] = time.monotonic_ns()
+    record["latency_ms"] = (record["done_ns"] - record["requested_ns"]) / 1e6
+    return record
+
+
+# Capture from every camera in {camnum: cam} at once, each with its still config from {camnum: config};
+# returns when all of them are captured (and saved, when there is no writer)
+def capture_stills(cams, configs, fnames, writer=None):
+    futures = [pool.submit(capture_still, camnum, cam, configs[camnum], fnames[camnum], writer) for camnum, cam in cams.items()]
+    return [f.result() for f in futures]
+
+
+# Capture `count` frames at `fps` from one camera, handing each one to the writer.
+# With a config the camera switches to it for the burst; without one the running stream is used.
+def capture_burst(camnum, cam, config, count, fps, fname_base, writer):
+    records, futures = [], []
+    previous = cam.camera_config
+    if config is not None:
+        cam.switch_mode(config)
+    try:
+        due = time.monotonic()
+        for i in range(count):
+            fname = f"{fname_base}_{i:02d}.jpg"
+            request = cam.capture_request()
+            try:
+                stamp = request.get_metadata().get("SensorTimestamp")
+                image = request.make_image("main")
+            finally:
+                request.release()
+            futures.append(writer.submit(image, fname))
+            records.append({"cam": camnum, "file": fname, "index": i, "sensor_timestamp_ns": stamp})
+            due += 1 / fps
+            time.sleep(max(0.0, due - time.monotonic()))
+    finally:
+        if config is not None:
+            cam.switch_mode(previous)
+    return records, futures
+
+
+# Burst on every camera at once (configs as for capture_stills, None for the running streams);
+# prints the sustained rate once everything is on disk
+def capture_bursts(cams, configs, count, fps, fname_bases, writer):
+    started = time.monotonic()
+    jobs = [pool.submit(capture_burst, camnum, cam, configs[camnum] if configs else None, count, fps, fname_bases[camnum], writer)
+            for camnum, cam in cams.items()]
+    records, futures = [], []
+    for job in jobs:
+        r, f = job.result()
+        records += r
+        futures += f
+    elapsed = time.monotonic() - started
+    print(f"[INFO] Burst Captured: {len(records)} frames in {elapsed:.2f} s ({len(records) / elapsed:.1f} fps)")
+    writer.report_when_done(futures, "Burst Written", started)
+    return records
+
+
+# Skew between the sensor timestamps of a set of stills, in ms (None for fewer than two).
+# For bursts it is measured between the first frames of each camera.
+def timestamp_skew(records):
+    stamps = [r["sensor_timestamp_ns"] for r in records
+              if r.get("sensor_timestamp_ns") is not None and r.get("index", 0) == 0]
+    if len(stamps) < 2:
+        return None
+    return (max(stamps) - min(stamps)) / 1e6
+
+
+# Write the sidecar record for a set of stills
+def write_record(fname, records):
+    record = {
+        "stills": records,
+        "skew_ms": timestamp_skew(records),
+        "latency_ms": max((r["latency_ms"] for r in records if "latency_ms" in r), default=None),
+    }
+    with open(fname, "w") as f:
+        json.dump(record, f, indent=4)
+    return record
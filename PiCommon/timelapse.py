@@ -0,0 +1,185 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Time-lapse container: every frame of a time-lapse appended to one indexed file
+
+    Layout of a .ptl file:
+        header      b"PTLC" | version (u16) | reserved
+        frames      b"FRAM" | camera (u8) | sensor timestamp (ns) | wall clock (ns) | size (u32) | JPEG bytes
+        index       b"INDX" | count (u64) | count x (offset u64, camera u8, sensor timestamp i64, wall clock i64)
+        trailer     b"TEND" | index offset (u64)
+
+    The index and trailer are written when the file is closed. A file whose recording was cut
+    off (power loss, crash) has no trailer; the reader then rebuilds the index by walking the
+    frame headers, and a frame truncated mid-write is ignored.
+    The reader memory-maps the file, so any frame is a slice of the map, found through the index.
+
+    USAGE:
+        python -m PiCommon.timelapse info timelapse.ptl
+        python -m PiCommon.timelapse export timelapse.ptl --start 100 --end 200 --cam 0 --out frames/
+"""
+
+## ==========[ MODULES ]========== ##
+import argparse
+import io
+import mmap
+import os
+import struct
+import time
+from PiCommon.lazy import lazy
+
+np = lazy("numpy")
+Image = lazy("PIL.Image")
+
+
+## ==========[ CONSTANTS ]========== ##
+VERSION = 1
+HEADER = struct.Struct("<4sH10x")           # magic, version
+FRAME = struct.Struct("<4sB3xqqI")          # magic, camera, sensor ns, wall ns, size
+INDEX = struct.Struct("<4sQ")               # magic, count
+TRAILER = struct.Struct("<4sQ")             # magic, index offset
+ENTRY = [("offset", "<u8"), ("cam", "u1"), ("timestamp", "<i8"), ("wallclock", "<i8")]
+JPEG_QUALITY = 90
+
+
+## ==========[ WRITER ]========== ##
+class TimelapseWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(b"PTLC", VERSION))
+        self.entries = []
+
+    # Append one encoded frame
+    def append(self, cam, data, timestamp_ns=None, wallclock_ns=None):
+        timestamp_ns = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        wallclock_ns = time.time_ns() if wallclock_ns is None else wallclock_ns
+        offset = self.file.tell()
+        self.file.write(FRAME.pack(b"FRAM", cam, timestamp_ns, wallclock_ns, len(data)))
+        self.file.write(data)
+        # Pushed to the OS per frame, so a crash loses at most the frame being written
+        self.file.flush()
+        self.entries.append((offset, cam, timestamp_ns, wallclock_ns))
+        return len(self.entries) - 1
+
+    # Encode an image (PIL image or RGB array) as JPEG and append it
+    def append_image(self, cam, image, timestamp_ns=None):
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(image)
+        buf = io.BytesIO()
+        image.convert("RGB").save(buf, "JPEG", quality=JPEG_QUALITY)
+        return self.append(cam, buf.getbuffer(), timestamp_ns)
+
+    def close(self):
+        index_offset = self.file.tell()
+        self.file.write(INDEX.pack(b"INDX", len(self.entries)))
+        self.file.write(np.array(self.entries, dtype=ENTRY).tobytes())
+        self.file.write(TRAILER.pack(b"TEND", index_offset))
+        self.file.close()
+
+
+## ==========[ READER ]========== ##
+class TimelapseReader:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = HEADER.unpack_from(self.map, 0)
+        if magic != b"PTLC":
+            raise ValueError(f"{path} is not a time-lapse container")
+        self.index = self.read_index()
+        if self.index is None:
+            self.index = self.scan()
+            self.recovered = True
+        else:
+            self.recovered = False
+
+    # Index from the trailer, or None if the file was never closed
+    def read_index(self):
+        if len(self.map) < HEADER.size + TRAILER.size:
+            return None
+        magic, index_offset = TRAILER.unpack_from(self.map, len(self.map) - TRAILER.size)
+        if magic != b"TEND":
+            return None
+        magic, count = INDEX.unpack_from(self.map, index_offset)
+        if magic != b"INDX":
+            return None
+        return np.frombuffer(self.map, dtype=ENTRY, count=count, offset=index_offset + INDEX.size)
+
+    # Rebuild the index by walking the frame headers, stopping at the first incomplete frame
+    def scan(self):
+        entries = []
+        offset = HEADER.size
+        while offset + FRAME.size <= len(self.map):
+            magic, cam, timestamp, wallclock, size = FRAME.unpack_from(self.map, offset)
+            if magic != b"FRAM" or offset + FRAME.size + size > len(self.map):
+                break
+            entries.append((offset, cam, timestamp, wallclock))
+            offset += FRAME.size + size
+        return np.array(entries, dtype=ENTRY)
+
+    def __len__(self):
+        return len(self.index)
+
+    # Encoded bytes of frame i, as a view into the map
+    def data(self, i):
+        offset = int(self.index[i]["offset"])
+        size = FRAME.unpack_from(self.map, offset)[4]
+        start = offset + FRAME.size
+        return memoryview(self.map)[start:start + size]
+
+    def image(self, i):
+        return Image.open(io.BytesIO(self.data(i)))
+
+    # Frame numbers, optionally of one camera and within [start, end)
+    def select(self, cam=None, start=0, end=None):
+        ids = np.arange(len(self.index))[start:end]
+        if cam is not None:
+            ids = ids[self.index["cam"][ids] == cam]
+        return ids
+
+    # Write frames out as individual JPEG files (the stored bytes, no re-encoding)
+    def export(self, outdir, cam=None, start=0, end=None):
+        os.makedirs(outdir, exist_ok=True)
+        ids = self.select(cam, start, end)
+        for i in ids:
+            stamp = time.strftime("%Y-%m-%d_%H-%M-%S", time.localtime(self.index[i]["wallclock"] / 1e9))
+            with open(os.path.join(outdir, f"cam{self.index[i]['cam']}_{i:06d}_{stamp}.jpg"), "wb") as f:
+                f.write(self.data(i))
+        return len(ids)
+
+    def close(self):
+        self.index = None
+        self.map.close()
+        self.file.close()
+
+
+## ==========[ MAIN ]========== ##
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export a time-lapse container")
+    parser.add_argument("command", choices=["info", "export"])
+    parser.add_argument("path")
+    parser.add_argument("--cam", type=int, default=None, help="Only frames from this camera")
+    parser.add_argument("--start", type=int, default=0, help="First frame number")
+    parser.add_argument("--end", type=int, default=None, help="Frame number to stop before")
+    parser.add_argument("--out", default="frames", help="Export directory")
+    args = parser.parse_args()
+
+    reader = TimelapseReader(args.path)
+    if args.command == "info":
+        print(f"[INFO] {args.path}: {len(reader)} frames, {os.path.getsize(args.path) / 2**20:.1f} MB"
+              + (" (recovered, no index)" if reader.recovered else ""))
+        for cam in np.unique(reader.index["cam"]):
+            stamps = reader.index["wallclock"][reader.index["cam"] == cam] / 1e9
+            print(f"\t[CAM {cam}] {len(stamps)} frames | "
+                  f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stamps[0]))} -> "
+                  f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stamps[-1]))}")
+    else:
+        count = reader.export(args.out, args.cam, args.start, args.end)
+        print(f"[FILE] Exported {count} frames to {args.out}")
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Voice activity detection on the chunk stream, to trim or split recordings
+
+    VadWriter sits between an AudioTask (PiCommon/runtime.py) and the WAV writer(s). Each chunk is cut into FRAME_MS
+    frames, and every frame is classed as speech or silence from its energy above an adaptive
+    noise floor and its zero-crossing rate (for quiet fricatives). The floor starts low, follows
+    the silent frames, and is raised to the quietest frames of the last FLOOR_WINDOW_MS when even
+    those are loud (a noisy room), so speech at the very start of a recording is still speech. Speech stays "on" for
+    HANGOVER_MS after the last speech frame, and PAD_MS of audio before an onset is kept.
+
+    Modes:
+        - "mark"  : everything is written, speech segments are only listed in the index
+        - "trim"  : only the speech segments (with padding) are written, silence is dropped
+        - "split" : every speech segment goes to its own file
+
+    close() writes a .segments.json index with the segment times in the original recording,
+    the fraction of audio kept and the processing real-time factor.
+"""
+
+## ==========[ MODULES ]========== ##
+import json
+import time
+from collections import deque
+from PiCommon.lazy import lazy
+
+np = lazy("numpy")
+
+
+## ==========[ CONSTANTS ]========== ##
+FRAME_MS = 20           # Analysis frame length
+THRESHOLD_DB = 12.0     # Frame energy above the noise floor that counts as speech
+ZCR_THRESHOLD = 0.25    # Zero crossings per sample of a fricative (needs half the energy margin)
+HANGOVER_MS = 300       # Speech is held this long after the last speech frame
+PAD_MS = 200            # Audio kept before a speech onset
+MIN_SPEECH_MS = 60      # Shorter bursts (clicks, the button) don't start a segment
+FLOOR_ADAPT = 0.05      # How fast the noise floor follows silent frames
+FLOOR_START_DB = 30.0   # Initial noise floor (frame energy in dB of int16 samples: a quiet room)
+FLOOR_WINDOW_MS = 1500  # The floor is raised when even the quietest frames of this window are loud...
+FLOOR_PERCENTILE = 10   # ...taking this percentile of their energies
+MODES = ("mark", "trim", "split")
+
+
+## ==========[ DETECTOR ]========== ##
+class VoiceDetector:
+    def __init__(self, rate, channels=1, frame_ms=FRAME_MS):
+        self.channels = channels
+        self.frame = int(rate * frame_ms / 1000)
+        self.floor = FLOOR_START_DB
+        self.recent = deque(maxlen=max(1, int(FLOOR_WINDOW_MS / frame_ms)))    # Energies of the latest frames
+        self.pending = np.zeros(0, dtype=np.int16)
+
+    # Split a chunk into whole frames (the rest is carried to the next chunk); returns (frames, speech flags)
+    def process(self, chunk):
+        data = np.frombuffer(chunk, dtype=np.int16) if not isinstance(chunk, np.ndarray) else chunk
+        buf = np.concatenate((self.pending, data)) if len(self.pending) else data
+        size = self.frame * self.channels
+        count = len(buf) // size
+        self.pending = buf[count * size:]
+        frames = buf[:count * size].reshape(count, size)
+        if count == 0:
+            return frames, np.zeros(0, dtype=bool)
+
+        mono = frames.reshape(count, self.frame, self.channels).mean(axis=2, dtype=np.float32)
+        energy = 10 * np.log10(np.mean(np.square(mono), axis=1) + 1.0)
+        signs = np.signbit(mono)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame
+
+        # Speech has pauses: if the quietest frames of the window are all well above the floor, it's the room
+        self.recent.extend(energy.tolist())
+        if len(self.recent) == self.recent.maxlen:
+            low = float(np.percentile(self.recent, FLOOR_PERCENTILE))
+            if low > self.floor + THRESHOLD_DB:
+                self.floor = low
+        # The floor only moves once per chunk, which is slow next to a 20 ms frame but fine for room noise
+        margin = energy - self.floor
+        speech = (margin > THRESHOLD_DB) | ((margin > THRESHOLD_DB / 2) & (zcr > ZCR_THRESHOLD))
+        quiet = energy[~speech]
+        if len(quiet):
+            self.floor += FLOOR_ADAPT * len(quiet) / count * (float(quiet.mean()) - self.floor)
+        self.floor = min(self.floor, float(energy.min()))
+        return frames, speech
+
+
+## ==========[ WRITER ]========== ##
+class VadWriter:
+    # open_writer(index) returns a writer; index 0 is the whole recording, 1.. are segments in "split" mode
+    def __init__(self, open_writer, rate, channels=1, mode="trim"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.open_writer = open_writer
+        self.rate = rate
+        self.channels = channels
+        self.mode = mode
+        self.detector = VoiceDetector(rate, channels)
+        frame_s = self.detector.frame / rate
+        self.hangover = int(HANGOVER_MS / 1000 / frame_s)
+        self.min_speech = max(1, int(MIN_SPEECH_MS / 1000 / frame_s))
+        self.pad = deque(maxlen=int(PAD_MS / 1000 / frame_s) + self.min_speech)
+
+        self.writers = [] if mode == "split" else [open_writer(0)]
+        self.segments = []      # [start, end] in frames of the original recording
+        self.frames = 0         # Frames seen
+        self.kept = 0           # Frames written
+        self.run = 0            # Consecutive speech frames (before an onset)
+        self.silent = 0         # Frames since the last speech frame (in a segment)
+        self.active = False
+        self.busy = 0.0
+
+    @property
+    def duration(self):
+        return self.kept * self.detector.frame / self.rate
+
+    def write(self, chunk):
+        started = time.perf_counter()
+        frames, speech = self.detector.process(chunk)
+        for frame, is_speech in zip(frames, speech):
+            self.step(frame, is_speech)
+        self.busy += time.perf_counter() - started
+
+    def step(self, frame, is_speech):
+        index = self.frames
+        self.frames += 1
+        if self.active:
+            self.emit(frame)
+            self.silent = 0 if is_speech else self.silent + 1
+            if self.silent > self.hangover:
+                self.end_segment(index + 1)
+            return
+
+        self.pad.append(frame)
+        self.run = self.run + 1 if is_speech else 0
+        if self.run >= self.min_speech:
+            # Onset: start the segment at the padding kept before it
+            start = index + 1 - len(self.pad)
+            self.active, self.silent, self.run = True, 0, 0
+            self.segments.append([start, None])
+            if self.mode == "split":
+                self.writers.append(self.open_writer(len(self.segments)))
+            for f in self.pad:
+                self.emit(f)
+            self.pad.clear()
+        elif self.mode == "mark" and len(self.pad) == self.pad.maxlen:
+            self.emit(self.pad.popleft())
+
+    def emit(self, frame):
+        self.writers[-1].write(frame)
+        self.kept += 1
+
+    def end_segment(self, end):
+        self.active = False
+        self.segments[-1][1] = end
+        if self.mode == "split":
+            self.writers[-1].close()
+
+    # Flush, close the writer(s) and write the segment index; returns the stats
+    def close(self, index_path=None):
+        if self.mode == "mark":
+            for f in self.pad:
+                self.emit(f)
+            self.pad.clear()
+        # Audio short of a frame is written as is in "mark" mode and while speech is on
+        rest = self.detector.pending
+        if len(rest) and (self.active or self.mode == "mark"):
+            self.writers[-1].write(rest)
+        if self.active:
+            self.end_segment(self.frames)
+        if self.mode != "split":
+            self.writers[0].close()
+
+        stats = self.stats()
+        if index_path is not None:
+            frame_s = self.detector.frame / self.rate
+            stats["segments"] = [{"start": round(s * frame_s, 3), "end": round(e * frame_s, 3)} for s, e in self.segments]
+            with open(index_path, "w") as f:
+                json.dump(stats, f, indent=2)
+        return stats
+
+    def stats(self):
+        frame_s = self.detector.frame / self.rate
+        seconds = self.frames * frame_s
+        speech = sum(e - s for s, e in self.segments if e is not None) * frame_s
+        return {
+            "mode": self.mode,
+            "duration": round(seconds, 3),
+            "speech": round(speech, 3),
+            "kept": round(self.kept / self.frames, 3) if self.frames else 0.0,
+            "rtf": round(self.busy / seconds, 5) if seconds else 0.0,
+            "count": len(self.segments),
+        }
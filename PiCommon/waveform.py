@@ -0,0 +1,115 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Waveform plots drawn from min / max / RMS envelopes instead of every sample
+
+    compute_peaks() reduces a recording to one (min, max, mean square) triple per PEAK_BUCKET
+    samples, block by block so memory stays flat for any length. The peaks are saved next to
+    the WAV (<name>.peaks.npz); a plot or a zoom aggregates them further to one value per pixel
+    column, so matplotlib draws O(width) points and the audio is only read once.
+"""
+
+## ==========[ MODULES ]========== ##
+import os
+
+from PiCommon.lazy import lazy
+from PiCommon.wavstream import read_samples
+
+np = lazy("numpy")
+
+
+## ==========[ CONSTANTS ]========== ##
+PEAK_BUCKET = 256           # Samples per stored peak (~6 ms at 44.1 kHz)
+BLOCK_BUCKETS = 4096        # Buckets reduced at a time
+COLORS = ['#cf4e53', '#5794a0', '#ddab3b', '#75a338', "#7c4cc5"]
+
+
+## ==========[ PEAKS ]========== ##
+# Per-bucket min, max and mean square of a sample array (or memmap)
+def compute_peaks(samples, rate, bucket=PEAK_BUCKET):
+    count = len(samples)
+    buckets = -(-count // bucket)
+    mins = np.zeros(buckets, dtype=np.int16)
+    maxs = np.zeros(buckets, dtype=np.int16)
+    ms = np.zeros(buckets, dtype=np.float32)
+    full = count // bucket
+    for b in range(0, full, BLOCK_BUCKETS):
+        e = min(b + BLOCK_BUCKETS, full)
+        block = np.asarray(samples[b * bucket:e * bucket]).reshape(e - b, bucket)
+        mins[b:e] = block.min(axis=1)
+        maxs[b:e] = block.max(axis=1)
+        ms[b:e] = np.square(block, dtype=np.float32).mean(axis=1)
+    if full < buckets:
+        tail = np.asarray(samples[full * bucket:])
+        mins[full], maxs[full] = tail.min(), tail.max()
+        ms[full] = np.square(tail, dtype=np.float32).mean()
+    return {"min": mins, "max": maxs, "ms": ms, "bucket": bucket, "rate": rate, "count": count}
+
+
+def peaks_path(wav_path):
+    return os.path.splitext(wav_path)[0] + ".peaks.npz"
+
+
+def save_peaks(path, peaks):
+    np.savez(path, **peaks)
+
+
+def load_peaks(path):
+    with np.load(path) as data:
+        return {k: data[k] if data[k].ndim else data[k].item() for k in data.files}
+
+
+# Peaks of a WAV from its peaks file, computed (and saved) if missing or older than the WAV
+def wav_peaks(wav_path, rate):
+    path = peaks_path(wav_path)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(wav_path):
+        return load_peaks(path)
+    peaks = compute_peaks(read_samples(wav_path), rate)
+    save_peaks(path, peaks)
+    return peaks
+
+
+# Aggregate peaks to `columns` values between samples [start, end): (x in seconds, min, max, rms)
+def envelope(peaks, columns, start=0, end=None):
+    bucket = peaks["bucket"]
+    end = peaks["count"] if end is None else min(end, peaks["count"])
+    if end <= start:
+        # Nothing to aggregate: an empty recording, or a range past its end
+        empty = np.zeros(0)
+        return empty, peaks["min"][:0], peaks["max"][:0], empty
+    b0, b1 = start // bucket, max(start // bucket + 1, -(-end // bucket))
+    columns = max(1, min(columns, b1 - b0))
+    edges = np.linspace(b0, b1, columns + 1).astype(np.int64)
+    idx = edges[:-1]
+    mins = np.minimum.reduceat(peaks["min"][:b1], idx)
+    maxs = np.maximum.reduceat(peaks["max"][:b1], idx)
+    rms = np.sqrt(np.add.reduceat(peaks["ms"][:b1].astype(np.float64), idx) / np.diff(edges))
+    x = idx * bucket / peaks["rate"]
+    return x, mins, maxs, rms
+
+
+## ==========[ PLOT ]========== ##
+# Draw the envelope of a recording to a PNG; start / end in seconds to zoom
+def render(peaks, title, suptitle, out_path, start=0.0, end=None, figsize=(12, 4), dpi=150, colors=COLORS):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    rate = peaks["rate"]
+    s0 = int(start * rate)
+    s1 = peaks["count"] if end is None else int(end * rate)
+    x, mins, maxs, rms = envelope(peaks, int(figsize[0] * dpi), s0, s1)
+
+    fig = plt.figure(figsize=figsize, dpi=dpi)
+    fig.suptitle(suptitle)
+    ax = fig.add_subplot(111)
+    ax.fill_between(x, mins, maxs, color=colors[2], linewidth=0, step="post")
+    ax.fill_between(x, -rms, rms, color=colors[1], alpha=0.6, linewidth=0, step="post")
+    ax.set_xlim([s0 / rate, s1 / rate])
+    ax.set_title(title, fontdict={"fontsize": 16, "color": colors[1]})
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("Amplitude")
+    plt.tight_layout()
+    plt.savefig(out_path)
+    plt.close(fig)
@@ -0,0 +1,110 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   WAV file written chunk by chunk while recording, in constant memory
+
+    The 44-byte PCM header is written up front and its data size is patched every SYNC_SECONDS
+    of audio, so at most that much audio is missing from the header if the recording is cut off.
+    Until close() the RIFF size holds the UNFINISHED marker; recover_wav() fixes up the header of
+    a file still carrying it from the file's actual length, and leaves every other WAV alone.
+"""
+
+## ==========[ MODULES ]========== ##
+import glob
+import os
+import struct
+from PiCommon.lazy import lazy
+
+np = lazy("numpy")
+
+
+## ==========[ CONSTANTS ]========== ##
+HEADER_SIZE = 44
+SYNC_SECONDS = 1.0      # Header sizes are patched (and the file flushed) this often
+UNFINISHED = 0xFFFFFFFF # RIFF size of a WAV that is still being written
+
+
+## ==========[ HELPERS ]========== ##
+def wav_header(channels, sampwidth, rate, data_size):
+    return struct.pack("<4sI4s4sIHHIIHH4sI",
+                       b"RIFF", 36 + data_size, b"WAVE",
+                       b"fmt ", 16, 1, channels, rate, rate * channels * sampwidth, channels * sampwidth, sampwidth * 8,
+                       b"data", data_size)
+
+
+# Patch the header sizes of a WAV that WavWriter never closed to match the file's length;
+# returns True if it was fixed
+def recover_wav(path):
+    size = os.path.getsize(path)
+    if size < HEADER_SIZE:
+        return False
+    with open(path, "r+b") as f:
+        header = f.read(HEADER_SIZE)
+        if (header[:4] != b"RIFF" or header[8:16] != b"WAVEfmt " or header[36:40] != b"data"
+                or struct.unpack_from("<I", header, 4)[0] != UNFINISHED):
+            return False
+        channels, = struct.unpack_from("<H", header, 22)
+        sampwidth = struct.unpack_from("<H", header, 34)[0] // 8
+        if channels * sampwidth == 0:
+            return False
+        # Drop a partial frame at the end
+        data_size = (size - HEADER_SIZE) // (channels * sampwidth) * (channels * sampwidth)
+        f.seek(4)
+        f.write(struct.pack("<I", 36 + data_size))
+        f.seek(40)
+        f.write(struct.pack("<I", data_size))
+        f.truncate(HEADER_SIZE + data_size)
+    return True
+
+
+# Recover every WAV in a directory; returns the files that were fixed
+def recover_dir(path):
+    return [f for f in sorted(glob.glob(os.path.join(path, "*.wav"))) if recover_wav(f)]
+
+
+# Samples of a 16-bit WAV written by WavWriter, memory-mapped rather than loaded
+def read_samples(path):
+    return np.memmap(path, dtype=np.int16, mode="r", offset=HEADER_SIZE)
+
+
+## ==========[ WRITER ]========== ##
+class WavWriter:
+    def __init__(self, path, channels, sampwidth, rate):
+        self.path = path
+        self.channels = channels
+        self.sampwidth = sampwidth
+        self.rate = rate
+        self.frames = 0
+        self.data_size = 0
+        self.synced = 0
+        self.file = open(path, "wb")
+        self.file.write(wav_header(channels, sampwidth, rate, 0))
+        self.sync()
+
+    @property
+    def duration(self):
+        return self.frames / self.rate
+
+    # Append a chunk (bytes or int16 array)
+    def write(self, chunk):
+        data = memoryview(chunk).cast("B")
+        self.file.write(data)
+        self.data_size += len(data)
+        self.frames = self.data_size // (self.channels * self.sampwidth)
+        if self.frames - self.synced >= SYNC_SECONDS * self.rate:
+            self.sync()
+
+    # Patch the header sizes and push everything to the OS (the RIFF size only once finished)
+    def sync(self, finished=False):
+        self.file.seek(4)
+        self.file.write(struct.pack("<I", 36 + self.data_size if finished else UNFINISHED))
+        self.file.seek(40)
+        self.file.write(struct.pack("<I", self.data_size))
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+        self.synced = self.frames
+
+    def close(self):
+        self.sync(finished=True)
+        self.file.close()
@@ -0,0 +1,129 @@
+"""
+    AUTHOR      :   Ayush Chinmay
+    DATE CREATED:   18 Oct 2026
+
+    DESCRIPTION :   Zero-shutter-lag buffer: a ring of the most recent full-resolution frames
+
+    A background thread copies every frame of the running stream into a preallocated ring,
+    tagged with its sensor timestamp. On a button press the frame closest to the press is
+    saved straight from the ring, so there is no mode switch and no wait for the next exposure.
+    SensorTimestamp is on the CLOCK_MONOTONIC timebase, so press times come from time.monotonic_ns().
+"""
+
+## ==========[ MODULES ]========== ##
+import threading
+import time
+
+from PiCommon import devices
+from PiCommon.lazy import lazy
+from PiCommon.stills import pool, save_atomic
+
+np = lazy("numpy")
+
+
+## ==========[ CONSTANTS ]========== ##
+ZSL_DEPTH = 6           # Frames kept per camera
+ZSL_MAX_MB = 256        # Memory cap per camera; the depth is reduced to fit
+
+
+## ==========[ ZSL BUFFER ]========== ##
+class ZslBuffer:
+    def __init__(self, cam, stream="main", depth=ZSL_DEPTH, max_mb=ZSL_MAX_MB):
+        self.cam = cam
+        self.stream = stream
+        self.depth = depth
+        self.max_bytes = max_mb * 2**20
+        self.frames = None                  # Allocated on the first frame, once its shape is known
+        self.stamps = None
+        self.pinned = set()                 # Slots being saved; the writer skips them
+        self.next = 0
+        self.lock = threading.Lock()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def allocate(self, array):
+        # Fit as many frames as the memory cap allows, but always keep at least two
+        self.depth = max(2, min(self.depth, self.max_bytes // array.nbytes))
+        self.frames = np.empty((self.depth,) + array.shape, dtype=array.dtype)
+        self.stamps = np.full(self.depth, -1, dtype=np.int64)
+        print(f"[INFO] ZSL Buffer: {self.depth} frames x {array.nbytes / 2**20:.1f} MB = {self.frames.nbytes / 2**20:.0f} MB")
+
+    # Oldest slot that isn't being saved, marked invalid until it is filled
+    def claim_slot(self):
+        with self.lock:
+            for i in range(self.depth):
+                slot = (self.next + i) % self.depth
+                if slot not in self.pinned:
+                    self.stamps[slot] = -1
+                    self.next = (slot + 1) % self.depth
+                    return slot
+        return None
+
+    def run(self):
+        while self.running:
+            request = self.cam.capture_request()
+            try:
+                stamp = request.get_metadata().get("SensorTimestamp") or time.monotonic_ns()
+                with devices.MappedArray(request, self.stream) as m:
+                    if self.frames is None:
+                        self.allocate(m.array)
+                    slot = self.claim_slot()
+                    if slot is None:
+                        continue
+                    self.frames[slot][...] = m.array
+            finally:
+                request.release()
+            with self.lock:
+                self.stamps[slot] = stamp
+
+    # Pin the slot whose timestamp is closest to t_ns; returns (slot, timestamp) or None when empty
+    def pin_closest(self, t_ns):
+        with self.lock:
+            if self.stamps is None:
+                return None
+            valid = np.flatnonzero(self.stamps >= 0)
+            if len(valid) == 0:
+                return None
+            slot = int(valid[np.argmin(np.abs(self.stamps[valid] - t_ns))])
+            self.pinned.add(slot)
+            return slot, int(self.stamps[slot])
+
+    def unpin(self, slot):
+        with self.lock:
+            self.pinned.discard(slot)
+
+    # Save the frame closest to t_ns (through the writer if there is one); returns a record like
+    # PiCommon.stills.capture_still()
+    def save_closest(self, camnum, fname, t_ns, writer=None):
+        record = {"cam": camnum, "file": fname, "requested_ns": t_ns}
+        picked = self.pin_closest(t_ns)
+        if picked is None:
+            record["error"] = "ZSL buffer is empty"
+        else:
+            slot, stamp = picked
+            try:
+                # XBGR8888 arrays are laid out R, G, B, X
+                if writer is not None:
+                    # The slot is only pinned for the copy, the writer encodes in the background
+                    writer.submit(np.ascontiguousarray(self.frames[slot][..., :3]), fname)
+                else:
+                    save_atomic(self.frames[slot][..., :3], fname)
+            finally:
+                self.unpin(slot)
+            record["sensor_timestamp_ns"] = stamp
+            record["offset_ms"] = (stamp - t_ns) / 1e6
+        record["done_ns"] = time.monotonic_ns()
+        record["latency_ms"] = (record["done_ns"] - t_ns) / 1e6
+        return record
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1)
+
+
+## ==========[ FUNCTIONS ]========== ##
+# Save the frame closest to t_ns from every buffer in {camnum: ZslBuffer} at once
+def capture_zsl(buffers, t_ns, fnames, writer=None):
+    futures = [pool.submit(buf.save_closest, camnum, fnames[camnum], t_ns, writer) for camnum, buf in buffers.items()]
+    return [f.result() for f in futures]
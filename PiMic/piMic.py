@@ -17,144 +17,211 @@
             - [X] Stop Recording on button release
             - [X] Save Audio to a file
 			- [X] Plot Audio Data
+		* [18 Oct 2026]
+			- [X] Stream chunks straight into the WAV file while recording (constant memory)
+			- [X] Recover the header of recordings that were cut off
+			- [X] Callback-driven capture into a ring buffer, with overflow / overrun / latency metrics
+			- [X] Keep the input stream open, and start each recording PREROLL seconds before the press
+			- [X] Plot the waveform from min / max / RMS envelopes, cached as a peaks file next to the WAV
+			- [X] Compute levels, clipping and a spectrogram while recording (features file + spectrogram plot)
+			- [X] Voice activity detection while recording: mark, trim or split out the silent spans
+			- [X] Button edges and audio chunks handled as events on an asyncio loop (PiCommon/runtime.py)
+			- [X] Every recording added to the SQLite capture catalog (PiCommon/catalog.py)
+			- [X] Recordings queued on disk for upload to UPLOAD_URL by async workers (PiCommon/offload.py)
+			- [X] Opens the microphone and button in serve() instead of at import; devices come from PiCommon/devices.py (PI_DEVICES=sim for simulated ones)
+			- [X] Mic and button start at the same time, with a start-up timing report
 
     ! TODO !
-            - [ ] Send Audio to an API for processing
+            - [X] Send Audio to an API for processing
             - [ ] Receive API response and display it on the screen
 """
 
 ## ==========[ MODULES ]========== ##
 import os
-from gpiozero import Button
-from time import sleep, strftime
-from pyaudio import PyAudio, paInt16
-import wave
-import numpy as np
-import matplotlib
-import matplotlib.pyplot as plt
-matplotlib.use('Agg')
+import sys
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PiCommon import devices
+from PiCommon.wavstream import WavWriter, recover_dir
+from PiCommon.waveform import wav_peaks, render
+from PiCommon.micstream import MicCapture
+from PiCommon.features import FeatureAnalyzer
+from PiCommon.vad import VadWriter
+from PiCommon import runtime
+from PiCommon.catalog import Catalog
+from PiCommon.offload import JobQueue, Uploader
+from PiCommon.stills import unique_stamp
 
 
 ## ==========[ CONSTANTS ]========== ##
 # Path to save recordings
 PATH = "/home/ayush-pi/Documents/PyCode/PiMic/"
 
-try:
-    os.makedirs(PATH+"/Recordings/")
-    os.makedirs(PATH+"/Waveforms/")
-except:
-    pass
-
 # Colors for plotting
 colors = ['#cf4e53', '#5794a0','#ddab3b', '#75a338', "#7c4cc5"]
 
 # Button
 BUTTON_PIN = 26
-button = Button(BUTTON_PIN)
+button = None
 
-# Initialize PyAudio
-mic = PyAudio()
-DEVICE = int(mic.get_default_input_device_info()['index'])
-SAMPLE_RATE = int(mic.get_device_info_by_index(DEVICE)['defaultSampleRate'])
+# Microphone (opened by start_microphone())
+mic = None
+DEVICE = None
+SAMPLE_RATE = None
 CHANNELS = 1    # int(mic.get_device_info_by_index(DEVICE)['maxInputChannels'])
 CHUNK = 4096
-FORMAT = paInt16
+FORMAT = None   # paInt16, set by start_microphone()
+PREROLL = 0.5   # Seconds of audio from before the press kept at the start of a recording
+SPECTROGRAM = True  # Also save a spectrogram plot of each recording
+CATALOG = "/home/ayush-pi/Documents/PyCode/catalog.db"	# Capture catalog shared by the scripts
+UPLOAD_URL = None	# API the recordings are sent to (None = no uploads)
+UPLOAD_QUEUE = "/home/ayush-pi/Documents/PyCode/uploads.db"	# Upload jobs, kept across restarts
+VAD_MODE = None     # None: keep everything | "mark": index the speech | "trim": drop silence | "split": a file per speech segment
 
-frames = None
 stream = None
-info = True
+catalog = None
+uploads = None
 
 ## ==========[ FUNCTIONS ]========== ##
 # Show available devices
 def show_devices():
-	p = PyAudio()
+	p = devices.PyAudio()
 	for i in range(p.get_device_count()):
 		dev = p.get_device_info_by_index(i)
 		print((i,dev['name'],dev['maxInputChannels']))
 	print(p.get_default_input_device_info())
 # (0, 'USB PnP Sound Device: Audio (hw:0,0)', 1)
 
-# Record Audio
-def record():
-	global frames, stream, info
-	# Initialize PyAudio
-	fname = strftime("%Y-%m-%d_%H-%M-%S")
-	stream = mic.open(format = paInt16, channels = CHANNELS, rate = SAMPLE_RATE, input_device_index = DEVICE, input = True)
-	sleep(0.00868)
+# Initialize PyAudio and pick the default input device
+def start_microphone():
+	global mic, DEVICE, SAMPLE_RATE, FORMAT
+	FORMAT = devices.paInt16
+	mic = devices.PyAudio()
+	DEVICE = int(mic.get_default_input_device_info()['index'])
+	SAMPLE_RATE = int(mic.get_device_info_by_index(DEVICE)['defaultSampleRate'])
+	return mic
+
+# Record Audio until the button is released (chunks are written to the WAV file as they arrive)
+async def record(rt, edges):
+	fname = unique_stamp()
+	names = []
+	# Index 0 is the whole recording, 1.. are speech segments in "split" mode
+	def open_wav(index):
+		names.append(fname if index == 0 else f"{fname}_{index:02d}")
+		return WavWriter(PATH + f"Recordings/{names[-1]}.wav", CHANNELS, mic.get_sample_size(FORMAT), SAMPLE_RATE)
+	frames = VadWriter(open_wav, SAMPLE_RATE, CHANNELS, VAD_MODE) if VAD_MODE else open_wav(0)
+	# Features are computed from the same chunks, as they arrive
+	features = FeatureAnalyzer(SAMPLE_RATE, CHANNELS)
+	# The stream is always running; the recording starts PREROLL seconds back in its ring
+	pressed = stream.written
+	start = stream.preroll_start(PREROLL)
 
 	# Get Audio Data
 	print("[INFO] Recording Started")
-	frames = []
-	while button.is_pressed:
-		print("*", end="", flush=True)
-		# frames.append(stream.read(CHUNK, exception_on_overflow=False))
-		frames.append(np.frombuffer(stream.read(CHUNK, exception_on_overflow=False), dtype=np.int16))
-		sleep(0.00868)
-	frames = np.hstack(frames)
-	# Stop Recording
-	stream.stop_stream()
-	print()
-	print("[INFO] Recording Stopped")
-	print(f"\t[INFO] Recording Duration: {len(frames)/SAMPLE_RATE:.2f} seconds")
-	# Save Recording
-	save(fname, frames)
-	plot(fname, frames)
-	frames = None
-	info = True
+	audio = rt.record(stream, [frames, features], start)
+	try:
+		await edges.released()
+	finally:
+		# Stop Recording (on Ctrl+C too, so the files are always closed)
+		await audio.stop()
+		await rt.blocking(finish, fname, names, frames, features, pressed - start)
 
 
-# Save Recording
-def save(fname, frames):
+# Close the recording and save its plots and features
+def finish(fname, names, frames, features, preroll):
+	vad = frames.close(PATH + f"Recordings/{fname}.segments.json") if VAD_MODE else frames.close()
+	print()
+	print("[INFO] Recording Stopped")
+	print(f"\t[INFO] Recording Duration: {frames.duration:.2f} seconds (pre-roll {preroll / CHANNELS / SAMPLE_RATE:.2f} s)")
+	print(f"\t[INFO] Capture: {stream.stats()}")
+	if vad is not None:
+		print(f"\t[INFO] Speech: {vad['count']} segment(s) | {vad['speech']:.2f} of {vad['duration']:.2f} s | kept {vad['kept']:.0%} | RTF {vad['rtf']:.4f}")
 	# Save Recording
-	print(f"[INFO] Saving Audio...")
-	with wave.open(PATH + f"Recordings/{fname}.wav", "wb") as f:
-		f.setnchannels(CHANNELS)
-		f.setsampwidth(mic.get_sample_size(paInt16))
-		f.setframerate(SAMPLE_RATE)
-		f.writeframes(frames)
+	for name, wav in zip(names, frames.writers if VAD_MODE else [frames]):
+		save(name)
+		if wav.duration:
+			plot(name)
+		catalog.add_recording(PATH + f"Recordings/{name}.wav", wav.duration, session=fname if len(names) > 1 else None, source="piMic")
+		if uploads is not None and wav.duration:
+			uploads.put("recording", PATH + f"Recordings/{name}.wav", {"duration": wav.duration, "source": "piMic"})
+	save_features(fname, features)
+
+
+# Report the saved Recording
+def save(fname):
 	print(f"[FILE] Audio saved to {PATH}Recordings/{fname}")
 	print(f"\t[INFO] File Size: {os.path.getsize(PATH+'Recordings/'+fname+'.wav')/1024:.2f} KB")
 
 
-# Plot Audio Data
-def plot(fname, frames):
-	# Plot Audio Data
-	fig = plt.figure(figsize=(12, 4), dpi=150)
-	fig.suptitle("CHUNK = 4096 | SAMPLE_RATE = 44100 Hz")
-	ax = fig.add_subplot(111)
-	ax.plot(frames, color=colors[2])
-	ax.set_xlim([0, len(frames)])
-	ax.set_title(f"Waveform: {fname}.wav", fontdict={"fontsize": 16, "color": colors[1]})
-	ax.set_xlabel("Bit")
-	ax.set_ylabel("Amplitude")
-	plt.tight_layout()
-	plt.savefig(PATH + f"Waveforms/{fname}.png")
+# Plot Audio Data (envelope per pixel column, from the peaks file next to the WAV)
+def plot(fname, start=0.0, end=None):
+	peaks = wav_peaks(PATH + f"Recordings/{fname}.wav", SAMPLE_RATE)
+	render(peaks, f"Waveform: {fname}.wav", f"CHUNK = {CHUNK} | SAMPLE_RATE = {SAMPLE_RATE} Hz",
+		PATH + f"Waveforms/{fname}.png", start, end, colors=colors)
 	print(f"[FILE] Waveform Plot saved to {PATH}Waveforms/{fname}.png")
-	# plt.show()
+
+
+# Save the features computed while recording (and the spectrogram plot)
+def save_features(fname, features):
+	png = PATH + f"Waveforms/{fname}_spectrogram.png" if SPECTROGRAM else None
+	summary = features.close(PATH + f"Recordings/{fname}.features.npz", png, f"Spectrogram: {fname}.wav")
+	if summary["duration"]:
+		print(f"\t[INFO] Levels: RMS {summary['rms_dbfs']:.1f} dBFS | Peak {summary['peak_dbfs']:.1f} dBFS | Clipped samples: {summary['clipped']}")
+	print(f"[FILE] Features saved to {PATH}Recordings/{fname}.features.npz")
+	if png is not None:
+		print(f"[FILE] Spectrogram Plot saved to {png}")
 
 
 ## ==========[ MAIN ]========== ##
-def main():
-	global info, frames, stream
+async def serve(rt):
+	global stream, catalog, uploads, button
+	# Create Directories if they don't exist
+	os.makedirs(PATH + "Recordings/", exist_ok=True)
+	os.makedirs(PATH + "Waveforms/", exist_ok=True)
+	# Start the Microphone and Button, and recover interrupted recordings, at the same time
+	startup = rt.startup
+	_, button, recovered = await asyncio.gather(
+		startup.phase("mic", rt.blocking(start_microphone)),
+		startup.phase("button", rt.blocking(devices.Button, BUTTON_PIN)),
+		startup.phase("recover", rt.blocking(recover_dir, PATH + "Recordings/")))
 	# show_devices()
-	button.when_pressed = record
+	for f in recovered:
+		print(f"[INFO] Recovered interrupted recording: {f}")
+	# Open the input stream once; it keeps the pre-roll ring filled between recordings
+	stream = await startup.phase("stream", rt.blocking(MicCapture, mic, DEVICE, SAMPLE_RATE, CHANNELS, CHUNK))
+	stream.start()
+	catalog = Catalog(CATALOG)
+	if UPLOAD_URL:
+		uploads = JobQueue(UPLOAD_QUEUE)
+		uploader = asyncio.create_task(Uploader(uploads, UPLOAD_URL).run())
+	edges = rt.button(button)
+	startup.report()
 	try:
 		while True:
-			sleep(0.5)
-			if frames is None and info:
-				info = False
-				print("\n\n[READY] Press Button to Start Recording | [CTRL+C] to Exit")
-
-	except KeyboardInterrupt:
-		print("Exiting")
-		if stream is not None:
-			stream.stop_stream()
-			stream.close()
-			print("[INFO] Stream Closed")
+			print("\n\n[READY] Press Button to Start Recording | [CTRL+C] to Exit")
+			await edges.pressed()
+			await record(rt, edges)
+	finally:
+		edges.close()
+		if uploads is not None:
+			uploader.cancel()
+			await asyncio.gather(uploader, return_exceptions=True)
+		await rt.drain()
+		stream.stop()
+		stream.close()
+		print("[INFO] Stream Closed")
+		catalog.close()
+		if uploads is not None:
+			uploads.close()
 		mic.terminate()
 		print("[INFO] Mic Terminated")
 
 
+def main():
+	runtime.run(serve)
+
+
 ## ==========[ DRIVER ]========== ##
 if __name__ == "__main__":
 	main()
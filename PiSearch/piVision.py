@@ -18,6 +18,22 @@
 			- [-] Record Audio on button press
 			- [-] Stop Recording on button release
 			- [-] Save Image and Audio to a file
+		* [18 Oct 2026]
+			- [X] Zero-shutter-lag mode: save the frame closest to the press from a ring of recent frames
+			- [X] Encode and write stills on background threads, atomically, with millisecond file names
+			- [X] Burst mode: BURST_COUNT frames per press at BURST_FPS
+			- [X] Stream audio chunks straight into the WAV file while recording (constant memory)
+			- [X] Callback-driven audio capture into a ring buffer, with overflow / overrun / latency metrics
+			- [X] Keep the input stream open, and start each recording PREROLL seconds before the press
+			- [X] Voice activity detection while recording: mark, trim or split out the silent spans
+			- [X] Start audio on the press, capture both stills concurrently, join on release
+			- [X] Session timeline (offsets from the press) with the press-to-audio-start latency
+			- [X] Button edges and audio chunks handled as events on an asyncio loop (PiCommon/runtime.py)
+			- [X] Every session, still and recording added to the SQLite capture catalog (PiCommon/catalog.py)
+			- [X] Session files queued on disk for upload to UPLOAD_URL by async workers (PiCommon/offload.py)
+			- [X] Devices come from PiCommon/devices.py (PI_DEVICES=sim for simulated ones); nothing is opened at import
+			- [X] Both cameras, the mic and the button start at the same time, with a start-up timing report
+			- [X] Cameras served by a running frame bus are read through it instead of opened again (PiCommon/framebus.py)
 
 	! TODO !
 			- [ ] Add speech transcription API
@@ -28,24 +44,33 @@
 
 ## ==========[ MODULES ]========== ##
 import os
-from gpiozero import Button
-from time import sleep, strftime
-from picamera2 import Picamera2, Preview
-from pyaudio import PyAudio, paInt16
-import wave
-import numpy as np
+import sys
+import json
+import asyncio
+from time import monotonic_ns
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PiCommon import devices, profiles
+from PiCommon.stills import StillWriter, capture_stills, capture_bursts, unique_stamp, write_record
+from PiCommon.zsl import ZslBuffer, capture_zsl
+from PiCommon.wavstream import WavWriter, recover_dir
+from PiCommon.micstream import MicCapture
+from PiCommon.vad import VadWriter
+from PiCommon import runtime
+from PiCommon.catalog import Catalog, wall_time
+from PiCommon.offload import JobQueue, Uploader
+from PiCommon.lazy import lazy
+
+framebus = lazy("PiCommon.framebus")
 
 ## Constants
 PATH = "/home/ayush-pi/Documents/PyCode/PiSearch/"  # Directory Path
 STILLS = PATH + "Stills/"
 RECORDINGS = PATH + "Recordings/"
-
-# Create Directory if it doesn't exist
-try:
-	os.makedirs(STILLS)
-	os.makedirs(RECORDINGS)
-except:
-	pass
+SESSIONS = PATH + "Sessions/"
+CATALOG = "/home/ayush-pi/Documents/PyCode/catalog.db"	# Capture catalog shared by the scripts
+UPLOAD_URL = None	# API the session files are sent to (None = no uploads)
+UPLOAD_QUEUE = "/home/ayush-pi/Documents/PyCode/uploads.db"	# Upload jobs, kept across restarts
 
 ## ==========[ CONFIGURATION ]========== ##
 ## Buttons
@@ -59,12 +84,17 @@ colors = ['#cf4e53', '#5794a0','#ddab3b', '#75a338', "#7c4cc5"]
 # Camera
 PREV_WIDTH = 820			# Preview Width
 PREV_HEIGHT = 616			# Preview Height
+CAPTURE_MODE = "switch"		# "switch": still mode per press | "zsl": frame closest to the press
+ZSL_DEPTH = 6				# Frames kept per camera in "zsl" mode
+ZSL_MAX_MB = 256			# Memory cap per camera in "zsl" mode
+BURST_COUNT = 1				# Frames per press (1 = single still)
+BURST_FPS = 5				# Frame rate of a burst
+SHOW_CONFIG = False			# Print each camera's full configuration when it starts
+STREAM_PROFILE = None			# Stream buffers (PiCommon/profiles.py); None picks one for the mode
+FRAME_BUS = True			# Read the cameras a running frame bus serves through it
 
 ## Configuration
-main_config={'size': (3280, 2464), 'format': 'XBGR8888'}
-lores = {'size': (1640, 1232), 'format': 'XBGR8888'}
-preview_config = None
-capture_config = None
+capture_configs = {}
 
 ## Controls
 control0 = {'AwbEnable': False, 'ColourGains': (0.9, 0.8), 'AeEnable': True, 'NoiseReductionMode': 2}
@@ -73,6 +103,10 @@ control1 = {'AwbEnable': True, 'AeEnable': True, 'NoiseReductionMode': 2}
 ## Cameras
 cam0 = None
 cam1 = None
+zsl = {}
+writer = None
+catalog = None
+uploads = None
 
 ## ==========[ MICROPHONE CONFIGURATION ]========== ##
 # Microphone
@@ -81,28 +115,25 @@ DEVICE = None
 SAMPLE_RATE = None
 CHANNELS = 1    # int(mic.get_device_info_by_index(DEVICE)['maxInputChannels'])
 CHUNK = 4096
-FORMAT = paInt16
+FORMAT = None   # paInt16, set by start_microphone()
+PREROLL = 0.5   # Seconds of audio from before the press kept at the start of a recording
+VAD_MODE = None     # None: keep everything | "mark": index the speech | "trim": drop silence | "split": a file per speech segment
 
-# Frames
-frames = None
+# Stream
 stream = None
-info = True
 
 ## ==========[ HELPERS ]========== ##
-# Do Nothing
-def do_nothing():
-	sleep(3)
-
 # Print Camera Info
 def print_cam_info(data):
-	print("    {")
-	for key in data:
-		print(f"\t{key}: {data[key]}")
-	print("    }")
+	print(format_info(data))
+
+# Camera Info as one block of text (printed in one go, so concurrent start-ups don't interleave)
+def format_info(data):
+	return "    {\n" + "".join(f"\t{key}: {data[key]}\n" for key in data) + "    }"
 	
 # Show available devices
 def show_audio_devices():
-	p = PyAudio()
+	p = devices.PyAudio()
 	for i in range(p.get_device_count()):
 		dev = p.get_device_info_by_index(i)
 		print((i,dev['name'],dev['maxInputChannels']))
@@ -110,30 +141,43 @@ def show_audio_devices():
 # (0, 'USB PnP Sound Device: Audio (hw:0,0)', 1)
 	
 ## ==========[ CAMERA FUNCTIONS ]========== ##
+# Stream profile for the mode: only the streams and buffer sizes it reads
+def stream_profile(preview):
+	if STREAM_PROFILE:
+		return STREAM_PROFILE
+	if CAPTURE_MODE == "zsl":
+		return "zsl"
+	return "preview" if preview else "headless"
+
+
 # Start Camera function
 def start_camera(camnum, controls, preview=True):
-	global preview_config, capture_config
-
+	# The frame bus already owns this camera: stills and frames come through it, with its mode and controls
+	if FRAME_BUS and camnum in framebus.cameras():
+		cam = framebus.BusCamera(camnum, f"piVision cam{camnum}")
+		capture_configs[camnum] = cam.create_still_configuration()
+		print(f"[INFO] Camera {camnum} on the Frame Bus")
+		return cam
 	print(f"[INFO] Starting Camera {camnum}")
 	# Initialize Camera
-	cam = Picamera2(camera_num=camnum)
+	cam = devices.Picamera2(camera_num=camnum)
 	# Create Config
-	preview_config = cam.create_preview_configuration(main=main_config, lores=lores, display="lores")
+	profile = stream_profile(preview)
+	preview_config = profiles.preview_config(cam, profile)
 	cam.configure(preview_config)
-	capture_config = cam.create_still_configuration()
+	capture_configs[camnum] = cam.create_still_configuration()
 	# Set Controls
 	cam.set_controls(controls)
 	# Start Preview
 	if preview: # If Preview is True, show the preview, else start preview with NULL
-		cam.start_preview(Preview.QTGL, x=10, width=PREV_WIDTH, height=PREV_HEIGHT)
+		cam.start_preview(devices.Preview.QTGL, x=10, width=PREV_WIDTH, height=PREV_HEIGHT)
 	else:
-		cam.start_preview(Preview.NULL)
+		cam.start_preview(devices.Preview.NULL)
 	cam.start()
-	print(f"\n[CAM {camnum}]")
-	print("    Config: ")
-	print_cam_info(preview_config)
-	print("    Controls: ")
-	print_cam_info(controls)
+	if SHOW_CONFIG:
+		print(f"\n[CAM {camnum}]\n    Config: \n{format_info(preview_config)}\n    Controls: \n{format_info(controls)}")
+	else:
+		print(f"[INFO] Camera {camnum} Started: {profiles.describe(profile)}")
 	return cam
 
 
@@ -143,74 +187,112 @@ def stop_camera(cam):
 	print("[INFO] Camera Stopped")
 	
 
-# Take Picture function
-def take_picture():
+# Take Picture function: both cameras at once (files are encoded and written in the background); returns the records
+def take_picture(pressed_ns=None):
+	if BURST_COUNT > 1:
+		return take_burst()
+	if CAPTURE_MODE == "zsl":
+		return take_picture_zsl(pressed_ns)
 	print("[INFO] Taking Picture...")
-	sleep(0.2)
-	fname = f"image_{strftime('%Y-%m-%d_%H-%M-%S')}.jpg"
-	print("[INFO] Switching to Capture Mode: ")
-	if cam0 is not None:
-		cam0.switch_mode_and_capture_file(capture_config, STILLS+"cam0_"+fname)
-		print(f"[FILE] Image saved to {STILLS}cam0_{fname}")
-	else:
-		print("[ERROR] Camera 0 not found")
-
-	if cam1 is not None:
-		cam1.switch_mode_and_capture_file(capture_config, STILLS+"cam1_"+fname)
-		print(f"[FILE] Image saved to {STILLS}cam1_{fname}")
-	else:
-		print("[ERROR] Camera 1 not found")
-	print_cam_info(capture_config)
-	
+	fname = f"image_{unique_stamp()}"
+	cams = {n: cam for n, cam in ((0, cam0), (1, cam1)) if cam is not None}
+	for n in set((0, 1)) - set(cams):
+		print(f"[ERROR] Camera {n} not found")
+	records = capture_stills(cams, capture_configs, {n: f"{STILLS}cam{n}_{fname}.jpg" for n in cams}, writer)
+	for r in records:
+		if "error" in r:
+			print(f"[ERROR] Camera {r['cam']}: {r['error']}")
+		else:
+			print(f"[INFO] Camera {r['cam']} Captured ({r['latency_ms']:.1f} ms)")
+	write_record(f"{STILLS}{fname}.json", records)
+	return records
+
+
+# Take Picture function, zero shutter lag: saves the frames closest to the button press from the ZSL buffers
+def take_picture_zsl(pressed_ns=None):
+	print("[INFO] Taking Picture...")
+	fname = f"image_{unique_stamp()}"
+	records = capture_zsl(zsl, pressed_ns or monotonic_ns(), {n: f"{STILLS}cam{n}_{fname}.jpg" for n in zsl}, writer)
+	# Cameras on the frame bus have no ZSL buffer; the bus takes their stills
+	others = {n: cam for n, cam in ((0, cam0), (1, cam1)) if cam is not None and n not in zsl}
+	records += capture_stills(others, capture_configs, {n: f"{STILLS}cam{n}_{fname}.jpg" for n in others}, writer)
+	for r in records:
+		if "error" in r:
+			print(f"[ERROR] Camera {r['cam']}: {r['error']}")
+		elif "offset_ms" in r:
+			print(f"[INFO] Camera {r['cam']} Captured (frame {r['offset_ms']:+.1f} ms from press)")
+		else:
+			print(f"[INFO] Camera {r['cam']} Captured ({r['latency_ms']:.1f} ms)")
+	write_record(f"{STILLS}{fname}.json", records)
+	return records
+
+
+# Take a burst of BURST_COUNT frames from each camera (from the running stream in "zsl" mode)
+def take_burst():
+	print(f"[INFO] Taking Burst: {BURST_COUNT} frames at {BURST_FPS} fps")
+	fname = f"burst_{unique_stamp()}"
+	cams = {n: cam for n, cam in ((0, cam0), (1, cam1)) if cam is not None}
+	configs = None if CAPTURE_MODE == "zsl" else capture_configs
+	records = capture_bursts(cams, configs, BURST_COUNT, BURST_FPS, {n: f"{STILLS}cam{n}_{fname}" for n in cams}, writer)
+	write_record(f"{STILLS}{fname}.json", records)
+	return records
 
 
 ## ==========[ AUDIO FUNCTIONS ]========== ##
 # Initialize Mic
 def start_microphone():
-	global DEVICE, SAMPLE_RATE
-	mic = PyAudio()
+	global DEVICE, SAMPLE_RATE, FORMAT
+	FORMAT = devices.paInt16
+	mic = devices.PyAudio()
 	DEVICE = int(mic.get_default_input_device_info()['index'])
 	SAMPLE_RATE = int(mic.get_device_info_by_index(DEVICE)['defaultSampleRate'])
 	return mic
 
 
-# Record Audio
-def record_audio():
-	global frames, stream, info
-	# Initialize PyAudio
-	fname = strftime("%Y-%m-%d_%H-%M-%S")
-	stream = mic.open(format = paInt16, channels = CHANNELS, rate = SAMPLE_RATE, input_device_index = DEVICE, input = True)
-	sleep(0.00868)
-
-	# Get Audio Data
-	print("[INFO] Recording Started")
-	frames = []
-	while button.is_pressed:
-		print("*", end="", flush=True)
-		# frames.append(stream.read(CHUNK, exception_on_overflow=False))
-		frames.append(np.frombuffer(stream.read(CHUNK, exception_on_overflow=False), dtype=np.int16))
-		sleep(0.00868)
-	frames = np.hstack(frames)
-	# Stop Recording
-	stream.stop_stream()
+# Start recording right away (chunks are written to the WAV file as they arrive); returns what stop_audio() needs
+def start_audio(rt, fname):
+	names = []
+	# Index 0 is the whole recording, 1.. are speech segments in "split" mode
+	def open_wav(index):
+		names.append(fname if index == 0 else f"{fname}_{index:02d}")
+		return WavWriter(RECORDINGS + f"{names[-1]}.wav", CHANNELS, mic.get_sample_size(FORMAT), SAMPLE_RATE)
+	frames = VadWriter(open_wav, SAMPLE_RATE, CHANNELS, VAD_MODE) if VAD_MODE else open_wav(0)
+	# The stream is always running; the recording starts PREROLL seconds back in its ring
+	pressed = stream.written
+	start = stream.preroll_start(PREROLL)
+	task = rt.record(stream, [frames], start)
+	return {"fname": fname, "names": names, "frames": frames, "task": task, "pressed": pressed, "start": start}
+
+
+# Stop the recording started by start_audio(); returns its part of the session record
+async def stop_audio(rt, audio):
+	await audio["task"].stop()
+	return await rt.blocking(finish_audio, audio)
+
+
+# Close the recording and report it
+def finish_audio(audio):
+	fname, names, frames, pressed, start = audio["fname"], audio["names"], audio["frames"], audio["pressed"], audio["start"]
+	vad = frames.close(RECORDINGS + f"{fname}.segments.json") if VAD_MODE else frames.close()
 	print()
 	print("[INFO] Recording Stopped")
-	print(f"\t[INFO] Recording Duration: {len(frames)/SAMPLE_RATE:.2f} seconds")
+	print(f"\t[INFO] Recording Duration: {frames.duration:.2f} seconds (pre-roll {(pressed - start) / CHANNELS / SAMPLE_RATE:.2f} s)")
+	print(f"\t[INFO] Capture: {stream.stats()}")
+	if vad is not None:
+		print(f"\t[INFO] Speech: {vad['count']} segment(s) | {vad['speech']:.2f} of {vad['duration']:.2f} s | kept {vad['kept']:.0%} | RTF {vad['rtf']:.4f}")
 	# Save Recording
-	save_audio(fname, frames)
-	frames = None
-	info = True
+	for name in names:
+		save_audio(name)
+	record = {"files": [f"{RECORDINGS}{name}.wav" for name in names], "duration": frames.duration,
+			  "durations": [w.duration for w in (frames.writers if VAD_MODE else [frames])],
+			  "preroll": (pressed - start) / CHANNELS / SAMPLE_RATE, "start_ns": stream.sample_ns(start)}
+	if vad is not None:
+		record["speech"] = vad
+	return record
 
 	  
-# Save Recording
-def save_audio(fname, frames):
-	# Save Recording
-	print(f"[INFO] Saving Audio...")
-	with wave.open(RECORDINGS + f"{fname}.wav", "wb") as f:
-		f.setnchannels(CHANNELS)
-		f.setsampwidth(mic.get_sample_size(paInt16))
-		f.setframerate(SAMPLE_RATE)
-		f.writeframes(frames)
+# Report the saved Recording
+def save_audio(fname):
 	print(f"[FILE] Audio saved to {RECORDINGS}{fname}")
 	print(f"\t[INFO] File Size: {os.path.getsize(RECORDINGS+fname+'.wav')/1024:.2f} KB")
 	  
@@ -218,57 +300,140 @@ def save_audio(fname, frames):
 ## ==========[ BUTTON EVENTS ]========== ##
 def setup_button():
 	global button
-	button = Button(BUTTON_PIN, bounce_time=0.5)
-	button.when_held = on_button_press
-	button.hold_time = 0.5
-	button.hold_repeat = False
-	button.when_released = on_button_release
-
-
-# Button Press Event
-def on_button_press():
-	take_picture()
-	record_audio()
-
-# Button Release Event
-def on_button_release():
-	do_nothing()
+	button = devices.Button(BUTTON_PIN, bounce_time=0.5)
+
+
+# Button Press: audio starts first, the stills are captured next to it, and both are joined on release.
+# ZSL captures pick the frame closest to the press.
+async def on_button_press(rt, edges, pressed_ns):
+	fname = unique_stamp()
+	audio = start_audio(rt, fname)
+	armed_ns = monotonic_ns()
+	print(f"[INFO] Recording Started ({(armed_ns - pressed_ns) / 1e6:.1f} ms after the press)")
+	pictures = rt.blocking(take_picture, pressed_ns)
+	released_ns = None
+	try:
+		released_ns = (await edges.released()).t_ns
+	finally:
+		# Stop Recording (on Ctrl+C too, so the files are always closed)
+		recording = await stop_audio(rt, audio)
+		try:
+			stills = await pictures
+		except Exception as e:
+			print(f"[ERROR] Stills: {e}")
+			stills = []
+	write_session(fname, pressed_ns, armed_ns, released_ns, recording, stills)
+
+
+# Offset of a monotonic_ns timestamp from the press, in ms
+def offset_ms(t_ns, t0_ns):
+	return None if t_ns is None else round((t_ns - t0_ns) / 1e6, 3)
+
+
+# Still record with its timestamps as offsets from the press
+def still_offsets(record, t0_ns):
+	offsets = {k[:-3] + "_ms": offset_ms(record[k], t0_ns) for k in ("requested_ns", "sensor_timestamp_ns", "done_ns") if record.get(k)}
+	return dict(record, **offsets)
+
+
+# Session record: every event on one timeline, in ms from the press
+def write_session(fname, t0_ns, armed_ns, released_ns, recording, stills):
+	start_ns = recording.pop("start_ns")
+	session = {
+		"session": fname,
+		"pressed_ns": t0_ns,
+		"audio_latency_ms": offset_ms(armed_ns, t0_ns),	# Press to the recorder running
+		"released_ms": offset_ms(released_ns, t0_ns),
+		"audio": dict(recording, start_ms=offset_ms(start_ns, t0_ns)),
+		"stills": [still_offsets(r, t0_ns) for r in stills],
+	}
+	with open(f"{SESSIONS}{fname}.json", "w") as f:
+		json.dump(session, f, indent=4)
+	print(f"[FILE] Session saved to {SESSIONS}{fname}.json")
+	# Catalog: the session and everything it captured
+	catalog.add_stills(stills, {0: control0, 1: control1}, session=fname, source="piVision")
+	for path, duration in zip(recording["files"], recording["durations"]):
+		catalog.add_recording(path, duration, wall_time(start_ns), session=fname, source="piVision")
+	catalog.add_session(fname, wall_time(t0_ns), wall_time(released_ns) if released_ns else None,
+						cams=[r["cam"] for r in stills if "error" not in r], has_audio=recording["duration"] > 0,
+						audio_latency_ms=session["audio_latency_ms"], source="piVision", path=f"{SESSIONS}{fname}.json")
+	# Uploads: the session's files, then the session record that ties them together
+	if uploads is not None:
+		meta = {"session": fname, "source": "piVision"}
+		for r in stills:
+			if "file" in r:
+				uploads.put("still", r["file"], dict(meta, cam=r["cam"]))
+		for path, duration in zip(recording["files"], recording["durations"]):
+			if duration:
+				uploads.put("recording", path, dict(meta, duration=duration))
+		uploads.put("session", f"{SESSIONS}{fname}.json", meta)
+	return session
 
 # Terminate
 def terminate():
 	if stream:
-		stream.stop_stream()
+		stream.stop()
 		stream.close()
+	for buf in zsl.values():
+		buf.stop()
+	writer.stop()
+	catalog.close()
+	if uploads is not None:
+		uploads.close()
 	stop_camera(cam0)
 	stop_camera(cam1)
 	mic.terminate()
 	print("[INFO] Terminated all processes")
-	exit(0)
 
 
 ## ==========[ MAIN FUNCTION ]========== ##
-def main():
-	global cam0, cam1, mic, button, frames, stream, info
+async def serve(rt):
+	global cam0, cam1, mic, stream, zsl, writer, catalog, uploads
 	
-	# Setup Button
-	setup_button()
-	# Start Cameras
-	cam0 = start_camera(0, control0, preview=False)
-	cam1 = start_camera(1, control1, preview=False)
-	# Start Microphone
-	mic = start_microphone()
+	# Create Directories if they don't exist
+	for d in (STILLS, RECORDINGS, SESSIONS):
+		os.makedirs(d, exist_ok=True)
+	for f in recover_dir(RECORDINGS):
+		print(f"[INFO] Recovered interrupted recording: {f}")
+	writer = StillWriter()
+	catalog = Catalog(CATALOG)
+	if UPLOAD_URL:
+		uploads = JobQueue(UPLOAD_QUEUE)
+		uploader = asyncio.create_task(Uploader(uploads, UPLOAD_URL).run())
+	# Start Cameras, Microphone and Button at the same time (each loads its library on first use)
+	startup = rt.startup
+	cam0, cam1, mic, _ = await asyncio.gather(
+		startup.phase("cam0", rt.blocking(start_camera, 0, control0, False)),
+		startup.phase("cam1", rt.blocking(start_camera, 1, control1, False)),
+		startup.phase("mic", rt.blocking(start_microphone)),
+		startup.phase("button", rt.blocking(setup_button)))
+	edges = rt.button(button)
+	if CAPTURE_MODE == "zsl":
+		zsl = {n: ZslBuffer(cam, depth=ZSL_DEPTH, max_mb=ZSL_MAX_MB) for n, cam in ((0, cam0), (1, cam1))
+			if cam is not None and not isinstance(cam, framebus.BusCamera)}
+	# Open the input stream once; it keeps the pre-roll ring filled between recordings
+	stream = await startup.phase("stream", rt.blocking(MicCapture, mic, DEVICE, SAMPLE_RATE, CHANNELS, CHUNK))
+	stream.start()
+	startup.report()
 
 	try:
 		while True:
-			sleep(0.5)
-			if frames is None and info:
-				info = False
-				print("\n\n[READY] Press Button to Take a Picture & Record Audio | [CTRL+C] to Exit")
-	except KeyboardInterrupt:
-		print("Exiting...")
+			print("\n\n[READY] Press Button to Take a Picture & Record Audio | [CTRL+C] to Exit")
+			edge = await edges.pressed()
+			await on_button_press(rt, edges, edge.t_ns)
+	finally:
+		edges.close()
+		if uploads is not None:
+			uploader.cancel()
+			await asyncio.gather(uploader, return_exceptions=True)
+		await rt.drain()
 		terminate()
 
 
+def main():
+	runtime.run(serve)
+
+
 ## ==========[ DRIVER ]========== ##
 if __name__ == "__main__":
 	main()
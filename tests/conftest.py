@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The PiCommon modules are imported from the repository root; devices are always the simulated ones
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["PI_DEVICES"] = "sim"
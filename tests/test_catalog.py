@@ -0,0 +1,122 @@
+import os
+import struct
+import time
+from datetime import datetime
+
+import pytest
+
+from PiCommon import catalog
+from PiCommon.catalog import Catalog, parse_time
+
+
+@pytest.fixture
+def cat(tmp_path):
+    c = Catalog(str(tmp_path / "catalog.db"), interval=0.05)
+    yield c
+    c.close()
+
+
+def test_captures_queries(cat, tmp_path):
+    for i in range(6):
+        path = tmp_path / f"cam{i % 2}_{i}.jpg"
+        path.write_bytes(b"x" * (100 + i))
+        cat.add_capture("still", str(path), captured_at=1000 + i, cam=i % 2, session="s1" if i < 4 else "s2", source="piCam")
+    cat.add_recording(str(tmp_path / "a.wav"), 2.5, captured_at=1003, source="piMic", meta={"rate": 16000})
+    assert cat.flush(5)
+
+    stills = cat.captures(kind="still")
+    assert [r["captured_at"] for r in stills] == [1000 + i for i in range(6)]
+    assert [r["size"] for r in stills] == [100 + i for i in range(6)]
+    assert len(cat.captures(cam=1)) == 3
+    assert len(cat.captures(since=1002, until=1004)) == 3         # Two stills and the recording
+    assert len(cat.captures(session="s2")) == 2
+    assert len(cat.captures(source="piMic")) == 1
+    assert len(cat.captures(limit=2)) == 2
+    recording = cat.captures(kind="recording")[0]
+    assert recording["duration"] == 2.5 and recording["meta"] == '{"rate": 16000}'
+
+    totals = {r["kind"]: r for r in cat.stats()}
+    assert totals["still"]["count"] == 6 and totals["still"]["size"] == sum(100 + i for i in range(6))
+
+
+def test_same_path_replaces(cat, tmp_path):
+    path = tmp_path / "a.jpg"
+    path.write_bytes(b"x")
+    cat.add_capture("still", str(path), captured_at=1)
+    cat.add_capture("still", str(path), captured_at=2)
+    cat.flush(5)
+    assert [r["captured_at"] for r in cat.captures()] == [2]
+
+
+def test_sessions_filters(cat):
+    cat.add_session("a", 100, 110, cams=[0], has_audio=True)
+    cat.add_session("b", 200, 210, cams=[0, 1, 1])
+    cat.add_session("c", 300, None, cams=[0, 1], has_audio=True, audio_latency_ms=12.5)
+    cat.flush(5)
+
+    assert [s["id"] for s in cat.sessions()] == ["a", "b", "c"]
+    assert [s["id"] for s in cat.sessions(both_cams=True)] == ["b", "c"]
+    assert [s["id"] for s in cat.sessions(audio=True)] == ["a", "c"]
+    assert [s["id"] for s in cat.sessions(both_cams=True, audio=True)] == ["c"]
+    assert [s["id"] for s in cat.sessions(since=150, until=300)] == ["b"]
+    assert cat.sessions(since=300)[0]["cams"] == "0,1"
+
+
+def test_still_waits_for_its_file(cat, tmp_path):
+    path = tmp_path / "late.jpg"
+    cat.add_stills([{"file": str(path), "cam": 0, "index": 0},
+                    {"file": str(tmp_path / "bad.jpg"), "cam": 1, "error": "timeout"}])
+    time.sleep(0.2)
+    assert cat.captures() == []         # Pending: not written without its size
+    # Renamed into place once encoded, like the still writers do
+    (tmp_path / "late.tmp").write_bytes(b"y" * 321)
+    os.replace(tmp_path / "late.tmp", path)
+    deadline = time.monotonic() + 5
+    while not cat.captures() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    rows = cat.captures()
+    assert len(rows) == 1 and rows[0]["size"] == 321 and rows[0]["meta"] == '{"index": 0}'
+
+
+def test_missing_file_is_written_on_flush(cat, tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "PENDING_TIMEOUT", 60)
+    cat.add_capture("still", str(tmp_path / "never.jpg"), captured_at=5)
+    cat.flush(5)
+    rows = cat.captures()
+    assert len(rows) == 1 and rows[0]["size"] is None
+
+
+def test_add_never_blocks_on_a_busy_writer(cat, tmp_path):
+    start = time.perf_counter()
+    for i in range(2000):
+        cat.add_capture("still", str(tmp_path / f"{i}.jpg"), captured_at=i, size=1)
+    assert time.perf_counter() - start < 1.0
+    cat.flush(10)
+    assert len(cat.captures()) == 2000
+
+
+def test_scan(cat, tmp_path):
+    media = tmp_path / "media"
+    media.mkdir()
+    (media / "cam1_0001.jpg").write_bytes(b"j" * 50)
+    (media / "notes.txt").write_text("skip")
+    header = b"RIFF" + struct.pack("<I", 36 + 32000) + b"WAVEfmt " + struct.pack("<IHHIIHH", 16, 1, 1, 16000, 32000, 2, 16)
+    (media / "a.wav").write_bytes(header + b"data" + struct.pack("<I", 32000) + b"\0" * 32000)
+    assert cat.scan(str(media), source="import") == 2
+    by_kind = {r["kind"]: r for r in cat.captures()}
+    assert by_kind["still"]["cam"] == 1
+    assert by_kind["recording"]["duration"] == 1.0
+    # Known files aren't added twice
+    assert cat.scan(str(media)) == 0
+
+
+def test_parse_time():
+    assert parse_time(None) is None
+    assert parse_time("2026-10-13") == datetime(2026, 10, 13).timestamp()
+    assert parse_time("2026-10-13 14:00") == datetime(2026, 10, 13, 14).timestamp()
+    today = parse_time("today")
+    assert parse_time("yesterday") == pytest.approx(today - 86400, abs=3600)    # DST
+    assert parse_time("-2h") == pytest.approx(time.time() - 7200, abs=5)
+    assert parse_time("-3d") == pytest.approx(time.time() - 3 * 86400, abs=3605)
+    with pytest.raises(ValueError):
+        parse_time("last week")
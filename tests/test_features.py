@@ -0,0 +1,35 @@
+import numpy as np
+
+from PiCommon.features import FeatureAnalyzer
+
+
+def test_features_of_a_tone(tmp_path):
+    rate = 16000
+    t = np.arange(rate) / rate
+    tone = (np.sin(2 * np.pi * 1000 * t) * 16384).astype(np.int16)
+    fa = FeatureAnalyzer(rate)
+    for i in range(0, len(tone), 1000):
+        fa.write(tone[i:i + 1000])
+    summary = fa.close(str(tmp_path / "a.features.npz"))
+
+    assert summary["duration"] == 1.0
+    assert summary["clipped"] == 0
+    assert -10 < summary["rms_dbfs"] < -8          # -6 dB peak sine: about -9 dBFS RMS
+    with np.load(str(tmp_path / "a.features.npz")) as data:
+        spec = data["spectrogram"]
+        assert data["levels"].shape == (16, 3)
+    # Chunks of 1000 samples still give every window of the whole recording
+    assert len(spec) == (rate - 1024) // 512 + 1
+    assert abs(int(spec.astype(np.float32).mean(axis=0).argmax()) - 1000 * 1024 // rate) <= 1
+
+
+def test_empty_recording_saves_plain_numbers(tmp_path):
+    path = str(tmp_path / "empty.features.npz")
+    summary = FeatureAnalyzer(16000).close(path)
+    assert summary["duration"] == 0
+    assert np.isnan(summary["rms_dbfs"]) and np.isnan(summary["peak_dbfs"])
+    # Loads without allow_pickle: no object arrays
+    with np.load(path) as data:
+        assert all(data[k].dtype != object for k in data.files)
+        assert data["levels"].shape == (0, 3)
+        assert np.isnan(data["rms_dbfs"])
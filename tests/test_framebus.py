@@ -0,0 +1,133 @@
+import os
+
+import numpy as np
+import pytest
+
+from PiCommon.framebus import BUS_DROPS, DELIVERED, DROPPED, MAX_HELD, BusFrame, BusRing
+
+STREAMS = {"main": {"size": [8, 4], "format": "RGB888", "shape": [4, 8, 3], "dtype": "|u1"}}
+
+
+@pytest.fixture
+def ring():
+    ring = BusRing(STREAMS, slots=4)
+    yield ring
+    ring.close()
+
+
+# What the bus does for each camera frame: copy into a free slot and publish it, or drop it
+def publish(ring, value):
+    slot = ring.acquire()
+    if slot is None:
+        ring.header[BUS_DROPS] += 1
+        return None
+    ring.frames["main"][slot][...] = value
+    return ring.commit(slot, value)
+
+
+def test_refcounts_follow_holds(ring):
+    a = ring.add_subscriber("latest", os.getpid())
+    b = ring.add_subscriber("latest", os.getpid())
+    publish(ring, 1)
+    hold_a, slot, seq = ring.take(a)
+    hold_b, slot_b, _ = ring.take(b)
+    assert seq == 0 and slot_b == slot
+    assert ring.refcounts()[slot] == 2
+    ring.release(a, hold_a)
+    assert ring.refcounts()[slot] == 1
+    ring.release(b, hold_b)
+    assert ring.refcounts() == [0] * 4
+
+
+def test_held_slots_are_not_reused(ring):
+    row = ring.add_subscriber("latest", os.getpid())
+    publish(ring, 1)
+    hold, held, _ = ring.take(row)
+    for i in range(10):
+        publish(ring, 2 + i)
+        assert ring.slot_meta[held, 0] == 0
+    frame = BusFrame(ring, row, hold, held, 0)
+    assert np.all(frame["main"] == 1)
+    frame.release()
+    frame.release()         # Releasing twice is harmless
+    assert ring.refcounts() == [0] * 4
+
+
+def test_latest_skips_to_newest(ring):
+    row = ring.add_subscriber("latest", os.getpid())
+    assert ring.take(row) is None
+    for i in range(3):
+        publish(ring, i)
+    hold, slot, seq = ring.take(row)
+    assert seq == 2 and np.all(ring.frames["main"][slot] == 2)
+    assert ring.subs[row, DELIVERED] == 1 and ring.subs[row, DROPPED] == 2
+    ring.release(row, hold)
+    assert ring.take(row) is None
+
+
+def test_queue_reads_in_order_and_drops_when_lapped(ring):
+    row = ring.add_subscriber("queue", os.getpid())
+    for i in range(3):
+        publish(ring, i)
+    seqs = []
+    for _ in range(3):
+        hold, _, seq = ring.take(row)
+        ring.release(row, hold)
+        seqs.append(seq)
+    assert seqs == [0, 1, 2]
+
+    # 6 more frames through 4 slots: the first 2 are gone by the time it reads
+    for i in range(6):
+        publish(ring, 3 + i)
+    hold, _, seq = ring.take(row)
+    assert seq == 5
+    assert ring.subs[row, DROPPED] == 2
+    ring.release(row, hold)
+
+
+def test_block_keeps_unread_frames(ring):
+    row = ring.add_subscriber("block", os.getpid())
+    assert [publish(ring, i) for i in range(6)] == [0, 1, 2, 3, None, None]
+    assert ring.header[BUS_DROPS] == 2
+    # Reading one frame frees its slot for the next camera frame
+    hold, _, seq = ring.take(row)
+    ring.release(row, hold)
+    assert seq == 0
+    assert publish(ring, 6) == 4
+    seqs = []
+    while (got := ring.take(row)) is not None:
+        ring.release(row, got[0])
+        seqs.append(got[2])
+    assert seqs == [1, 2, 3, 4]
+    assert ring.subs[row, DROPPED] == 0
+
+
+def test_hold_limit():
+    ring = BusRing(STREAMS, slots=MAX_HELD + 2)
+    row = ring.add_subscriber("queue", os.getpid())
+    for i in range(MAX_HELD + 1):
+        publish(ring, i)
+    for _ in range(MAX_HELD):
+        ring.take(row)
+    with pytest.raises(RuntimeError):
+        ring.take(row)
+    ring.remove_subscriber(row)
+    ring.close()
+
+
+def test_remove_subscriber_drops_its_references(ring):
+    row = ring.add_subscriber("queue", os.getpid())
+    for i in range(3):
+        publish(ring, i)
+    for _ in range(3):
+        ring.take(row)
+    assert sum(ring.refcounts()) == 3
+    # Every slot but one is held: the bus keeps publishing into the last free one, then drops
+    assert publish(ring, 3) == 3
+    assert publish(ring, 4) == 4
+    ring.take(row)
+    assert publish(ring, 5) is None
+    ring.remove_subscriber(row)
+    assert ring.refcounts() == [0] * 4
+    assert ring.active_rows() == []
+    assert publish(ring, 6) == 5
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from PiCommon import simdevices
+from PiCommon.micstream import MicCapture, RingReader
+
+RATE = 1000
+CHUNK = 100
+
+
+@pytest.fixture
+def capture():
+    # 1 s ring of 10 chunks; the stream isn't started, chunks are fed by hand
+    cap = MicCapture(simdevices.PyAudio(), None, RATE, chunk=CHUNK, seconds=1)
+    yield cap
+    cap.close()
+
+
+# Next `chunks` chunks, each sample holding its position (mod 2**15)
+def feed(capture, chunks=1):
+    for _ in range(chunks):
+        pos = capture.written
+        data = (np.arange(pos, pos + CHUNK) % 32768).astype(np.int16)
+        capture.callback(data.tobytes(), CHUNK, None, 0)
+
+
+def test_ring_wraps_around(capture):
+    reader = capture.reader(start=0)
+    feed(capture, 7)
+    assert np.array_equal(reader.read(), np.arange(700))
+    feed(capture, 6)        # Past the end of the ring and back to the start
+    assert np.array_equal(reader.read(), np.arange(700, 1300))
+    assert reader.overruns == 0
+
+
+def test_odd_chunk_wraps_around(capture):
+    reader = capture.reader(start=0)
+    feed(capture, 9)
+    assert len(reader.read()) == 900
+    # A chunk that isn't the stream's size straddles the end of the ring
+    data = np.arange(900, 1050, dtype=np.int16)
+    capture.callback(data.tobytes(), len(data), None, 0)
+    assert np.array_equal(reader.read(), np.arange(900, 1050))
+    assert np.array_equal(capture.ring[:50], np.arange(1000, 1050))
+
+
+def test_read_up_to_end(capture):
+    reader = capture.reader(start=0)
+    feed(capture, 3)
+    assert len(reader.read(end=250)) == 250
+    assert np.array_equal(reader.read(), np.arange(250, 300))
+
+
+def test_lapped_before_the_copy(capture):
+    reader = capture.reader(start=0)
+    feed(capture, 25)
+    data = reader.read()
+    assert reader.overruns == 1
+    # Everything the ring still holds but the chunk the next callback would overwrite
+    assert np.array_equal(data, np.arange(1600, 2500))
+    capture.release(reader)
+    assert capture.overruns == 1
+
+
+# Ring whose writer races ahead while a reader copies from it
+class RacingCapture:
+    def __init__(self, written):
+        self.rate = RATE
+        self.channels = 1
+        self.chunk = 4
+        self.ring = np.arange(16, dtype=np.int16)
+        self.seen = iter(written)
+
+    @property
+    def written(self):
+        return next(self.seen)
+
+
+def test_lapped_during_the_copy():
+    # 12 samples when the read starts, 20 once it has copied them
+    reader = RingReader(RacingCapture([12, 12, 20]), 0)
+    data = reader.read()
+    # Samples 0..7 were overwritten (or are about to be) while they were copied
+    assert np.array_equal(data, np.arange(8, 12))
+    assert reader.overruns == 1
+    assert reader.pos == 12
+
+
+def test_underrun(capture):
+    reader = capture.reader()
+    assert reader.read(timeout=0.05) is None
+    assert reader.underruns == 1
+    feed(capture)
+    assert len(reader.read(timeout=0.05)) == CHUNK
+
+
+def test_preroll(capture):
+    feed(capture, 5)
+    start = capture.preroll_start(0.2)
+    assert start == 300
+    assert np.array_equal(capture.reader(start).read(), np.arange(300, 500))
+    # No further back than the ring holds
+    feed(capture, 20)
+    assert capture.preroll_start(60) == 2500 - 1000 + CHUNK
+
+
+def test_sample_clock(capture):
+    assert capture.sample_ns(0) is None
+    feed(capture, 2)
+    written, ns = capture.clock
+    assert written == 200
+    assert capture.sample_ns(100) == ns - 100_000_000
@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from PiCommon import offload
+from PiCommon.offload import JobQueue, StandInServer, Uploader, read_body
+
+
+def make_files(tmp_path, count, size=100):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"file_{i}.bin"
+        path.write_bytes(bytes([i % 256]) * size)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.db"))
+    yield q
+    q.close()
+
+
+def states(q):
+    return q.depth()[0]
+
+
+def test_claim_marks_inflight(jobs, tmp_path):
+    ids = [jobs.put("still", p, {"cam": 0}) for p in make_files(tmp_path, 5)]
+    claimed = jobs.claim(limit=3)
+    assert [j["id"] for j in claimed] == ids[:3]
+    assert claimed[0]["size"] == 100
+    assert states(jobs) == {"inflight": 3, "queued": 2}
+    jobs.done([j["id"] for j in claimed])
+    assert states(jobs) == {"done": 3, "queued": 2}
+
+
+def test_claim_respects_max_bytes(jobs, tmp_path):
+    for p in make_files(tmp_path, 4, size=1000):
+        jobs.put("still", p)
+    assert len(jobs.claim(limit=10, max_bytes=2500)) == 2
+    # A single file bigger than the limit still goes, on its own
+    assert len(jobs.claim(limit=10, max_bytes=10)) == 1
+
+
+def test_inflight_jobs_survive_a_crash(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    q = JobQueue(path)
+    for p in make_files(tmp_path, 3):
+        q.put("still", p)
+    q.claim(limit=2)
+    q.close()                       # The process died with two jobs inflight
+
+    q = JobQueue(path)
+    assert states(q) == {"queued": 3}
+    assert len(q.claim(limit=10)) == 3
+    q.close()
+
+
+def test_retry_backs_off_then_fails(jobs, tmp_path, monkeypatch):
+    monkeypatch.setattr(offload, "BACKOFF", 10.0)
+    monkeypatch.setattr(offload, "MAX_ATTEMPTS", 3)
+    jobs.put("still", make_files(tmp_path, 1)[0])
+    job = jobs.claim()[0]
+    before = time.time()
+    jobs.retry([job], "HTTP 503")
+    row = jobs.db().execute("SELECT * FROM jobs").fetchone()
+    assert row["state"] == "queued" and row["attempts"] == 1 and row["error"] == "HTTP 503"
+    assert before + 5 <= row["next_at"] <= time.time() + 10
+    assert jobs.claim() == []       # Not due yet
+
+    jobs.retry([dict(job, attempts=1)], "HTTP 503")
+    row = jobs.db().execute("SELECT * FROM jobs").fetchone()
+    assert row["next_at"] >= before + 10       # Doubled
+    jobs.retry([dict(job, attempts=2)], "HTTP 503")
+    assert states(jobs) == {"failed": 1}
+
+
+def test_missing_file_waits_then_fails(jobs, tmp_path, monkeypatch):
+    path = tmp_path / "late.jpg"
+    jobs.put("still", str(path))
+    assert jobs.claim() == []
+    row = jobs.db().execute("SELECT * FROM jobs").fetchone()
+    assert row["state"] == "queued" and row["error"].startswith("File not found")
+    assert row["next_at"] > time.time()
+
+    # The file shows up: the job goes out once it is due again
+    path.write_bytes(b"z")
+    jobs.db().execute("UPDATE jobs SET next_at = 0")
+    assert len(jobs.claim()) == 1
+
+    jobs.put("still", str(tmp_path / "never.jpg"))
+    monkeypatch.setattr(offload, "NOT_READY_TIMEOUT", -1)
+    assert jobs.claim() == []
+    assert states(jobs).get("failed") == 1
+
+
+async def upload_all(jobs, count, **server_args):
+    server = StandInServer(**server_args)
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{listener.sockets[0].getsockname()[1]}/upload"
+    uploader = Uploader(jobs, url, workers=2, batch=4, stats_interval=0)
+    task = asyncio.create_task(uploader.run())
+    deadline = time.monotonic() + 20
+    while states(jobs).get("done", 0) + states(jobs).get("failed", 0) < count and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    listener.close()
+    await listener.wait_closed()
+    return server, uploader
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_uploader_sends_everything(jobs, tmp_path, chunked):
+    for p in make_files(tmp_path, 20, size=5000):
+        jobs.put("still", p)
+    server, uploader = asyncio.run(upload_all(jobs, 20, chunked=chunked))
+    assert states(jobs) == {"done": 20}
+    assert server.jobs == 20 and uploader.sent == 20
+    assert server.requests == uploader.requests < 20                # Batched
+    assert server.connections <= 2                                  # Kept alive
+
+
+def test_uploader_retries_failed_requests(jobs, tmp_path, monkeypatch):
+    monkeypatch.setattr(offload, "BACKOFF", 0.01)
+    monkeypatch.setattr(offload, "MAX_ATTEMPTS", 100)
+    for p in make_files(tmp_path, 20):
+        jobs.put("still", p)
+    server, uploader = asyncio.run(upload_all(jobs, 20, fail_rate=0.5))
+    assert states(jobs) == {"done": 20}
+    assert uploader.retries > 0
+    assert server.jobs == 20        # Nothing sent twice: failed requests weren't accepted
+
+
+def test_read_body():
+    async def read(data, headers):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_body(reader, headers)
+
+    chunked = b"5\r\nhello\r\n6;ext=1\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\n"
+    assert asyncio.run(read(chunked, {"transfer-encoding": "chunked"})) == b"hello world"
+    assert asyncio.run(read(b"abcdef", {"content-length": "3"})) == b"abc"
+    assert asyncio.run(read(b"to the end", {})) == b"to the end"
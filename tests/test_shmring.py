@@ -0,0 +1,96 @@
+import multiprocessing as mp
+
+import numpy as np
+
+from PiCommon.shmring import ShmRing
+
+
+def test_write_and_read():
+    ring = ShmRing((4, 4), np.uint8, slots=3)
+    out = np.empty((4, 4), dtype=np.uint8)
+    assert ring.read_latest(out) is None
+
+    ring.write(np.full((4, 4), 7, dtype=np.uint8), 11, 12)
+    seq, meta = ring.read_latest(out)
+    assert seq == 0 and np.all(out == 7)
+    assert list(meta[2:4]) == [11, 12]
+    # Nothing newer than what was already read
+    assert ring.read_latest(out, since=seq) is None
+
+    for i in range(1, 5):
+        ring.write(np.full((4, 4), i, dtype=np.uint8))
+    seq, _ = ring.read_latest(out, since=0)
+    assert seq == 4 and np.all(out == 4)
+    ring.close()
+
+
+def test_attach():
+    ring = ShmRing((8,), np.int32, slots=2)
+    other = ShmRing.attach(ring.spec)
+    ring.write(np.arange(8, dtype=np.int32))
+    out = np.empty(8, dtype=np.int32)
+    assert other.read_latest(out)[0] == 0
+    assert np.array_equal(out, np.arange(8))
+    other.close()
+    ring.close()
+
+
+# Stands in for the reader's buffer; the writer laps the ring while it is being filled
+class LappedDuringCopy:
+    def __init__(self, ring, writes):
+        self.ring = ring
+        self.writes = writes
+
+    def __setitem__(self, key, value):
+        for i in range(self.writes):
+            self.ring.write(np.full(self.ring.shape, 100 + i, dtype=self.ring.dtype))
+
+
+def test_torn_read_is_rejected():
+    ring = ShmRing((4,), np.uint8, slots=3)
+    ring.write(np.zeros(4, dtype=np.uint8))
+    # A full lap reuses the slot being copied
+    assert ring.read_latest(LappedDuringCopy(ring, 3)) is None
+    # Less than a lap leaves it alone
+    assert ring.read_latest(LappedDuringCopy(ring, 2))[0] == 3
+    ring.close()
+
+
+def test_slot_being_written():
+    ring = ShmRing((4,), np.uint8, slots=2)
+    ring.write(np.zeros(4, dtype=np.uint8))
+    ring.write(np.ones(4, dtype=np.uint8))
+    out = np.empty(4, dtype=np.uint8)
+    # Filling the next slot doesn't disturb the newest frame
+    ring.reserve()[...] = 9
+    assert ring.read_latest(out)[0] == 1 and np.all(out == 1)
+    # A writer that lapped the reader is already refilling the newest frame's slot
+    ring.meta[1, 0] = -1
+    assert ring.read_latest(out) is None
+    ring.close()
+
+
+def writer(spec, count):
+    ring = ShmRing.attach(spec)
+    for i in range(count):
+        ring.write(np.full(ring.shape, i % 251, dtype=ring.dtype), i % 251)
+    ring.close()
+
+
+def test_reads_across_processes_are_never_torn():
+    ring = ShmRing((256, 256), np.uint8, slots=2)
+    proc = mp.get_context("spawn").Process(target=writer, args=(ring.spec, 3000))
+    proc.start()
+    out = np.empty(ring.shape, dtype=np.uint8)
+    since, reads = -1, 0
+    while proc.is_alive() or ring.head > since:
+        got = ring.read_latest(out, since)
+        if got is None:
+            continue
+        since, meta = got
+        assert out.min() == out.max() == meta[2]
+        reads += 1
+    proc.join()
+    assert proc.exitcode == 0
+    assert reads > 0
+    ring.close()
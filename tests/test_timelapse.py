@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pytest
+
+from PiCommon.timelapse import TimelapseReader, TimelapseWriter
+
+
+def write_frames(path, count, close=True):
+    w = TimelapseWriter(path)
+    for i in range(count):
+        w.append(i % 2, bytes([i]) * (100 + i), timestamp_ns=i * 1000, wallclock_ns=1_700_000_000_000_000_000 + i)
+    if close:
+        w.close()
+    return w
+
+
+def test_closed_container(tmp_path):
+    path = str(tmp_path / "a.ptl")
+    write_frames(path, 6)
+    r = TimelapseReader(path)
+    assert not r.recovered
+    assert len(r) == 6
+    data = r.data(3)
+    assert bytes(data) == bytes([3]) * 103
+    data.release()
+    assert list(r.index["timestamp"]) == [i * 1000 for i in range(6)]
+    r.close()
+
+
+def test_unclosed_container_is_scanned(tmp_path):
+    path = str(tmp_path / "a.ptl")
+    w = write_frames(path, 5, close=False)
+    # Half of a sixth frame made it to disk before the crash
+    w.append(0, b"x" * 1000)
+    w.file.close()
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 500)
+
+    r = TimelapseReader(path)
+    assert r.recovered
+    assert len(r) == 5
+    data = r.data(4)
+    assert bytes(data) == bytes([4]) * 104
+    data.release()
+    r.close()
+
+
+def test_empty_unclosed_container(tmp_path):
+    path = str(tmp_path / "a.ptl")
+    TimelapseWriter(path).file.close()
+    r = TimelapseReader(path)
+    assert r.recovered and len(r) == 0
+    r.close()
+
+
+def test_not_a_container(tmp_path):
+    path = tmp_path / "a.ptl"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        TimelapseReader(str(path))
+
+
+def test_images_select_and_export(tmp_path):
+    path = str(tmp_path / "a.ptl")
+    w = TimelapseWriter(path)
+    for i in range(4):
+        w.append_image(i % 2, np.full((16, 24, 3), i * 60, dtype=np.uint8))
+    w.close()
+
+    r = TimelapseReader(path)
+    assert r.image(2).size == (24, 16)
+    assert list(r.select(cam=1)) == [1, 3]
+    assert list(r.select(start=1, end=3)) == [1, 2]
+    assert r.export(str(tmp_path / "out"), cam=0) == 2
+    names = sorted(os.listdir(tmp_path / "out"))
+    assert len(names) == 2 and all(n.startswith("cam0_") and n.endswith(".jpg") for n in names)
+    r.close()
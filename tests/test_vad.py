@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from PiCommon import vad
+from PiCommon.vad import VadWriter, VoiceDetector
+
+RATE = 16000
+CHUNK = 1024
+
+
+class ListWriter:
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, chunk):
+        self.chunks.append(np.array(chunk, dtype=np.int16))
+
+    def close(self):
+        self.closed = True
+
+    @property
+    def samples(self):
+        return sum(len(c) for c in self.chunks)
+
+
+def noise(seconds, level, seed=0):
+    return (np.random.default_rng(seed).standard_normal(int(seconds * RATE)) * level).astype(np.int16)
+
+
+def tone(seconds, level=8000, freq=220):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (np.sin(2 * np.pi * freq * t) * level).astype(np.int16)
+
+
+def feed(writer, audio):
+    for i in range(0, len(audio), CHUNK):
+        writer.write(audio[i:i + CHUNK])
+
+
+def run(audio, mode):
+    writers = []
+
+    def open_writer(index):
+        writers.append(ListWriter())
+        return writers[-1]
+
+    vw = VadWriter(open_writer, RATE, mode=mode)
+    feed(vw, audio)
+    return vw, vw.close(), writers
+
+
+# Quiet room, two utterances
+def speech_audio():
+    return np.concatenate([noise(1.0, 30), tone(0.8), noise(1.5, 30, 1), tone(0.6), noise(1.0, 30, 2)])
+
+
+def test_mark_finds_segments_and_keeps_everything():
+    audio = speech_audio()
+    vw, stats, writers = run(audio, "mark")
+    assert stats["count"] == 2
+    assert writers[0].samples == len(audio)
+    assert writers[0].closed
+    (s0, e0), (s1, e1) = [(s * 0.02, e * 0.02) for s, e in vw.segments]
+    # Onsets within the padding before the tones, ends within the hangover after them
+    assert 1.0 - vad.PAD_MS / 1000 - 0.1 <= s0 <= 1.0
+    assert 1.8 <= e0 <= 1.8 + vad.HANGOVER_MS / 1000 + 0.1
+    assert 3.3 - vad.PAD_MS / 1000 - 0.1 <= s1 <= 3.3
+
+
+def test_trim_drops_silence():
+    audio = speech_audio()
+    _, stats, writers = run(audio, "trim")
+    assert stats["count"] == 2
+    assert 0 < writers[0].samples < len(audio) / 2
+    assert stats["kept"] == pytest.approx(writers[0].samples / len(audio), abs=0.02)
+
+
+def test_split_writes_a_file_per_segment():
+    _, stats, writers = run(speech_audio(), "split")
+    assert stats["count"] == 2
+    assert len(writers) == 2
+    assert all(w.closed and w.samples > 0 for w in writers)
+
+
+def test_silence_and_clicks_are_not_speech():
+    click = np.zeros(int(0.02 * RATE), dtype=np.int16)
+    click[:40] = 20000
+    audio = np.concatenate([noise(1.0, 30), click, noise(1.0, 30, 1)])
+    _, stats, writers = run(audio, "trim")
+    assert stats["count"] == 0
+    assert writers[0].samples == 0
+
+
+def test_noisy_room_raises_the_floor():
+    # Loud steady noise from the start: the floor follows it instead of calling it all speech
+    audio = np.concatenate([noise(3.0, 3000), tone(0.8, 30000), noise(2.0, 3000, 1)])
+    vw, stats, _ = run(audio, "mark")
+    assert vw.detector.floor > vad.FLOOR_START_DB + vad.THRESHOLD_DB
+    segments = [(s * 0.02, e * 0.02) for s, e in vw.segments]
+    # Once the window has filled, the room noise is silence...
+    assert not any(s <= 2.5 <= e for s, e in segments)
+    assert segments[-1][1] <= 3.8 + (vad.HANGOVER_MS + 100) / 1000
+    # ...and the tone is still found
+    assert any(s <= 3.0 and e >= 3.8 for s, e in segments)
+
+
+def test_speech_at_the_very_start():
+    audio = np.concatenate([tone(0.8), noise(1.0, 30)])
+    vw, stats, _ = run(audio, "mark")
+    assert stats["count"] == 1
+    assert vw.segments[0][0] == 0
+
+
+def test_detector_carries_partial_frames():
+    det = VoiceDetector(RATE)
+    frames, speech = det.process(np.zeros(det.frame + 10, dtype=np.int16))
+    assert len(frames) == 1 and len(speech) == 1
+    assert len(det.pending) == 10
+    frames, _ = det.process(np.zeros(det.frame - 10, dtype=np.int16))
+    assert len(frames) == 1 and len(det.pending) == 0
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        VadWriter(lambda i: ListWriter(), RATE, mode="drop")
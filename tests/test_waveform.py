@@ -0,0 +1,41 @@
+import numpy as np
+
+from PiCommon.waveform import compute_peaks, envelope, load_peaks, save_peaks
+
+
+def test_envelope_of_a_ramp():
+    samples = np.arange(-8000, 8000, dtype=np.int16)
+    peaks = compute_peaks(samples, 16000)
+    x, mins, maxs, rms = envelope(peaks, 10)
+    assert len(x) == len(mins) == len(maxs) == len(rms) == 10
+    assert mins[0] == -8000 and maxs[-1] == 7999
+    assert np.all(np.diff(x) > 0)
+    assert np.all(mins <= maxs)
+
+
+def test_envelope_never_has_more_columns_than_buckets():
+    peaks = compute_peaks(np.ones(1000, dtype=np.int16), 16000)
+    x, _, _, _ = envelope(peaks, 5000)
+    assert 0 < len(x) <= -(-1000 // peaks["bucket"])
+
+
+def test_empty_recording():
+    peaks = compute_peaks(np.zeros(0, dtype=np.int16), 16000)
+    assert peaks["count"] == 0
+    x, mins, maxs, rms = envelope(peaks, 100)
+    assert len(x) == len(mins) == len(maxs) == len(rms) == 0
+
+
+def test_range_past_the_end():
+    peaks = compute_peaks(np.ones(5000, dtype=np.int16), 16000)
+    assert all(len(a) == 0 for a in envelope(peaks, 100, start=6000))
+    assert all(len(a) > 0 for a in envelope(peaks, 100, end=10 ** 9))
+
+
+def test_peaks_file_round_trip(tmp_path):
+    peaks = compute_peaks(np.arange(3000, dtype=np.int16), 8000)
+    path = str(tmp_path / "a.peaks.npz")
+    save_peaks(path, peaks)
+    loaded = load_peaks(path)
+    assert loaded["count"] == peaks["count"] and loaded["rate"] == 8000
+    assert np.array_equal(loaded["max"], peaks["max"])
@@ -0,0 +1,100 @@
+import os
+import struct
+import wave
+
+import numpy as np
+
+from PiCommon import wavstream
+from PiCommon.wavstream import HEADER_SIZE, UNFINISHED, WavWriter, read_samples, recover_dir, recover_wav
+
+
+def riff_size(path):
+    with open(path, "rb") as f:
+        f.seek(4)
+        return struct.unpack("<I", f.read(4))[0]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "a.wav")
+    samples = (np.arange(48000) % 2000 - 1000).astype(np.int16)
+    w = WavWriter(path, 1, 2, 16000)
+    for i in range(0, len(samples), 4096):
+        w.write(samples[i:i + 4096])
+    assert w.duration == 3.0
+    w.close()
+
+    with wave.open(path) as f:
+        assert (f.getnchannels(), f.getsampwidth(), f.getframerate(), f.getnframes()) == (1, 2, 16000, 48000)
+        assert np.array_equal(np.frombuffer(f.readframes(48000), dtype=np.int16), samples)
+    assert np.array_equal(read_samples(path), samples)
+    assert riff_size(path) == 36 + 2 * 48000
+
+
+def test_open_file_is_marked_and_synced(tmp_path, monkeypatch):
+    monkeypatch.setattr(wavstream, "SYNC_SECONDS", 0.5)
+    path = str(tmp_path / "a.wav")
+    w = WavWriter(path, 2, 2, 8000)
+    w.write(np.zeros(2 * 8000, dtype=np.int16))     # 1 s of stereo: synced
+    w.write(np.zeros(2 * 100, dtype=np.int16))      # Not synced yet
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    assert struct.unpack_from("<I", header, 4)[0] == UNFINISHED
+    assert struct.unpack_from("<I", header, 40)[0] == 4 * 8000
+    w.close()
+    assert riff_size(path) == 36 + 4 * 8100
+
+
+def test_recover_cut_off_recording(tmp_path):
+    path = str(tmp_path / "cut.wav")
+    w = WavWriter(path, 1, 2, 16000)
+    w.write(np.ones(20000, dtype=np.int16))
+    w.file.write(b"\x01")           # Half a sample, as if cut off mid-write
+    w.file.flush()                  # ...and never closed
+
+    assert recover_wav(path)
+    with wave.open(path) as f:
+        assert f.getnframes() == 20000
+    assert os.path.getsize(path) == HEADER_SIZE + 40000
+    assert riff_size(path) == 36 + 40000
+    # Fixed once is fixed for good
+    assert not recover_wav(path)
+    w.file.close()
+
+
+def test_recover_leaves_other_wavs_alone(tmp_path):
+    done = str(tmp_path / "done.wav")
+    w = WavWriter(done, 1, 2, 16000)
+    w.write(np.zeros(1000, dtype=np.int16))
+    w.close()
+
+    # A valid WAV with a LIST/INFO chunk after the data
+    tagged = str(tmp_path / "tagged.wav")
+    with wave.open(tagged, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(b"\0\0" * 100)
+    with open(tagged, "ab") as f:
+        f.write(b"LIST" + struct.pack("<I", 4) + b"INFO")
+    size = os.path.getsize(tagged)
+    with open(tagged, "r+b") as f:
+        f.seek(4)
+        f.write(struct.pack("<I", size - 8))
+
+    (tmp_path / "short.wav").write_bytes(b"RIFF")
+    before = {p: open(p, "rb").read() for p in (done, tagged)}
+
+    assert recover_dir(str(tmp_path)) == []
+    for p, data in before.items():
+        assert open(p, "rb").read() == data
+
+
+def test_recover_dir_only_fixes_unfinished(tmp_path):
+    for name, finish in (("a.wav", True), ("b.wav", False)):
+        w = WavWriter(str(tmp_path / name), 1, 2, 16000)
+        w.write(np.zeros(500, dtype=np.int16))
+        if finish:
+            w.close()
+        else:
+            w.file.close()
+    assert recover_dir(str(tmp_path)) == [str(tmp_path / "b.wav")]